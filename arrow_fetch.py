@@ -0,0 +1,90 @@
+import pandas as pd
+import pyarrow as pa
+
+from perf_trace import annotate, phase
+from text_cleanup import sanitize_arrow_table
+
+
+def iter_arrow_batches(conn, query, params=None):
+    """
+    Execute a query and yield its result as Arrow tables, one per result chunk, as they arrive.
+
+    Uses the connector's native Arrow result batches instead of the generic DBAPI
+    row path that pd.read_sql goes through.
+    """
+    cursor = conn.cursor()
+    try:
+        with phase("execute"):
+            cursor.execute(query, params)
+        for batch in cursor.fetch_arrow_batches():
+            yield batch
+    finally:
+        cursor.close()
+
+
+def iter_dataframes(conn, query, params=None, clean=False):
+    # Stream a large result into the app chunk by chunk instead of landing it all at once
+    for batch in iter_arrow_batches(conn, query, params):
+        yield (sanitize_arrow_table(batch) if clean else batch).to_pandas()
+
+
+def fetch_arrow_table(conn, query, params=None, on_batch=None):
+    """
+    Fetch a whole result as a single Arrow table.
+
+    Parameters:
+        on_batch (callable): Optional hook called with each Arrow batch as it arrives,
+            e.g. to report progress on a long fetch.
+    """
+    cursor = conn.cursor()
+    try:
+        with phase("execute"):
+            cursor.execute(query, params)
+        return read_arrow_table(cursor, on_batch)
+    finally:
+        cursor.close()
+
+
+def read_arrow_table(cursor, on_batch=None):
+    """Read the result a cursor holds (after execute or get_results_from_sfqid) as one Arrow table."""
+    with phase("fetch"):
+        batches = []
+        for batch in cursor.fetch_arrow_batches():
+            batches.append(batch)
+            if on_batch is not None:
+                on_batch(batch)
+        columns = [col[0] for col in cursor.description]
+
+    if not batches:  # No rows: keep the column names so callers can still index the result
+        annotate(rows=0, bytes=0)
+        return pa.table({name: pa.array([], type=pa.null()) for name in columns})
+    table = pa.concat_tables(batches)
+    annotate(rows=table.num_rows, bytes=table.nbytes)
+    return table
+
+
+def fetch_dataframe(conn, query, params=None, clean=False, on_batch=None):
+    """Drop-in replacement for pd.read_sql(query, conn, params=params) built on Arrow batches."""
+    return arrow_to_dataframe(fetch_arrow_table(conn, query, params, on_batch), clean)
+
+
+def fetch_query_result(conn, query_id, clean=False):
+    """DataFrame of a finished asynchronous query, looked up by its query ID."""
+    cursor = conn.cursor()
+    try:
+        cursor.get_results_from_sfqid(query_id)
+        table = read_arrow_table(cursor)
+    finally:
+        cursor.close()
+    return arrow_to_dataframe(table, clean)
+
+
+def arrow_to_dataframe(table, clean=False):
+    if table.num_rows == 0:
+        return pd.DataFrame(columns=table.column_names)
+    if clean:
+        with phase("clean"):
+            table = sanitize_arrow_table(table)
+    # Free Arrow buffers as columns are converted so peak memory stays close to one copy
+    with phase("convert"):
+        return table.to_pandas(split_blocks=True, self_destruct=True)
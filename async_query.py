@@ -0,0 +1,244 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from arrow_fetch import fetch_query_result
+from perf_trace import add_record
+from query_cache import get_query_cache
+from snapshot import connection_schema, get_snapshot_store
+from snowflake_pool import get_pool, secrets_connect_params
+
+# Threads for the short blocking round trips (submit, status check, result download), shared by all sessions
+DEFAULT_IO_WORKERS = 4
+
+# Status polling starts fast for short dashboard queries and backs off for long ones
+POLL_INTERVAL_SECONDS = 0.05
+MAX_POLL_INTERVAL_SECONDS = 1.0
+POLL_BACKOFF = 1.5
+
+DEFAULT_QUERY_TIMEOUT = 300
+
+# How often a waiting script checks whether it has been asked to rerun or stop
+WAIT_SLICE_SECONDS = 0.1
+
+# A finished async query: its DataFrame, Snowflake query ID and per-phase seconds (submit, execute, fetch)
+AsyncQueryResult = namedtuple("AsyncQueryResult", ["df", "query_id", "phases"])
+
+
+def split_query_spec(spec):
+    # A query spec is either plain SQL or a (sql, params) pair
+    if isinstance(spec, tuple):
+        return spec
+    return spec, None
+
+
+def _raise_if_rerun_requested():
+    """
+    Raise the calling script's pending RerunException/StopException, if it has one.
+
+    Streamlit has no public call for this. It handles a rerun or stop request at the
+    script's next yield point, and every session state access is one: SafeSessionState
+    calls the script runner's yield callback first. The lookup below is made only to
+    pass through that callback. This is Streamlit internals, so requirements.txt pins
+    the versions benchmarks/rerun_cancel_check.py has verified; run that check again
+    before widening the pin.
+    """
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        st.session_state.get("_")
+
+
+class AsyncQueryExecutor:
+    """
+    Runs warehouse queries as Snowflake asynchronous queries from one event loop thread.
+
+    A query is submitted with cursor.execute_async, which returns once Snowflake has
+    accepted it; its query ID is then polled with backoff until it finishes, and the
+    result is downloaded by ID. Only those round trips borrow a pooled connection and
+    an I/O thread. While the warehouse executes, nothing is held, so many queries from
+    many sessions can be in flight at once without tying up threads or connections.
+    """
+
+    def __init__(self, pool, io_workers=DEFAULT_IO_WORKERS, poll_interval=POLL_INTERVAL_SECONDS,
+                 max_poll_interval=MAX_POLL_INTERVAL_SECONDS, default_schema=None):
+        self.pool = pool
+        self.default_schema = default_schema  # "DATABASE.SCHEMA" of the pool's connections, for snapshot lookups
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="snowflake-async-io")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="snowflake-async", daemon=True)
+        self._thread.start()
+
+    def _blocking(self, fn, *args):
+        return self._loop.run_in_executor(self._io, fn, *args)
+
+    def _submit(self, query, params):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute_async(query, params)
+                return cursor.sfqid
+            finally:
+                cursor.close()
+
+    def _is_running(self, query_id):
+        with self.pool.connection() as conn:
+            # Raises ProgrammingError when the query failed
+            status = conn.get_query_status_throw_if_error(query_id)
+            return conn.is_still_running(status)
+
+    def _fetch(self, query_id, clean):
+        with self.pool.connection() as conn:
+            return fetch_query_result(conn, query_id, clean)
+
+    def _cancel(self, query_id):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT SYSTEM$CANCEL_QUERY(%s)", (query_id,))
+            finally:
+                cursor.close()
+
+    def _cancel_once_submitted(self, submit):
+        # The submit round trip finishes even if its waiter was cancelled; cancel what it started
+        if not submit.cancelled() and submit.exception() is None:
+            self._io.submit(self._cancel, submit.result())
+
+    async def query(self, query, params=None, clean=False, timeout=DEFAULT_QUERY_TIMEOUT):
+        """Submit one query, wait for it without blocking a thread, and return an AsyncQueryResult."""
+        phases = {}
+        started = time.perf_counter()
+        submit = self._blocking(self._submit, query, params)
+        try:
+            query_id = await asyncio.shield(submit)
+        except asyncio.CancelledError:
+            submit.add_done_callback(self._cancel_once_submitted)
+            raise
+        submitted = time.perf_counter()
+        phases["submit"] = submitted - started
+
+        delay = self.poll_interval
+        try:
+            while await self._blocking(self._is_running, query_id):
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError(f"Snowflake query {query_id} still running after {timeout}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * POLL_BACKOFF, self.max_poll_interval)
+        except (TimeoutError, asyncio.CancelledError):
+            # Don't leave an abandoned query running on the warehouse
+            self._io.submit(self._cancel, query_id)
+            raise
+        finished = time.perf_counter()
+        phases["execute"] = finished - submitted
+
+        df = await self._blocking(self._fetch, query_id, clean)
+        phases["fetch"] = time.perf_counter() - finished
+        return AsyncQueryResult(df, query_id, phases)
+
+    async def query_many(self, queries, clean=False, timeout=DEFAULT_QUERY_TIMEOUT):
+        tasks = {
+            name: asyncio.ensure_future(self.query(*split_query_spec(spec), clean=clean, timeout=timeout))
+            for name, spec in queries.items()
+        }
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # One query failed or the wait was cancelled: cancel the rest on the warehouse too
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
+
+    def run(self, coro, timeout=None):
+        """
+        Run a coroutine on the executor's loop and wait for its result.
+
+        A rerun or stop of the calling script interrupts the wait and cancels the
+        coroutine, so its queries don't keep running on the warehouse.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while not wait([future], WAIT_SLICE_SECONDS).done:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"No result after {timeout}s")
+                _raise_if_rerun_requested()
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def run_many(self, queries, clean=False, timeout=DEFAULT_QUERY_TIMEOUT):
+        """
+        Have all queries in flight at once and wait for them together.
+
+        Parameters:
+            queries (dict): Name -> SQL string or (SQL, params) tuple.
+
+        Returns:
+            dict: Name -> AsyncQueryResult, in the same order as queries.
+        """
+        return self.run(self.query_many(queries, clean, timeout))
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._io.shutdown(wait=False)
+
+
+@st.cache_resource
+def get_async_executor(**connect_params):
+    # One loop per pool, shared by every session in the process
+    return AsyncQueryExecutor(get_pool(**connect_params), default_schema=connection_schema(connect_params))
+
+
+def get_secrets_async_executor():
+    return get_async_executor(**secrets_connect_params())
+
+
+def load_batch_async(queries, executor=None, clean=False, timeout=DEFAULT_QUERY_TIMEOUT):
+    """
+    Load a page's independent queries together as Snowflake async queries.
+
+    Results in the shared query cache, and tables covered by the snapshot store, are
+    answered locally. Every remaining query is submitted at once and the script waits
+    on the executor's loop; if one fails, or the script reruns, the others are cancelled.
+
+    Returns:
+        dict: Name -> DataFrame, in the same order as queries.
+    """
+    cache = get_query_cache()
+    snapshot = get_snapshot_store()
+    default_schema = connection_schema(secrets_connect_params()) if executor is None else executor.default_schema
+    results, pending = {}, {}
+    for name, spec in queries.items():
+        query, params = split_query_spec(spec)
+        started = time.perf_counter()
+        df = cache.get(query, params)
+        if df is not None:
+            add_record("query", " ".join(query.split()), time.perf_counter() - started, cache="hit", rows=len(df))
+        elif snapshot is not None and snapshot.covers(query, default_schema):
+            df = snapshot.query(query, params, default_schema)
+            cache.put(query, df, params)
+            add_record("query", " ".join(query.split()), time.perf_counter() - started,
+                       cache="miss", source="snapshot", rows=len(df))
+        else:
+            pending[name] = (query, params)
+            continue
+        results[name] = df
+
+    if pending:
+        executor = executor or get_secrets_async_executor()
+        for name, result in executor.run_many(pending, clean, timeout).items():
+            query, params = pending[name]
+            cache.put(query, result.df, params)
+            add_record("query", " ".join(query.split()), sum(result.phases.values()), result.phases,
+                       cache="miss", source="async", query_id=result.query_id, rows=len(result.df))
+            results[name] = result.df
+    return {name: results[name] for name in queries}
@@ -0,0 +1,170 @@
+"""
+Cold-start budget check for the Streamlit apps.
+
+    python benchmarks/cold_start.py --runs 3 --strict
+
+Renders each app's first page in a fresh interpreter, as a newly started replica
+serving its first session would: Streamlit itself is already imported (the server
+loads it before running any script), nothing the script imports is. The local
+Snowflake stand-in (see standin.py) is only created on the first connection, and
+its import and seeding time is subtracted. Reports the median time against the
+app's budget, and which heavy libraries the first render pulled in.
+
+Budgets are derived, not guessed. REFERENCE_MEDIAN_SECONDS holds each app's median
+from `--runs 5` on an otherwise idle machine. Where two machines were measured, the
+slower median is kept. Each budget is that median times BUDGET_HEADROOM, rounded up
+to a tenth of a second. When an app's first page changes on purpose, measure it again
+and update its reference.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# Median seconds from script start to first complete render, per app (--runs 5, scale 1)
+REFERENCE_MEDIAN_SECONDS = {
+    "snowflake_streamlit_final_secrets.py": 0.91,
+    "snowflake_to_streamlit_final.py": 1.05,
+    "snowflake_streamlit_trail_secrets_multilang.py": 1.08,
+    "streamlit_chatbot_Hotels_POC.py": 0.94,
+    "streamlit_secrets_chatbot_POC.py": 1.08,
+    # The switching dashboards draw their charts on the first page, so matplotlib is part of the time
+    "streamlit_reddit_Google_POC_2025.py": 2.96,
+    "google_ecom_reddit_analysis_POC_2025.py": 3.9,
+}
+
+# Room left over the reference median for machine and run-to-run noise
+BUDGET_HEADROOM = 1.5
+
+COLD_START_BUDGET_SECONDS = {
+    script: math.ceil(median * BUDGET_HEADROOM * 10) / 10
+    for script, median in REFERENCE_MEDIAN_SECONDS.items()
+}
+# Not measured yet: streamlit-wordcloud could not be installed on the reference machines
+COLD_START_BUDGET_SECONDS["streamlit_secrets_video_anal_poc_2025.py"] = 1.5
+
+# Libraries slow enough to import that a first page should only load them when it uses them
+HEAVY_MODULES = ["matplotlib.pyplot", "snowflake.connector", "elasticsearch", "sqlalchemy", "transformers"]
+
+
+def child(script, secrets, scale, timeout):
+    # Stands in for the server: Streamlit is loaded before the clock starts, the app's imports are not
+    from streamlit.testing.v1 import AppTest
+
+    import snowflake_pool
+
+    standin = None
+    standin_seconds = 0.0
+    lock = threading.Lock()
+
+    def connect(**connect_params):
+        nonlocal standin, standin_seconds
+        with lock:
+            if standin is None:
+                started = time.perf_counter()
+                from standin import SnowflakeStandIn, synthetic_tables
+                standin = SnowflakeStandIn(synthetic_tables(scale))
+                standin_seconds = time.perf_counter() - started
+        return standin.connect(**connect_params)
+
+    snowflake_pool.snowflake_connect = connect
+    at = AppTest.from_file(os.path.join(REPO_DIR, script), default_timeout=timeout)
+    for section, values in secrets.items():
+        at.secrets[section] = values
+
+    started = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "seconds": round(elapsed - standin_seconds, 4),
+        "loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+    if at.exception:
+        result["error"] = at.exception[0].message.splitlines()[0]
+    print(json.dumps(result))
+
+
+def measure(script, secrets, workdir, scale, timeout):
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", script, "--secrets", json.dumps(secrets),
+         "--scale", str(scale), "--timeout", str(timeout)],
+        cwd=workdir, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join([REPO_DIR, BENCH_DIR])},
+    )
+    if process.returncode != 0:
+        return {"error": (process.stderr.strip().splitlines() or ["exited with %d" % process.returncode])[-1]}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per app; the median is reported")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--only", action="append", help="run only apps whose file name contains this (repeatable)")
+    parser.add_argument("--strict", action="store_true", help="exit non-zero when an app is over budget")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--secrets", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, json.loads(args.secrets), args.scale, args.timeout)
+        return
+
+    from run_benchmarks import PARAMETER_TXT, SECRETS, missing_modules
+
+    os.environ.pop("INSIGHTS_SNAPSHOT_DIR", None)
+    os.environ.pop("VIDEO_KEYWORD_STORE", None)
+    workdir = tempfile.mkdtemp(prefix="cold-start-")
+    with open(os.path.join(workdir, "parameter.txt"), "w") as f:
+        f.write(PARAMETER_TXT)
+    secrets = {
+        "snowflake": SECRETS,
+        "elasticsearch": {"endpoint": "http://localhost:9200", "api_key": "bench", "index_name": "hotels"},
+    }
+
+    results = []
+    over_budget = False
+    print(f"{'app':<48} {'seconds':>8} {'budget':>7}  heavy modules loaded")
+    for script, budget in COLD_START_BUDGET_SECONDS.items():
+        if args.only and not any(part in script for part in args.only):
+            continue
+        missing = missing_modules(script)
+        if missing:
+            skipped = f"{', '.join(missing)} not installed"
+            results.append({"app": script, "budget": budget, "skipped": skipped})
+            print(f"{script:<48} {'-':>8} {budget:>7.1f}  skipped: {skipped}")
+            continue
+        runs = [measure(script, secrets, workdir, args.scale, args.timeout) for _ in range(args.runs)]
+        timed = [run["seconds"] for run in runs if "seconds" in run]
+        error = next((run["error"] for run in runs if "error" in run), None)
+        seconds = statistics.median(timed) if timed else None
+        over = seconds is not None and seconds > budget
+        over_budget |= over
+        loaded = runs[-1].get("loaded", [])
+        results.append({"app": script, "seconds": seconds, "budget": budget, "over_budget": over,
+                        "loaded": loaded, **({"error": error} if error else {})})
+        shown = f"{seconds:>8.3f}" if seconds is not None else f"{'-':>8}"
+        print(f"{script:<48} {shown} {budget:>7.1f}  {', '.join(loaded) or '-'}"
+              + ("  OVER BUDGET" if over else "") + (f"  ! {error}" if error else ""))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"runs": args.runs, "scale": args.scale, "results": results}, f, indent=2)
+    if args.strict and over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
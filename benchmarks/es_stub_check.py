@@ -0,0 +1,282 @@
+"""
+End-to-end check of the hotel search app against a local Elasticsearch stub.
+
+    python benchmarks/es_stub_check.py
+
+Serves a small synthetic hotel index (and the hotels' TripAdvisor pages) over HTTP
+with the subset of the search, msearch and point-in-time APIs the app uses, then
+drives streamlit_secrets_chatbot_POC.py through Streamlit's AppTest: one query,
+then "Show more" until the results run out. Fails unless every matching hotel is
+shown exactly once, the shown total equals the number of matches, and the
+search's point in time is closed at the end. The first page and the total must
+arrive in a single msearch round trip.
+
+The index is split over several shards, as _doc ordering (a per-shard document
+number) would skip or repeat hits that tie on the primary sort key.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX = "hotels"
+SHARDS = 3
+QUERY = "4-star hotels under 6000 INR"
+
+SCORE_FIELDS = ["cleanliness_score", "amenities_score", "location_score", "dining_score",
+                "staff_score", "value_for_money_score", "overall_score"]
+
+
+def synthetic_hotels(count, seed, base_url):
+    rng = np.random.default_rng(seed)
+    hotels = []
+    for i in range(count):
+        hotel = {
+            "hotel_name": f"Stub Hotel {i}",
+            "city": "Delhi",
+            "star_rating": int(rng.integers(3, 6)),
+            "price_inr": int(rng.integers(2000, 9000)),
+            "summary": "Clean rooms and friendly staff.",
+            "tripadvisor_link": f"{base_url}/hotel/{i}",
+        }
+        hotel["price_usd"] = round(hotel["price_inr"] / 83, 2)
+        # Few distinct overall scores, so many hits tie on the primary sort key
+        hotel.update({field: int(rng.integers(60, 100)) for field in SCORE_FIELDS[:-1]})
+        hotel["overall_score"] = int(rng.choice([70, 80, 90]))
+        hotels.append(hotel)
+    return hotels
+
+
+def _matches(hotel, query):
+    for clause in query.get("bool", {}).get("filter", []):
+        if "term" in clause:
+            (field, value), = clause["term"].items()
+            if hotel.get(field) != value:
+                return False
+        elif "range" in clause:
+            (field, bounds), = clause["range"].items()
+            value = hotel.get(field)
+            if value is None or value < bounds.get("gte", value) or value > bounds.get("lte", value):
+                return False
+    return True
+
+
+class StubIndex:
+    """The hotel documents spread over shards, open points in time, and a log of requests."""
+
+    def __init__(self, hotels, shards=SHARDS):
+        self.hotels = hotels
+        self.shards = shards
+        self.requests = []
+        self.open_pits = set()
+        self._pit_ids = iter(range(1, 1 << 30))
+        self._lock = threading.Lock()
+
+    def log(self, method, path):
+        with self._lock:
+            self.requests.append((method, path.split("?")[0]))
+
+    def open_pit(self):
+        with self._lock:
+            pit_id = f"pit-{next(self._pit_ids)}"
+            self.open_pits.add(pit_id)
+        return pit_id
+
+    def close_pit(self, pit_id):
+        with self._lock:
+            self.open_pits.discard(pit_id)
+
+    def matching(self, query):
+        return [i for i, hotel in enumerate(self.hotels) if _matches(hotel, query)]
+
+    def _sort_key(self, i, sort):
+        # Hotel i is document i // shards of shard i % shards
+        shard, doc = i % self.shards, i // self.shards
+        key = []
+        for clause in sort:
+            field = clause if isinstance(clause, str) else next(iter(clause))
+            if field == "_doc":
+                key.append(doc)
+            elif field == "_shard_doc":
+                key.append((shard << 32) | doc)
+            else:
+                key.append(-self.hotels[i][field])
+        return key
+
+    def search(self, body):
+        sort = body.get("sort", [])
+        if "_shard_doc" in json.dumps(sort) and "pit" not in body:
+            raise ValueError("_shard_doc requires a point in time")
+        after = None
+        if "search_after" in body:
+            # Sort keys negate the (descending) score
+            after = [-body["search_after"][0]] + body["search_after"][1:]
+        ranked = []
+        for i in self.matching(body.get("query", {})):
+            key = self._sort_key(i, sort)
+            # Each shard filters by search_after on its own sort values
+            if after is not None and key <= after:
+                continue
+            ranked.append((key, i % self.shards, i))
+        # Merge the shards' hits; ties on every sort value are broken by shard number
+        ranked.sort()
+        hits = [{"_source": self.hotels[i], "sort": [-key[0]] + key[1:]} for key, _, i in ranked[:body.get("size", 10)]]
+        response = {"hits": {"hits": hits}}
+        if body.get("track_total_hits"):
+            response["hits"]["total"] = {"value": len(ranked), "relation": "eq"}
+        if "pit" in body:
+            if body["pit"]["id"] not in self.open_pits:
+                raise LookupError("search_context_missing_exception")
+            response["pit_id"] = body["pit"]["id"]
+        return response
+
+    def count(self, body):
+        return {"count": len(self.matching(body.get("query", {})))}
+
+    def msearch(self, lines):
+        # Header and body lines alternate; a failed search answers with an error item
+        responses = []
+        for body in lines[1::2]:
+            try:
+                responses.append(self.search(body))
+            except (LookupError, ValueError) as e:
+                responses.append({"error": {"type": str(e), "reason": str(e)}, "status": 400})
+        return {"responses": responses}
+
+
+def make_handler(index):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _data(self):
+            data = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.headers.get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            return data
+
+        def _body(self):
+            data = self._data()
+            return json.loads(data) if data else {}
+
+        def _reply(self, payload, content_type="application/json", status=200):
+            data = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("X-Elastic-Product", "Elasticsearch")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            index.log("GET", self.path)
+            if self.path.startswith("/hotel/"):
+                hotel = index.hotels[int(self.path.rsplit("/", 1)[1])]
+                self._reply(f'<html><q class="IRsGHoPm">Loved {hotel["hotel_name"]}</q></html>', "text/html")
+            else:
+                self._reply({"version": {"number": "9.0.0"}, "tagline": "You Know, for Search"})
+
+        def do_POST(self):
+            index.log("POST", self.path)
+            path = self.path.split("?")[0]
+            try:
+                if path.endswith("/_msearch"):
+                    self._reply(index.msearch([json.loads(line) for line in self._data().splitlines() if line.strip()]))
+                elif path.endswith("/_search"):
+                    self._reply(index.search(self._body()))
+                elif path.endswith("/_count"):
+                    self._reply(index.count(self._body()))
+                elif path.endswith("/_pit"):
+                    self._reply({"id": index.open_pit()})
+                else:
+                    self.send_error(404)
+            except (LookupError, ValueError) as e:
+                self._reply({"error": {"type": str(e), "reason": str(e)}, "status": 400}, status=400)
+
+        def do_DELETE(self):
+            index.log("DELETE", self.path)
+            index.close_pit(self._body()["id"])
+            self._reply({"succeeded": True, "num_freed": 1})
+
+    return Handler
+
+
+def run_check(hotel_count, seed, timeout):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), None)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    index = StubIndex(synthetic_hotels(hotel_count, seed, base_url))
+    server.RequestHandlerClass = make_handler(index)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["TRIPADVISOR_CACHE_DIR"] = tempfile.mkdtemp(prefix="tripadvisor-")
+    sys.path.insert(0, REPO_DIR)
+    at = AppTest.from_file(os.path.join(REPO_DIR, "streamlit_secrets_chatbot_POC.py"), default_timeout=timeout)
+    at.secrets["elasticsearch"] = {"endpoint": base_url, "api_key": "stub", "index_name": INDEX}
+    at.run()
+    at.text_input[0].input(QUERY).run()
+    pages = 1
+    while not at.exception and any(button.label == "Show more" for button in at.button):
+        next(button for button in at.button if button.label == "Show more").click().run()
+        pages += 1
+    # The point in time is closed without waiting for the reply
+    time.sleep(0.5)
+    server.shutdown()
+
+    if at.exception:
+        return [f"app raised: {at.exception[0].message.splitlines()[0]}"]
+    from hotel_es_query import build_hotel_search
+    from hotel_intent import parse_intent
+
+    shown = [subheader.value for subheader in at.subheader if subheader.value.startswith("Stub Hotel")]
+    expected = sorted(index.hotels[i]["hotel_name"] for i in index.matching(build_hotel_search(parse_intent(QUERY))["query"]))
+    caption = next((caption.value for caption in at.caption if caption.value.startswith("Showing")), "")
+
+    problems = []
+    if len(shown) != len(set(shown)):
+        problems.append(f"{len(shown) - len(set(shown))} hotels shown more than once")
+    if sorted(set(shown)) != expected:
+        problems.append(f"{len(set(expected) - set(shown))} matching hotels never shown")
+    if caption != f"Showing {len(expected)} of {len(expected)} matching hotels":
+        problems.append(f"unexpected total: {caption!r}")
+    if sum(1 for _, path in index.requests if path.startswith("/hotel/")) != len(expected):
+        problems.append("TripAdvisor pages were not fetched exactly once per hotel")
+    if index.open_pits:
+        problems.append(f"{len(index.open_pits)} points in time left open")
+
+    searches = sum(1 for _, path in index.requests if path.endswith("/_search"))
+    msearches = sum(1 for _, path in index.requests if path.endswith("/_msearch"))
+    counts = sum(1 for _, path in index.requests if path.endswith("/_count"))
+    if msearches != 1 or counts:
+        problems.append(f"first page and total took {msearches} msearch and {counts} count requests, expected one msearch")
+    if searches != pages - 1:
+        problems.append(f"{searches} searches for {pages - 1} later pages")
+    print(f"{len(expected)} matching hotels over {pages} pages: {msearches} msearch, {searches} searches")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    problems = run_check(args.hotels, args.seed, args.timeout)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Check that a rerun of the calling script cancels its in-flight async queries.
+
+    python benchmarks/rerun_cancel_check.py
+
+async_query waits for Snowflake in short slices and, between them, passes through a
+Streamlit yield point so a pending rerun interrupts the wait. That relies on Streamlit
+internals, so this check drives it for real: a small script run through AppTest submits
+a slow query on the local Snowflake stand-in, and a timer asks the script to rerun the
+way a widget change does. Fails unless the rerun happens well before the query would
+have finished and the query is cancelled on the stand-in.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import textwrap
+import time
+from unittest import mock
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from run_benchmarks import SECRETS
+from standin import SnowflakeStandIn
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP = """
+import threading
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+
+from async_query import get_async_executor
+
+if "rerun_at" not in st.session_state:
+    st.session_state["rerun_at"] = None
+    # What a widget change does to a running script: queue a rerun request for it
+    requests = get_script_run_ctx().script_requests
+    threading.Timer({delay}, requests.request_rerun, args=(RerunData(),)).start()
+    get_async_executor(**st.secrets["snowflake"]).run_many({{"slow": "SELECT COUNT(*) AS N FROM EMT.PUBLIC.PRODUCT_INSIGHT"}})
+    st.write("query finished")
+else:
+    st.write("rerun")
+"""
+
+
+def run_check(latency, delay, timeout):
+    standin = SnowflakeStandIn({"EMT.PUBLIC.PRODUCT_INSIGHT": pd.DataFrame({"PRODUCT_ID": [1, 2, 3]})}, latency=latency)
+    sys.path.insert(0, REPO_DIR)
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as app:
+        app.write(textwrap.dedent(APP.format(delay=delay)))
+
+    with mock.patch("snowflake_pool.snowflake_connect", standin.connect):
+        at = AppTest.from_file(app.name, default_timeout=timeout)
+        at.secrets["snowflake"] = SECRETS
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        # The cancel is sent from the executor's I/O threads after the wait is abandoned
+        deadline = time.monotonic() + 5
+        while not standin.cancelled and time.monotonic() < deadline:
+            time.sleep(0.05)
+    os.unlink(app.name)
+
+    problems = []
+    if at.exception:
+        return [f"app raised: {at.exception[0].message.splitlines()[0]}"]
+    shown = [element.value for element in at.markdown]
+    if shown != ["rerun"]:
+        problems.append(f"script was not rerun mid-query; it showed {shown}")
+    if elapsed > latency / 2:
+        problems.append(f"run took {elapsed:.2f}s of the query's {latency:.0f}s")
+    if not standin.cancelled:
+        problems.append("the in-flight query was not cancelled")
+    print(f"rerun after {elapsed:.2f}s, cancelled: {sorted(standin.cancelled)}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=10, help="simulated seconds the slow query runs")
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds before the rerun is requested")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    problems = run_check(args.latency, args.delay, args.timeout)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Rerun benchmarks for the Streamlit apps against a local Snowflake stand-in.
+
+    python benchmarks/run_benchmarks.py --scale 2 --json results.json
+
+Seeds an in-memory DuckDB with synthetic warehouse tables (see standin.py), points
+the connection pool at it, and drives each app through Streamlit's AppTest
+over a scripted interaction sequence. Every rerun reports wall time, the number of
+warehouse queries it issued and its peak Python memory (tracemalloc).
+
+Each scenario starts from cold process-wide caches; later steps show the warm path.
+After every rerun the page is checked for what the step should have rendered (and,
+where it is fixed, the number of queries), so a broken interaction fails the run.
+A scenario whose app needs a module that is not installed is reported as skipped.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from standin import SnowflakeStandIn, synthetic_tables
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TIMEOUT = 120
+
+SECRETS = {
+    "user": "bench", "password": "bench", "account": "standin",
+    "warehouse": "BENCH_WH", "database": "EMT", "schema": "PUBLIC",
+}
+PARAMETER_TXT = "[Snowflake_connector]\nUSER = bench\nPASSWORD = bench\nACCOUNT = standin\n"
+
+# Modules an app imports at the top beyond the core stack; without them the app is skipped
+APP_MODULES = {
+    "streamlit_secrets_video_anal_poc_2025.py": ["streamlit_wordcloud"],
+}
+
+
+def missing_modules(script):
+    return [module for module in APP_MODULES.get(script, []) if importlib.util.find_spec(module) is None]
+
+
+def _by_label(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def _select(label, index):
+    def step(at):
+        widget = _by_label(at.selectbox, label)
+        return widget.set_value(widget.options[min(index, len(widget.options) - 1)])
+    return step
+
+
+def _page(number):
+    return lambda at: _by_label(at.number_input, "Select Page:").set_value(number)
+
+
+def _click(prefix):
+    def step(at):
+        for button in at.button:
+            if button.label.startswith(prefix):
+                return button.click()
+        raise LookupError(f"No button starting with {prefix!r}")
+    return step
+
+
+# Element types whose text a step's check looks through
+PAGE_TEXT_ELEMENTS = ("title", "header", "subheader", "markdown", "caption", "json")
+
+
+def page_text(at):
+    return "\n".join(str(element.value) for kind in PAGE_TEXT_ELEMENTS for element in getattr(at, kind))
+
+
+def _shows(*texts, queries=None):
+    """
+    Check for a step: the page shows each of texts and, when given, the rerun issued
+    exactly that many warehouse queries. Returns a problem string, or None.
+    """
+    def check(at, issued):
+        shown = page_text(at)
+        missing = [text for text in texts if text not in shown]
+        if missing:
+            return f"page does not show {missing[0]!r}"
+        if queries is not None and issued != queries:
+            return f"expected {queries} queries, issued {issued}"
+        return None
+    return check
+
+
+def _hotel_dashboard_steps(search_queries, hotel_queries, aspect_queries, page_queries, review_text):
+    return [
+        ("load", None, _shows("Hotel Insights Dashboard", queries=0)),
+        ("search", lambda at: _by_label(at.text_input, "Search Hotels by Name:").input("grand"),
+         _shows("Product Insights", "Aspect Scores", review_text, queries=search_queries)),
+        ("select hotel", _select("Select a Hotel:", 1), _shows("Product Insights", review_text, queries=hotel_queries)),
+        ("change aspect", _select("Select an Aspect:", 2), _shows(review_text, queries=aspect_queries)),
+        ("page 2", _page(2), _shows(review_text, queries=page_queries)),
+    ]
+
+
+# (name, script, steps); each step is (name, action or None for the first run, check)
+SCENARIOS = [
+    ("hotels (secrets)", "snowflake_streamlit_final_secrets.py", _hotel_dashboard_steps(6, 4, 3, 1, "Negative Mentions") + [
+        ("reviews per page", _select("Reviews per page:", 0), _shows("Negative Mentions", queries=1)),
+    ]),
+    ("hotels (parameter.txt)", "snowflake_to_streamlit_final.py", _hotel_dashboard_steps(5, 3, 2, 1, "Reviews for ") + [
+        ("negative reviews", _click("Show Negative Reviews"), _shows("Reviews for ", queries=1)),
+    ]),
+    ("hotels (multilingual)", "snowflake_streamlit_trail_secrets_multilang.py", _hotel_dashboard_steps(7, 5, 4, 2, "Reviews in English") + [
+        ("reviews per page", _select("Reviews per page:", 2), _shows("<b>1. </b>", queries=2)),
+    ]),
+    ("hotel chatbot", "streamlit_chatbot_Hotels_POC.py", [
+        ("load", None, _shows("Hotel Chatbot", queries=0)),
+        ("ask", lambda at: at.chat_input[0].set_value("hotels with excellent amenities and clean rooms"),
+         _shows("Here are some hotels matching your query", queries=1)),
+        ("details", _click("View details for"), _shows("### Product Summary", "Top Emotions", queries=4)),
+        ("ask again", lambda at: at.chat_input[0].set_value("good location 4-star hotel"),
+         _shows("Here are some hotels matching your query", queries=0)),
+    ]),
+    ("reddit", "streamlit_reddit_Google_POC_2025.py", [
+        ("load", None, _shows("Reasons for Switching", "Overall Summary", queries=4)),
+        ("rerun", lambda at: at, _shows("Reasons for Switching", queries=0)),
+    ]),
+    ("reddit + ecom", "google_ecom_reddit_analysis_POC_2025.py", [
+        ("load", None, _shows("Reddit Analysis", "Overall Summary", queries=9)),
+        ("rerun", lambda at: at, _shows("Reddit Analysis", queries=0)),
+    ]),
+    ("video keywords", "streamlit_secrets_video_anal_poc_2025.py", [
+        ("load", None, _shows("YouTube Video Analysis Tool", "Keyword Analysis")),
+        ("select video", lambda at: at.sidebar.selectbox[0].set_value(at.sidebar.selectbox[0].options[1]),
+         _shows("Snippet Keywords")),
+        ("click keyword", lambda at: at.columns[0].button[0].click(), _shows("Playing snippet containing", queries=0)),
+    ]),
+]
+
+
+def measure(standin, action):
+    """Run one rerun; returns (wall seconds, queries, peak MiB)."""
+    queries = standin.queries
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    return elapsed, standin.queries - queries, tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+
+
+def run_scenario(standin, name, script, steps, timeout=DEFAULT_TIMEOUT):
+    # Cold start: drop pools, query caches and indexes left by the previous scenario
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    results = []
+    at = AppTest.from_file(os.path.join(REPO_DIR, script), default_timeout=timeout)
+    at.secrets["snowflake"] = SECRETS
+    for step_name, step, check in steps:
+        try:
+            if step is None:
+                elapsed, queries, peak = measure(standin, at.run)
+            else:
+                elapsed, queries, peak = measure(standin, lambda: step(at).run())
+        except Exception as e:
+            results.append({"scenario": name, "step": step_name, "error": f"{type(e).__name__}: {e}"})
+            break
+        # A step that raised, or did not render what it should, fails the scenario rather than looking fast
+        errors = [exception.message.splitlines()[0] for exception in at.exception]
+        if not errors:
+            problem = check(at, queries)
+            errors = [problem] if problem else []
+        results.append({
+            "scenario": name, "step": step_name, "seconds": round(elapsed, 4),
+            "queries": queries, "peak_mib": round(peak, 2),
+            **({"error": errors[0]} if errors else {}),
+        })
+        if errors:
+            break
+    return results
+
+
+def print_table(results):
+    print(f"{'scenario':<24} {'step':<18} {'seconds':>9} {'queries':>8} {'peak MiB':>9}")
+    for row in results:
+        if "skipped" in row:
+            print(f"{row['scenario']:<24} {'-':<18} {'-':>9} {'-':>8} {'-':>9}  skipped: {row['skipped']}")
+        elif "seconds" in row:
+            print(f"{row['scenario']:<24} {row['step']:<18} {row['seconds']:>9.3f} {row['queries']:>8} {row['peak_mib']:>9.1f}"
+                  + (f"  ! {row['error']}" if "error" in row else ""))
+        else:
+            print(f"{row['scenario']:<24} {row['step']:<18} {'-':>9} {'-':>8} {'-':>9}  ! {row['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="synthetic data scale (1 = 200 hotels, 5 videos)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated warehouse seconds per query")
+    parser.add_argument("--only", action="append", help="run only scenarios whose name contains this (repeatable)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="per-rerun AppTest timeout in seconds")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    # The apps import sibling modules and read parameter.txt from the working directory
+    sys.path.insert(0, REPO_DIR)
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    with open(os.path.join(workdir, "parameter.txt"), "w") as f:
+        f.write(PARAMETER_TXT)
+    os.chdir(workdir)
+    os.environ.pop("INSIGHTS_SNAPSHOT_DIR", None)
+    os.environ.pop("VIDEO_KEYWORD_STORE", None)
+
+    seeded_at = time.perf_counter()
+    standin = SnowflakeStandIn(synthetic_tables(args.scale, args.seed), latency=args.latency)
+    print(f"Seeded stand-in at scale {args.scale} in {time.perf_counter() - seeded_at:.2f}s")
+
+    results = []
+    tracemalloc.start()
+    with mock.patch("snowflake_pool.snowflake_connect", standin.connect):
+        for name, script, steps in SCENARIOS:
+            if args.only and not any(part in name for part in args.only):
+                continue
+            missing = missing_modules(script)
+            if missing:
+                results.append({"scenario": name, "skipped": f"{', '.join(missing)} not installed"})
+                continue
+            results.extend(run_scenario(standin, name, script, steps, args.timeout))
+    tracemalloc.stop()
+
+    print_table(results)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"scale": args.scale, "seed": args.seed, "latency": args.latency, "results": results}, f, indent=2)
+
+    skipped = [row["scenario"] for row in results if "skipped" in row]
+    failed = sorted({row["scenario"] for row in results if "error" in row})
+    if skipped:
+        print(f"SKIPPED: {', '.join(skipped)}")
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
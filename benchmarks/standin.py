@@ -0,0 +1,299 @@
+"""
+Local Snowflake stand-in for the benchmarks: an in-process DuckDB seeded with
+synthetic data shaped like the warehouse tables, behind the subset of the
+snowflake-connector API the apps use (cursor, execute with %s parameters,
+fetch_arrow_batches, description, and execute_async with query-ID status,
+result lookups and SYSTEM$CANCEL_QUERY). An optional per-query latency imitates
+warehouse execution time.
+"""
+import itertools
+import threading
+import time
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Rows generated per unit of scale
+HOTELS_PER_SCALE = 200
+SNIPPETS_PER_HOTEL_ASPECT = 60
+VIDEOS_PER_SCALE = 5
+SNIPPETS_PER_VIDEO = 400
+
+ASPECTS = ["General", "Amenities", "Cleanliness", "Dining", "Location", "Room", "Staff", "Value for money"]
+CITIES = ["Delhi", "New Delhi", "Mumbai", "Goa", "Jaipur", "Chennai", "Bengaluru", "Kolkata"]
+NAME_WORDS = ["Grand", "Palace", "Royal", "Residency", "Inn", "Plaza", "Heritage", "Suites", "Park", "Regency"]
+LANGUAGE_SUFFIXES = ["HI", "TA", "TE", "KN", "ES", "FR", "IW"]
+EMOTIONS = ["joy", "trust", "surprise", "anticipation", "sadness", "anger"]
+REVIEW_WORDS = ("the room was clean and the staff were friendly but breakfast was slow "
+                "location is great value for money pool area noisy at night").split()
+TRANSCRIPT_WORDS = ("i switched to android because the battery life and the camera are better "
+                    "the iphone price is too expensive but the apple ecosystem and imessage "
+                    "are hard to leave display refresh rate performance updates privacy").split()
+SWITCH_REASONS = ["Affordability", "Apps", "Battery", "Camera", "Design or Experience", "Display", "Features", "Performance", "Other"]
+
+
+def _sentences(rng, words, count, length):
+    picks = rng.choice(words, size=(count, length))
+    return [" ".join(row).capitalize() + "." for row in picks]
+
+
+def _reviews(rng, product_ids, multilang):
+    rows = len(product_ids) * (len(ASPECTS) - 1) * SNIPPETS_PER_HOTEL_ASPECT
+    product = np.repeat(product_ids, (len(ASPECTS) - 1) * SNIPPETS_PER_HOTEL_ASPECT)
+    aspect = np.tile(np.repeat(ASPECTS[1:], SNIPPETS_PER_HOTEL_ASPECT), len(product_ids))
+    first = _sentences(rng, REVIEW_WORDS, rows, 8)
+    sentiment = _sentences(rng, REVIEW_WORDS, rows, 4)
+    last = _sentences(rng, REVIEW_WORDS, rows, 10)
+    review = [f"{a} {s} {b}" for a, s, b in zip(first, sentiment, last)]
+    start = np.array([len(a) + 1 for a in first])
+    df = pd.DataFrame({
+        "PRODUCT_ID": product,
+        "ASPECT_NAME": aspect,
+        "SENTIMENT_TYPE": rng.choice(["positive", "negative"], rows),
+        "SENTIMENT_TEXT": sentiment,
+        "REVIEW_TEXT": review,
+        "START_INDEX": start,
+        "END_INDEX": start + np.array([len(s) for s in sentiment]),
+        "CONFIDENCE_SCORE": rng.uniform(0.5, 1.0, rows).round(4),
+    })
+    if multilang:
+        for suffix in LANGUAGE_SUFFIXES:
+            df[f"REVIEW_TEXT_{suffix}"] = df["REVIEW_TEXT"]
+            df[f"SENTIMENT_TEXT_{suffix}"] = df["SENTIMENT_TEXT"]
+    return df
+
+
+def synthetic_tables(scale=1, seed=0):
+    """
+    Synthetic warehouse contents.
+
+    Returns:
+        dict: Fully qualified table name -> DataFrame.
+    """
+    rng = np.random.default_rng(seed)
+    hotels = HOTELS_PER_SCALE * scale
+    product_ids = np.arange(1, hotels + 1)
+    names = [f"{' '.join(rng.choice(NAME_WORDS, 2, replace=False))} Hotel {i}" for i in product_ids]
+    scores = {
+        column: rng.uniform(40, 100, hotels).round(1)
+        for column in ["AMENITIES_SCORE", "LOCATION_SCORE", "DINING_SCORE", "GENERAL_SCORE", "CLEANLINESS_SCORE",
+                       "STAFF_SCORE", "VALUE_FOR_MONEY_SCORE", "ROOM_SCORE", "OVERALL_SCORE"]
+    }
+    emotions = rng.choice(EMOTIONS, size=(hotels, 3))
+
+    videos = VIDEOS_PER_SCALE * scale
+    video_ids = [f"vid{i:05d}" for i in range(videos)]
+    video_snippets = pd.DataFrame({
+        "VIDEO_ID": np.repeat(video_ids, SNIPPETS_PER_VIDEO),
+        "TRANSCRIPTION_TEXT": _sentences(rng, TRANSCRIPT_WORDS, videos * SNIPPETS_PER_VIDEO, 18),
+        "START_TIME": np.tile(np.arange(SNIPPETS_PER_VIDEO) * 5.0, videos),
+    })
+    video_snippets["END_TIME"] = video_snippets["START_TIME"] + 5.0
+
+    quarters = [f"{year}-Q{quarter}" for year in range(2021, 2025) for quarter in range(1, 5)]
+    directions = ["Android to iOS", "iOS to Android"]
+    return {
+        "EMT.PUBLIC.PRODUCT_LIST": pd.DataFrame({
+            "PRODUCT_ID": product_ids,
+            "HOTEL_NAME": names,
+            "CITY": rng.choice(CITIES, hotels),
+            "STAR_RATING": rng.integers(1, 6, hotels),
+            "TRIPADVISOR_LINK": [f"https://www.tripadvisor.example/Hotel_Review-{i}" for i in product_ids],
+        }),
+        "EMT.PUBLIC.PRODUCT_INSIGHT": pd.DataFrame({
+            "PRODUCT_ID": product_ids,
+            **scores,
+            "PRODUCT_SUMMARY": _sentences(rng, REVIEW_WORDS, hotels, 30),
+            "TOP_EMOTION_1": emotions[:, 0],
+            "TOP_EMOTION_2": emotions[:, 1],
+            "TOP_EMOTION_3": emotions[:, 2],
+        }),
+        "EMT.PUBLIC.PRODUCT_EMOTION": pd.DataFrame({
+            "PRODUCT_ID": product_ids, "EMOTION1": emotions[:, 0], "EMOTION2": emotions[:, 1], "EMOTION3": emotions[:, 2],
+        }),
+        "EMT.PUBLIC.ASPECT_LIST": pd.DataFrame({"ASPECT_NAME": ASPECTS}),
+        "EMT.PUBLIC.PRODUCT_ASPECT_TOP_PHRASE": pd.DataFrame({
+            "PRODUCT_ID": np.repeat(product_ids, len(ASPECTS) - 1),
+            "ASPECT": np.tile(ASPECTS[1:], hotels),
+            "POSITIVE_PHRASES": "friendly staff, clean rooms, great view",
+            "NEGATIVE_PHRASES": "slow check-in, noisy corridor",
+        }),
+        "EMT.PUBLIC.PRODUCT_REVIEW_SNIPPET": _reviews(rng, product_ids, multilang=False),
+        "EMT.PUBLIC.PRODUCT_MULTI_LANG_REVIEW_SNIPPET": _reviews(rng, product_ids, multilang=True),
+        "VIDEO.PUBLIC.VIDEO_METADATA": pd.DataFrame({
+            "VIDEO_ID": video_ids,
+            "TITLE": [f"Switching phones, part {i}" for i in range(videos)],
+            "DESCRIPTION": "Why I switched.",
+            "VIDEO_URL": [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids],
+        }),
+        "VIDEO.PUBLIC.VIDEO_SNIPPET": video_snippets,
+        "REDDIT.PUBLIC.QUARTERLY_TRENDS": pd.DataFrame({
+            "QUARTER": quarters,
+            "ANDROID_TO_IOS": rng.integers(10, 500, len(quarters)),
+            "IOS_TO_ANDROID": rng.integers(10, 500, len(quarters)),
+        }),
+        "REDDIT.PUBLIC.REASON_FOR_SWITCHING": pd.DataFrame({
+            "REASON": SWITCH_REASONS,
+            "ANDROID_TO_IOS": rng.integers(5, 200, len(SWITCH_REASONS)),
+            "IOS_TO_ANDROID": rng.integers(5, 200, len(SWITCH_REASONS)),
+        }),
+        "REDDIT.PUBLIC.SENTIMENT_ANALYSIS": pd.DataFrame({
+            "SWITCH_TYPE": directions, "POSITIVE": rng.integers(50, 300, 2), "NEGATIVE": rng.integers(50, 300, 2),
+        }),
+        "REDDIT.PUBLIC.SUMMARY": pd.DataFrame({
+            "SUMMARY_TITLE": ["Battery", "Camera", "Overall"],
+            "TEXT": _sentences(rng, TRANSCRIPT_WORDS, 3, 40),
+        }),
+        "ECOM.PUBLIC.SWITCH_SOURCE": pd.DataFrame({
+            "SWITCH_DIRECTION": directions, "AMAZON": rng.integers(50, 500, 2), "FLIPKART": rng.integers(50, 500, 2),
+        }),
+        "ECOM.PUBLIC.YEARLY_TRENDS": pd.DataFrame({
+            "YEAR": np.arange(2019, 2025),
+            "ANDROID_TO_IOS": rng.integers(100, 900, 6),
+            "IOS_TO_ANDROID": rng.integers(100, 900, 6),
+        }),
+        "ECOM.PUBLIC.BRAND_ORIGIN": pd.DataFrame({
+            "BRAND_ORIGIN": ["China", "Korea", "USA", "India"], "SWITCH_COUNT": rng.integers(10, 400, 4),
+        }),
+        "ECOM.PUBLIC.SWITCH_SENTIMENT_SUMMARY": pd.DataFrame({
+            "SWITCH_DIRECTION": directions, "POSITIVE": rng.integers(50, 300, 2), "NEGATIVE": rng.integers(50, 300, 2),
+        }),
+        "ECOM.PUBLIC.OVERALL_SUMMARY": pd.DataFrame({
+            "SUMMARY_TITLE": ["Price", "Overall"], "SUMMARY_TEXT": _sentences(rng, TRANSCRIPT_WORDS, 2, 40),
+        }),
+        "ECOM.PUBLIC.SWITCH_REASON": pd.DataFrame({
+            "SWITCH_DIRECTION": directions,
+            **{reason.upper(): rng.integers(20, 250, 2) for reason in SWITCH_REASONS},
+        }),
+    }
+
+
+def _plain(value):
+    # DuckDB does not bind NumPy scalars; the Snowflake connector does
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class StandInCursor:
+    def __init__(self, standin):
+        self._standin = standin
+        self._cursor = standin.db.cursor()
+        self._cursor.execute(f"SET search_path = '{standin.default_schema}'")
+        self.description = None
+        self.sfqid = None
+        self._result = None  # Arrow table of a query looked up by ID
+
+    def _run(self, query, params):
+        self._standin.record(query)
+        self._result = None
+        self._cursor.execute(query.replace("%s", "?"), [_plain(value) for value in params or ()])
+        self.description = self._cursor.description
+
+    def execute(self, query, params=None):
+        if query.startswith("SELECT SYSTEM$CANCEL_QUERY"):
+            self._standin.cancel(params[0])
+            return self
+        if self._standin.latency and query.strip().upper() != "SELECT 1":
+            time.sleep(self._standin.latency)
+        self._run(query, params)
+        return self
+
+    def execute_async(self, query, params=None):
+        # Runs at once, but reports as running until the simulated latency has passed
+        self._run(query, params)
+        table = self._cursor.to_arrow_reader(self._standin.batch_rows).read_all()
+        self.sfqid = self._standin.store_result(table, self.description)
+        return {"queryId": self.sfqid}
+
+    def get_results_from_sfqid(self, sfqid):
+        self._result, self.description = self._standin.result(sfqid)
+        self.sfqid = sfqid
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetch_arrow_batches(self):
+        if self._result is not None:
+            batches = self._result.to_batches(self._standin.batch_rows)
+        else:
+            batches = self._cursor.to_arrow_reader(self._standin.batch_rows)
+        for batch in batches:
+            yield pa.Table.from_batches([batch])
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    def __init__(self, standin):
+        self._standin = standin
+
+    def cursor(self):
+        return StandInCursor(self._standin)
+
+    def is_closed(self):
+        return False
+
+    def get_query_status_throw_if_error(self, sfqid):
+        return "RUNNING" if time.monotonic() < self._standin.ready_at(sfqid) else "SUCCESS"
+
+    def is_still_running(self, status):
+        return status == "RUNNING"
+
+    def close(self):
+        pass
+
+
+class SnowflakeStandIn:
+    """
+    One seeded in-memory database; connect() hands out connections to it, and every
+    executed statement is counted (pool health checks excluded).
+    """
+
+    def __init__(self, tables, default_schema="EMT.PUBLIC", batch_rows=8192, latency=0.0):
+        self.default_schema = default_schema
+        self.batch_rows = batch_rows
+        self.latency = latency
+        self.db = duckdb.connect()
+        self._lock = threading.Lock()
+        self._query_ids = itertools.count(1)
+        self._results = {}  # query ID -> (table, description, ready_at)
+        self.cancelled = set()
+        self.queries = 0
+        for name in tables:
+            database, schema, _ = name.split(".")
+            self.db.execute(f"ATTACH IF NOT EXISTS ':memory:' AS {database}")
+            self.db.execute(f"CREATE SCHEMA IF NOT EXISTS {database}.{schema}")
+        for name, df in tables.items():
+            self.db.register("seed_frame", df)
+            self.db.execute(f"CREATE TABLE {name} AS SELECT * FROM seed_frame")
+            self.db.unregister("seed_frame")
+
+    def record(self, query):
+        if query.strip().upper() != "SELECT 1":
+            with self._lock:
+                self.queries += 1
+
+    def store_result(self, table, description):
+        with self._lock:
+            sfqid = f"standin-{next(self._query_ids)}"
+            self._results[sfqid] = (table, description, time.monotonic() + self.latency)
+        return sfqid
+
+    def cancel(self, sfqid):
+        with self._lock:
+            self.cancelled.add(sfqid)
+
+    def ready_at(self, sfqid):
+        return self._results[sfqid][2]
+
+    def result(self, sfqid):
+        table, description, _ = self._results[sfqid]
+        return table, description
+
+    def connect(self, **connect_params):
+        return StandInConnection(self)
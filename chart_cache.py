@@ -0,0 +1,132 @@
+import hashlib
+import io
+import json
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from perf_trace import annotate, span
+
+# Rendered image bytes kept per process before the least recently used charts are dropped
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def pyplot():
+    """matplotlib.pyplot, imported on first use: a page whose charts are all cached never loads it."""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def hash_data(data):
+    """Content hash of a chart's input: equal DataFrames hash equal regardless of object identity."""
+    digest = hashlib.sha256()
+    if isinstance(data, pd.DataFrame):
+        digest.update(repr((list(data.columns), [str(dtype) for dtype in data.dtypes])).encode())
+        try:
+            digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        except TypeError:  # Unhashable cells such as lists
+            digest.update(pickle.dumps(data))
+    else:
+        digest.update(pickle.dumps(data))
+    return digest.hexdigest()
+
+
+def chart_key(builder, data, spec, fmt):
+    spec_json = json.dumps(spec, sort_keys=True, default=str)
+    return f"{builder.__module__}.{builder.__qualname__}:{fmt}:{spec_json}:{hash_data(data)}"
+
+
+class ChartCache:
+    """Thread-safe LRU of rendered chart bytes, bounded by total size."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._images:
+                self._bytes -= len(self._images.pop(key))
+            self._images[key] = image
+            self._bytes += len(image)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"charts": len(self._images), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+@st.cache_resource
+def get_chart_cache():
+    return ChartCache()
+
+
+def render_chart(builder, data, fmt="png", **spec):
+    """
+    Return the rendered bytes of builder(plt, data, **spec), drawing it only if this
+    exact data and spec have not been rendered before. The figure is always closed.
+
+    Parameters:
+        builder (callable): Draws the chart with plt (matplotlib.pyplot, see pyplot())
+            and returns its Figure.
+        data: The chart's input, usually a DataFrame.
+        fmt (str): "png" or "svg".
+        spec: Extra keyword arguments passed to builder; part of the cache key.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    cache = get_chart_cache()
+    key = chart_key(builder, data, spec, fmt)
+    image = cache.get(key)
+    if image is not None:
+        annotate(cache="hit")
+        return image
+    annotate(cache="miss")
+
+    plt = pyplot()
+    fig = builder(plt, data, **spec)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, bbox_inches="tight")
+        image = buffer.getvalue()
+    finally:
+        plt.close(fig)
+    cache.put(key, image)
+    return image
+
+
+def show_chart(builder, data, fmt="png", **spec):
+    """Drop-in replacement for st.pyplot(fig) that re-serves unchanged charts from the cache."""
+    with span("chart", builder.__name__):
+        image = render_chart(builder, data, fmt, **spec)
+        if fmt == "svg":
+            st.image(image.decode("utf-8"))
+        else:
+            st.image(image)
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+
+import streamlit as st
+
+# Transport settings of the shared client
+ES_CLIENT_OPTIONS = {
+    "connections_per_node": 16,     # Kept-alive HTTP connections per node, shared by all sessions
+    "request_timeout": 10,
+    "max_retries": 3,
+    "retry_on_timeout": True,
+    "retry_on_status": (429, 502, 503, 504),
+    "http_compress": True,
+}
+
+
+def es_connect_params():
+    """Endpoint and API key from the [elasticsearch] section of .streamlit/secrets.toml."""
+    return {
+        "endpoint": st.secrets["elasticsearch"]["endpoint"],
+        "api_key": st.secrets["elasticsearch"]["api_key"],
+    }
+
+
+def es_index_name():
+    return st.secrets["elasticsearch"]["index_name"]
+
+
+def msearch_payload(searches):
+    # msearch takes alternating header and body lines; a search in a point in time names no index
+    lines = []
+    for index, body in searches:
+        lines.append({"index": index} if index is not None else {})
+        lines.append(body)
+    return lines
+
+
+def msearch_responses(response):
+    """Body of each search in an msearch response, or an {"error": ...} dict for a failed one."""
+    return [
+        {"error": str(item["error"])} if "error" in item else item
+        for item in response["responses"]
+    ]
+
+
+def _msearch_filter_path(filter_path):
+    # filter_path of an msearch applies to the whole response, so each path moves under responses
+    if filter_path is None:
+        return None
+    paths = [filter_path] if isinstance(filter_path, str) else list(filter_path)
+    return [f"responses.{path}" for path in paths + ["hits.total", "error"]]
+
+
+class AsyncSearchRunner:
+    """
+    AsyncElasticsearch client running on its own event loop thread.
+
+    Streamlit runs scripts in plain threads, so the loop lives on a daemon thread and
+    callers submit coroutines to it; many sessions' searches then share one loop and
+    one aiohttp connection pool instead of each holding a blocked connection.
+    """
+
+    def __init__(self, endpoint, api_key, **options):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="es-async", daemon=True)
+        self._thread.start()
+        # The client must be created on the loop it will be used from
+        self.client = self.run(self._create_client(endpoint, api_key, options))
+
+    @staticmethod
+    async def _create_client(endpoint, api_key, options):
+        from elasticsearch import AsyncElasticsearch
+        return AsyncElasticsearch(endpoint, api_key=api_key, **{**ES_CLIENT_OPTIONS, **options})
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the runner's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def msearch(self, searches, filter_path=None):
+        response = await self.client.msearch(searches=msearch_payload(searches), filter_path=_msearch_filter_path(filter_path))
+        return msearch_responses(response.body)
+
+    def search_many(self, searches, filter_path=None, timeout=None):
+        """
+        Run several searches in one msearch round trip.
+
+        Parameters:
+            searches (list): (index, body) pairs; index is None for a search in a point in time.
+            filter_path: Applied to each search's response.
+
+        Returns:
+            list: One response body (or {"error": ...} dict) per search, in order.
+        """
+        return self.run(self.msearch(searches, filter_path), timeout)
+
+    async def search_with_count(self, index, body, filter_path=None, count=False, keep_alive=None):
+        searched_index = index
+        if keep_alive is not None:
+            # A search in a point in time names the PIT instead of the index
+            pit = await self.client.open_point_in_time(index=index, keep_alive=keep_alive)
+            searched_index, body = None, {**body, "pit": {"id": pit["id"], "keep_alive": keep_alive}}
+        if not count:
+            response = await self.client.search(index=searched_index, body=body, filter_path=filter_path)
+            return response.body, None
+        # The page and a hits-free search for the exact total share one msearch round trip
+        response, counted = await self.msearch([
+            (searched_index, body),
+            (index, {"query": body["query"], "size": 0, "track_total_hits": True}),
+        ], filter_path)
+        for item in (response, counted):
+            if "error" in item:
+                raise RuntimeError(item["error"])
+        return response, counted["hits"]["total"]["value"]
+
+    def search_page(self, index, body, filter_path=None, count=False, keep_alive=None, timeout=None):
+        """
+        Run one search, and when count is set, count all of its matches in the same msearch.
+
+        With keep_alive, the search runs in a new point in time on index and the response
+        carries its pit_id; later pages put that in the body's "pit" and pass index=None.
+
+        Returns:
+            tuple: (search response body, total matches or None)
+        """
+        return self.run(self.search_with_count(index, body, filter_path, count, keep_alive), timeout)
+
+    def close_point_in_time(self, pit_id):
+        # Not waited for: an unclosed point in time also expires after its keep_alive
+        asyncio.run_coroutine_threadsafe(self.client.close_point_in_time(id=pit_id), self._loop)
+
+    def close(self):
+        self.run(self.client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+@st.cache_resource
+def get_async_search_runner(endpoint, api_key):
+    # One client (and connection pool) per process, created on the first search rather than at app start
+    return AsyncSearchRunner(endpoint, api_key)
+
+
+def get_secrets_async_search_runner():
+    return get_async_search_runner(**es_connect_params())
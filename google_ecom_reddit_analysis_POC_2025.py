@@ -1,48 +1,16 @@
 import streamlit as st
 import pandas as pd
-import snowflake.connector
-import matplotlib.pyplot as plt
+from async_query import load_batch_async
+from perf_trace import show_trace, span, start_trace
+from chart_cache import show_chart
 import numpy as np
 
 # Title
 st.title("📊 Switching Between Android & iOS: Reddit and eCom Insights")
+trace = start_trace("google_ecom_reddit_analysis_POC_2025.py")  # Opt-in timings: INSIGHTS_TRACE=1 or ?trace=1
 
-# Snowflake connection function
-def create_snowflake_connection():
-    return snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
-
-# Load data function
-def load_table_data(query):
-    conn = create_snowflake_connection()
-    try:
-        df = pd.read_sql(query, conn)
-        return df
-    finally:
-        conn.close()
-
-# Tab selection
-tab = st.tabs(["Reddit", "eCom"])
-
-# Reddit Tab
-with tab[0]:
-    st.divider()
-    st.markdown("## 📊 Reddit Analysis")
-    st.divider()
-    ### 1️⃣ Quarterly Trends
-    st.markdown("### 📅 Quarterly Trends in Platform Switching")
-    st.divider()
-
-    # Load data
-    query_quarterly = "SELECT * FROM REDDIT.PUBLIC.QUARTERLY_TRENDS ORDER BY QUARTER"
-    df_quarterly = load_table_data(query_quarterly)
-
+# Quarterly switching trends, grouped bars per direction
+def quarterly_trends_chart(plt, df_quarterly):
     # Plot
     fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
     width = 0.45
@@ -56,17 +24,10 @@ with tab[0]:
     ax.set_xlabel("Quarter", fontsize=12)
     ax.set_ylabel("Users", fontsize=12)
     ax.legend()
-    st.pyplot(fig)
-    st.divider()
-
-    ### 2️⃣ Reasons for Switching
-    st.markdown("### 🔄 Reasons for Switching")
-    st.divider()
-
-    # Load data
-    query_reasons = "SELECT * FROM REDDIT.PUBLIC.REASON_FOR_SWITCHING ORDER BY ANDROID_TO_IOS + IOS_TO_ANDROID DESC"
-    df_reasons = load_table_data(query_reasons)
+    return fig
 
+# Top reasons for switching, horizontal grouped bars
+def reasons_chart(plt, df_reasons):
     # Dynamically adjust figure height based on number of rows
     fig_height = max(6, len(df_reasons) * 0.4)  # Scales height dynamically
     fig, ax = plt.subplots(figsize=(12, fig_height), dpi=100)  # Increased height
@@ -80,7 +41,7 @@ with tab[0]:
     ax.set_yticks(x)
     ax.set_yticklabels(df_reasons["REASON"], fontsize=12)  # Increased font size
     ax.set_xlabel("Users", fontsize=12)
-   # ax.set_title("Top Reasons for Switching", fontsize=14)
+    # ax.set_title("Top Reasons for Switching", fontsize=14)
     ax.legend(loc="upper right", fontsize=12)  # Adjusted legend position
 
     # Label values on bars with better spacing
@@ -92,19 +53,10 @@ with tab[0]:
                             xy=(width, bar.get_y() + bar.get_height() / 2),
                             xytext=(5, 0), textcoords="offset points", 
                             va='center', fontsize=10)
+    return fig
 
-    st.pyplot(fig)
-
-    st.divider()
-
-    ### 3️⃣ Sentiment Analysis
-    st.markdown("### 📊 Sentiment Analysis of Switching Users")
-    st.divider()
-
-    # Load data
-    query_sentiment = "SELECT * FROM REDDIT.PUBLIC.SENTIMENT_ANALYSIS"
-    df_sentiment = load_table_data(query_sentiment)
-
+# Positive/negative sentiment per switch type, stacked bars
+def reddit_sentiment_chart(plt, df_sentiment):
     # Adjust figure size & spacing
     fig, ax = plt.subplots(figsize=(8, 5), dpi=100)
 
@@ -128,8 +80,158 @@ with tab[0]:
                             xy=(bar.get_x() + bar.get_width() / 2, height + y_offset),
                             xytext=(0, 3), textcoords="offset points", 
                             ha='center', fontsize=10)
+    return fig
+
+# Amazon vs Flipkart switch counts per direction
+def switch_source_chart(plt, df_switch_source):
+    # Plot
+    fig, ax = plt.subplots(figsize=(8, 5), dpi=100)
+    x = np.arange(len(df_switch_source["SWITCH_DIRECTION"]))
+    width = 0.35
+
+    ax.bar(x - width/2, df_switch_source["AMAZON"], width, label="Amazon", color="blue", alpha=0.7)
+    ax.bar(x + width/2, df_switch_source["FLIPKART"], width, label="Flipkart", color="orange", alpha=0.7)
+
+    ax.set_xticks(x)
+    ax.set_xticklabels(df_switch_source["SWITCH_DIRECTION"])
+    ax.set_xlabel("Switch Direction", fontsize=12)
+    ax.set_ylabel("Count", fontsize=12)
+    ax.legend()
+    return fig
+
+# Yearly switching trends, grouped bars per direction
+def yearly_trends_chart(plt, df_yearly_trends):
+    width = 0.35
+
+    fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
+    x = np.arange(len(df_yearly_trends["YEAR"]))
+
+    ax.bar(x - width/2, df_yearly_trends["ANDROID_TO_IOS"], width, label="Android to iOS", color="blue", alpha=0.7)
+    ax.bar(x + width/2, df_yearly_trends["IOS_TO_ANDROID"], width, label="iOS to Android", color="red", alpha=0.7)
+
+    ax.set_xticks(x)
+    ax.set_xticklabels(df_yearly_trends["YEAR"])
+    ax.set_xlabel("Year", fontsize=12)
+    ax.set_ylabel("Users", fontsize=12)
+    ax.legend()
+    return fig
+
+# iOS to Android switch count by brand origin
+def brand_origin_chart(plt, df_brand_origin):
+    fig, ax = plt.subplots(figsize=(8, 5), dpi=100)
+    ax.bar(df_brand_origin["BRAND_ORIGIN"], df_brand_origin["SWITCH_COUNT"], color="green", alpha=0.7)
+
+    ax.set_xlabel("Brand Origin", fontsize=12)
+    ax.set_ylabel("Switch Count", fontsize=12)
+    return fig
+
+# Positive/negative sentiment per switch direction, stacked bars
+def ecom_sentiment_chart(plt, df_sentiment):
+    fig, ax = plt.subplots(figsize=(8, 5), dpi=100)
+    ax.bar(df_sentiment["SWITCH_DIRECTION"], df_sentiment["POSITIVE"], label="Positive", color="green", alpha=0.7)
+    ax.bar(df_sentiment["SWITCH_DIRECTION"], df_sentiment["NEGATIVE"], bottom=df_sentiment["POSITIVE"], label="Negative", color="red", alpha=0.7)
+
+    ax.set_xlabel("Switch Direction", fontsize=12)
+    ax.set_ylabel("Sentiment Count", fontsize=12)
+    ax.legend()
+    return fig
+
+# Switching reasons compared across directions (ignoring 'Other')
+def switch_reasons_chart(plt, df_switch_reason):
+    # Define columns to include in the comparison (ignoring 'Other')
+    columns_to_plot = [
+        "Affordability", "Apps", "Battery", "Camera",
+        "Design or Experience", "Display", "Features", "Performance"
+    ]
+
+    # Extract data for each switch direction
+    x = np.arange(len(columns_to_plot))  # Positions for the bars
+    width = 0.35  # Width of the bars
+
+    android_to_ios = df_switch_reason.loc[df_switch_reason["switch_direction"] == "Android to iOS", columns_to_plot].iloc[0]
+    ios_to_android = df_switch_reason.loc[df_switch_reason["switch_direction"] == "iOS to Android", columns_to_plot].iloc[0]
+
+    # Set up the plot
+    fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
+
+    # Create grouped bars
+    bars_android_to_ios = ax.bar(x - width/2, android_to_ios, width, label="Android to iOS", color="blue", alpha=0.7)
+    bars_ios_to_android = ax.bar(x + width/2, ios_to_android, width, label="iOS to Android", color="red", alpha=0.7)
+
+    # Customize the chart
+    ax.set_xticks(x)
+    #ax.set_xticklabels(range(1, len(columns_to_plot) + 1))  # Replace labels with numbers
+    ax.set_xticklabels(columns_to_plot, rotation=30, ha="right", fontsize=10)  # Use reasons as labels
+    ax.set_ylabel("Count", fontsize=12)
+    #ax.set_title("Comparison of Switching Reasons", fontsize=14)
+    ax.legend(title="Switch Direction", loc="upper right")  # Legend for directions
+
+    #ax.legend()
+
+    # Annotate bars with their values
+    for bars in [bars_android_to_ios, bars_ios_to_android]:
+        for bar in bars:
+            height = bar.get_height()
+            if height > 0:
+                ax.annotate(f"{int(height)}", 
+                            xy=(bar.get_x() + bar.get_width() / 2, height), 
+                            xytext=(0, 3), textcoords="offset points", 
+                            ha='center', fontsize=9)
+
+    return fig
+
+# Every query on the page, declared up front and in flight together as Snowflake async queries
+# (cached results and snapshot tables are still answered locally)
+page_queries = {
+    "quarterly": "SELECT * FROM REDDIT.PUBLIC.QUARTERLY_TRENDS ORDER BY QUARTER",
+    "reasons": "SELECT * FROM REDDIT.PUBLIC.REASON_FOR_SWITCHING ORDER BY ANDROID_TO_IOS + IOS_TO_ANDROID DESC",
+    "reddit_sentiment": "SELECT * FROM REDDIT.PUBLIC.SENTIMENT_ANALYSIS",
+    "reddit_summary": "SELECT * FROM REDDIT.PUBLIC.SUMMARY",
+    "switch_source": "SELECT * FROM ECOM.PUBLIC.SWITCH_SOURCE",
+    "yearly_trends": "SELECT * FROM ECOM.PUBLIC.YEARLY_TRENDS ORDER BY YEAR",
+    "brand_origin": "SELECT * FROM ECOM.PUBLIC.BRAND_ORIGIN",
+    "ecom_sentiment": "SELECT * FROM ECOM.PUBLIC.SWITCH_SENTIMENT_SUMMARY",
+    "ecom_summary": "SELECT * FROM ECOM.PUBLIC.OVERALL_SUMMARY",
+}
+page_data = load_batch_async(page_queries)
+
+# Tab selection
+tab = st.tabs(["Reddit", "eCom"])
+
+# Reddit Tab
+with tab[0]:
+    st.divider()
+    st.markdown("## 📊 Reddit Analysis")
+    st.divider()
+    ### 1️⃣ Quarterly Trends
+    st.markdown("### 📅 Quarterly Trends in Platform Switching")
+    st.divider()
+
+    # Load data
+    df_quarterly = page_data["quarterly"]
+
+    show_chart(quarterly_trends_chart, df_quarterly)
+    st.divider()
+
+    ### 2️⃣ Reasons for Switching
+    st.markdown("### 🔄 Reasons for Switching")
+    st.divider()
+
+    # Load data
+    df_reasons = page_data["reasons"]
+
+    show_chart(reasons_chart, df_reasons)
+
+    st.divider()
 
-    st.pyplot(fig)
+    ### 3️⃣ Sentiment Analysis
+    st.markdown("### 📊 Sentiment Analysis of Switching Users")
+    st.divider()
+
+    # Load data
+    df_sentiment = page_data["reddit_sentiment"]
+
+    show_chart(reddit_sentiment_chart, df_sentiment)
     st.divider()
 
     ### 4️⃣ Overall Summary
@@ -137,8 +239,7 @@ with tab[0]:
 
 
     # Load data
-    query_summary = "SELECT * FROM REDDIT.PUBLIC.SUMMARY"
-    df_summary = load_table_data(query_summary)
+    df_summary = page_data["reddit_summary"]
 
     # Display summary with word wrapping
     st.markdown("#### 📜 Overall Summary")
@@ -147,18 +248,19 @@ with tab[0]:
     df_summary_sorted = pd.concat([df_summary[df_summary["SUMMARY_TITLE"] != "Overall"], df_summary[df_summary["SUMMARY_TITLE"] == "Overall"]])
 
     # Convert DataFrame to Markdown-friendly format
-    summary_table = "<table style='width:100%; border-collapse: collapse;'>"
-    summary_table += "<tr><th style='border: 1px solid black; padding: 8px; text-align: left;'>Title</th>" \
-                    "<th style='border: 1px solid black; padding: 8px; text-align: left;'>Text</th></tr>"
+    with span("markdown", "summary table", items=len(df_summary_sorted)):
+        summary_table = "<table style='width:100%; border-collapse: collapse;'>"
+        summary_table += "<tr><th style='border: 1px solid black; padding: 8px; text-align: left;'>Title</th>" \
+                        "<th style='border: 1px solid black; padding: 8px; text-align: left;'>Text</th></tr>"
 
-    for _, row in df_summary_sorted.iterrows():
-        summary_table += f"<tr><td style='border: 1px solid black; padding: 8px; text-align: left;'>{row['SUMMARY_TITLE']}</td>" \
-                        f"<td style='border: 1px solid black; padding: 8px; text-align: left; word-wrap: break-word; white-space: normal;'>{row['TEXT']}</td></tr>"
+        for _, row in df_summary_sorted.iterrows():
+            summary_table += f"<tr><td style='border: 1px solid black; padding: 8px; text-align: left;'>{row['SUMMARY_TITLE']}</td>" \
+                            f"<td style='border: 1px solid black; padding: 8px; text-align: left; word-wrap: break-word; white-space: normal;'>{row['TEXT']}</td></tr>"
 
-    summary_table += "</table>"
+        summary_table += "</table>"
 
-    # Display table using Markdown with HTML
-    st.markdown(summary_table, unsafe_allow_html=True)
+        # Display table using Markdown with HTML
+        st.markdown(summary_table, unsafe_allow_html=True)
 
     st.divider()
 
@@ -177,76 +279,36 @@ with tab[1]:
     st.divider()
 
     # Load data
-    query_switch_source = "SELECT * FROM ECOM.PUBLIC.SWITCH_SOURCE"
-    df_switch_source = load_table_data(query_switch_source)
-
-    # Plot
-    fig, ax = plt.subplots(figsize=(8, 5), dpi=100)
-    x = np.arange(len(df_switch_source["SWITCH_DIRECTION"]))
-    width = 0.35
-
-    ax.bar(x - width/2, df_switch_source["AMAZON"], width, label="Amazon", color="blue", alpha=0.7)
-    ax.bar(x + width/2, df_switch_source["FLIPKART"], width, label="Flipkart", color="orange", alpha=0.7)
+    df_switch_source = page_data["switch_source"]
 
-    ax.set_xticks(x)
-    ax.set_xticklabels(df_switch_source["SWITCH_DIRECTION"])
-    ax.set_xlabel("Switch Direction", fontsize=12)
-    ax.set_ylabel("Count", fontsize=12)
-    ax.legend()
-    st.pyplot(fig)
+    show_chart(switch_source_chart, df_switch_source)
     st.divider()
 
     ### 2️⃣ Yearly Trends
     st.markdown("### 📅 Yearly Trends in Platform Switching")
     st.divider()
 
-    query_yearly_trends = "SELECT * FROM ECOM.PUBLIC.YEARLY_TRENDS ORDER BY YEAR"
-    df_yearly_trends = load_table_data(query_yearly_trends)
-
-    fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
-    x = np.arange(len(df_yearly_trends["YEAR"]))
-
-    ax.bar(x - width/2, df_yearly_trends["ANDROID_TO_IOS"], width, label="Android to iOS", color="blue", alpha=0.7)
-    ax.bar(x + width/2, df_yearly_trends["IOS_TO_ANDROID"], width, label="iOS to Android", color="red", alpha=0.7)
+    df_yearly_trends = page_data["yearly_trends"]
 
-    ax.set_xticks(x)
-    ax.set_xticklabels(df_yearly_trends["YEAR"])
-    ax.set_xlabel("Year", fontsize=12)
-    ax.set_ylabel("Users", fontsize=12)
-    ax.legend()
-    st.pyplot(fig)
+    show_chart(yearly_trends_chart, df_yearly_trends)
     st.divider()
 
     ### 3️⃣ Brand Origin
     st.markdown("### 🌍 Brand Origin Switch Count (iOS to Android Only)")
     st.divider()
 
-    query_brand_origin = "SELECT * FROM ECOM.PUBLIC.BRAND_ORIGIN"
-    df_brand_origin = load_table_data(query_brand_origin)
+    df_brand_origin = page_data["brand_origin"]
 
-    fig, ax = plt.subplots(figsize=(8, 5), dpi=100)
-    ax.bar(df_brand_origin["BRAND_ORIGIN"], df_brand_origin["SWITCH_COUNT"], color="green", alpha=0.7)
-
-    ax.set_xlabel("Brand Origin", fontsize=12)
-    ax.set_ylabel("Switch Count", fontsize=12)
-    st.pyplot(fig)
+    show_chart(brand_origin_chart, df_brand_origin)
     st.divider()
 
     ### 4️⃣ Sentiment Analysis
     st.markdown("### 😊 Sentiment Analysis of Switching Users")
     st.divider()
 
-    query_sentiment = "SELECT * FROM ECOM.PUBLIC.SWITCH_SENTIMENT_SUMMARY"
-    df_sentiment = load_table_data(query_sentiment)
+    df_sentiment = page_data["ecom_sentiment"]
 
-    fig, ax = plt.subplots(figsize=(8, 5), dpi=100)
-    ax.bar(df_sentiment["SWITCH_DIRECTION"], df_sentiment["POSITIVE"], label="Positive", color="green", alpha=0.7)
-    ax.bar(df_sentiment["SWITCH_DIRECTION"], df_sentiment["NEGATIVE"], bottom=df_sentiment["POSITIVE"], label="Negative", color="red", alpha=0.7)
-
-    ax.set_xlabel("Switch Direction", fontsize=12)
-    ax.set_ylabel("Sentiment Count", fontsize=12)
-    ax.legend()
-    st.pyplot(fig)
+    show_chart(ecom_sentiment_chart, df_sentiment)
     st.divider()
 
   # Ecom Tab
@@ -272,48 +334,7 @@ with tab[1]:
         "Other": [56, 82]  # Ignored later
     })
 
-    # Define columns to include in the comparison (ignoring 'Other')
-    columns_to_plot = [
-        "Affordability", "Apps", "Battery", "Camera",
-        "Design or Experience", "Display", "Features", "Performance"
-    ]
-
-    # Extract data for each switch direction
-    x = np.arange(len(columns_to_plot))  # Positions for the bars
-    width = 0.35  # Width of the bars
-
-    android_to_ios = df_switch_reason.loc[df_switch_reason["switch_direction"] == "Android to iOS", columns_to_plot].iloc[0]
-    ios_to_android = df_switch_reason.loc[df_switch_reason["switch_direction"] == "iOS to Android", columns_to_plot].iloc[0]
-
-    # Set up the plot
-    fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
-
-    # Create grouped bars
-    bars_android_to_ios = ax.bar(x - width/2, android_to_ios, width, label="Android to iOS", color="blue", alpha=0.7)
-    bars_ios_to_android = ax.bar(x + width/2, ios_to_android, width, label="iOS to Android", color="red", alpha=0.7)
-
-    # Customize the chart
-    ax.set_xticks(x)
-    #ax.set_xticklabels(range(1, len(columns_to_plot) + 1))  # Replace labels with numbers
-    ax.set_xticklabels(columns_to_plot, rotation=30, ha="right", fontsize=10)  # Use reasons as labels
-    ax.set_ylabel("Count", fontsize=12)
-    #ax.set_title("Comparison of Switching Reasons", fontsize=14)
-    ax.legend(title="Switch Direction", loc="upper right")  # Legend for directions
-
-    #ax.legend()
-
-    # Annotate bars with their values
-    for bars in [bars_android_to_ios, bars_ios_to_android]:
-        for bar in bars:
-            height = bar.get_height()
-            if height > 0:
-                ax.annotate(f"{int(height)}", 
-                            xy=(bar.get_x() + bar.get_width() / 2, height), 
-                            xytext=(0, 3), textcoords="offset points", 
-                            ha='center', fontsize=9)
-
-    # Display the plot in Streamlit
-    st.pyplot(fig)
+    show_chart(switch_reasons_chart, df_switch_reason)
     st.divider()
 
 
@@ -321,17 +342,19 @@ with tab[1]:
     st.markdown("### 📜 Overall Summary")
     st.divider()
 
-    query_summary = "SELECT * FROM ECOM.PUBLIC.OVERALL_SUMMARY"
-    df_summary = load_table_data(query_summary)
+    df_summary = page_data["ecom_summary"]
 
     # Convert DataFrame to Markdown-friendly format
-    summary_table = "<table style='width:100%; border-collapse: collapse;'>"
-    summary_table += "<tr><th>Title</th><th>Text</th></tr>"
+    with span("markdown", "summary table", items=len(df_summary)):
+        summary_table = "<table style='width:100%; border-collapse: collapse;'>"
+        summary_table += "<tr><th>Title</th><th>Text</th></tr>"
 
-    for _, row in df_summary.iterrows():
-        summary_table += f"<tr><td>{row['SUMMARY_TITLE']}</td><td>{row['SUMMARY_TEXT']}</td></tr>"
+        for _, row in df_summary.iterrows():
+            summary_table += f"<tr><td>{row['SUMMARY_TITLE']}</td><td>{row['SUMMARY_TEXT']}</td></tr>"
 
-    summary_table += "</table>"
-    st.markdown(summary_table, unsafe_allow_html=True)
+        summary_table += "</table>"
+        st.markdown(summary_table, unsafe_allow_html=True)
 
     st.success("✅ eCom Analysis Completed!")
+
+show_trace(trace)
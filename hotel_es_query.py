@@ -0,0 +1,61 @@
+# Results shown per search and per "Show more"
+PAGE_SIZE = 5
+
+# The only _source fields the results page renders
+HOTEL_SOURCE_FIELDS = [
+    "hotel_name", "city", "price_inr", "price_usd", "summary", "tripadvisor_link",
+    "cleanliness_score", "amenities_score", "location_score", "dining_score",
+    "staff_score", "value_for_money_score", "overall_score",
+]
+
+# Filter context scores every hit the same, so order explicitly. Many hotels share an
+# overall score; _shard_doc breaks those ties and, unlike _doc, is unique across shards.
+# It is only defined inside a point in time, which also keeps later pages on the same snapshot
+HOTEL_SORT = [{"overall_score": {"order": "desc", "missing": "_last"}}, {"_shard_doc": "asc"}]
+
+# How long a search's point in time outlives its last page request
+PIT_KEEP_ALIVE = "10m"
+
+# Trim the response to what the page reads: each hit's source and sort values, and the point in time for the next page
+HIT_FILTER_PATH = ["hits.hits._source", "hits.hits.sort", "pit_id"]
+
+
+def hotel_filters(intent):
+    """Non-scoring filter clauses for a HotelIntent; constraints the query didn't name are left out."""
+    filters = []
+    if intent.min_price is not None or intent.max_price is not None:
+        price_field = "price_usd" if intent.currency == "usd" else "price_inr"
+        price_range = {}
+        if intent.min_price is not None:
+            price_range["gte"] = intent.min_price
+        if intent.max_price is not None:
+            price_range["lte"] = intent.max_price
+        filters.append({"range": {price_field: price_range}})
+    if intent.star_rating:
+        filters.append({"term": {"star_rating": intent.star_rating}})
+    for aspect, min_score in intent.aspects:
+        if min_score is not None:
+            filters.append({"range": {f"{aspect}_score": {"gte": min_score}}})
+    return filters
+
+
+def build_hotel_search(intent, size=PAGE_SIZE, search_after=None, pit_id=None):
+    """
+    Search body for one page of hotels matching intent.
+
+    Conditions go in bool.filter, where Elasticsearch caches them per segment and skips
+    scoring. For the next page, pass the last hit's "sort" values as search_after and
+    the previous response's pit_id; the first page opens the point in time.
+    """
+    body = {
+        "query": {"bool": {"filter": hotel_filters(intent)}},
+        "_source": HOTEL_SOURCE_FIELDS,
+        "sort": HOTEL_SORT,
+        "size": size,
+        "track_total_hits": False,
+    }
+    if search_after is not None:
+        body["search_after"] = list(search_after)
+    if pit_id is not None:
+        body["pit"] = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+    return body
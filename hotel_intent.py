@@ -0,0 +1,115 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Synonyms for aspects and quality words
+feature_synonyms = {
+    "amenities": ["amenities", "amenity", "facilities", "facility", "features", "comforts", "offerings", "provisions", "services"],
+    "cleanliness": ["cleanliness", "clean", "hygiene", "sanitation", "tidiness", "neatness"],
+    "location": ["location", "proximity", "area", "neighborhood", "vicinity", "surroundings", "accessibility"],
+    "dining": ["dining", "restaurant", "meal options", "food services", "culinary offerings", "meals"],
+    "staff": ["staff", "personnel", "team", "employees", "workforce", "attendants", "service"],
+    "value_for_money": ["value for money", "affordability", "worth", "reasonable pricing", "budget friendliness"]
+}
+
+quality_seeds = {
+    "excellent": ["excellent", "great", "outstanding", "superb", "amazing", "delightful"],
+    "good": ["good", "nice", "decent", "satisfactory", "fine", "pleasant"],
+    "average": ["average", "okay", "acceptable", "mediocre", "fair"]
+}
+
+# Minimum aspect score each quality level asks for
+QUALITY_MIN_SCORES = {"excellent": 80, "good": 79, "average": 60}
+
+# Parsed queries remembered per parser
+PARSE_CACHE_SIZE = 4096
+
+# What a hotel query asks for. aspects holds (aspect, min score or None) pairs, sorted by aspect
+HotelIntent = namedtuple("HotelIntent", ["aspects", "star_rating", "city", "min_price", "max_price", "currency"])
+
+_THOUSANDS = re.compile(r"(\d+)k\b")
+_PRICE_RANGE = re.compile(r"between\s+(\d+)\s+(and|-)\s+(\d+)")
+_PRICE_MAX = re.compile(r"(under|below)\s+(\d+)")
+_CURRENCY = re.compile(r"(\d+)\s*(usd|inr)")
+_STAR_RATING = re.compile(r"(\d+)[\s*-]star")
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+def _alternation(phrases, left_boundary=True, right_boundary=True):
+    # Longest first, so "battery life"-style phrases win over their prefixes
+    body = "|".join(re.escape(phrase) for phrase in sorted(set(phrases), key=len, reverse=True))
+    left = r"\b" if left_boundary else ""
+    right = r"\b" if right_boundary else ""
+    return re.compile(f"{left}(?:{body}){right}")
+
+
+def extract_price_star_rating_currency(query):
+    normalized_query = _THOUSANDS.sub(r"\g<1>000", query.lower())
+    range_match = _PRICE_RANGE.search(normalized_query)
+    if range_match:
+        min_price = int(range_match.group(1))
+        max_price = int(range_match.group(3))
+    else:
+        min_price = None
+        single_price_match = _PRICE_MAX.search(normalized_query)
+        max_price = int(single_price_match.group(2)) if single_price_match else None
+
+    currency_match = _CURRENCY.search(normalized_query)
+    currency = currency_match.group(2).lower() if currency_match else "inr"
+
+    star_rating_match = _STAR_RATING.search(normalized_query)
+    star_rating = int(star_rating_match.group(1)) if star_rating_match else None
+
+    return min_price, max_price, currency, star_rating
+
+
+class IntentParser:
+    """
+    Query-understanding stage compiled once from the synonym tables.
+
+    Aspect synonyms, quality words and (optionally) city names each become one
+    alternation regex, so a query is scanned once per table however large the
+    tables grow. Results are memoized per normalized query.
+    """
+
+    def __init__(self, cities=(), synonyms=feature_synonyms, qualities=quality_seeds):
+        self._aspect_of = {synonym.lower(): aspect for aspect, words in synonyms.items() for synonym in words}
+        self._quality_score = {
+            word.lower(): QUALITY_MIN_SCORES[quality] for quality, words in qualities.items() for word in words
+        }
+        # Synonyms match as word prefixes ("facilit" ies, "service" s), like the substring test they replace
+        self._aspect_pattern = _alternation(self._aspect_of, right_boundary=False)
+        self._quality_pattern = _alternation(self._quality_score)
+        self._city_of = {normalize_query(city): city for city in cities if city and city.strip()}
+        self._city_pattern = _alternation(self._city_of) if self._city_of else None
+        self._parse_normalized = lru_cache(maxsize=PARSE_CACHE_SIZE)(self._parse)
+
+    def parse(self, query):
+        """Turn a free-text hotel query into a HotelIntent."""
+        return self._parse_normalized(normalize_query(query))
+
+    def _parse(self, query):
+        quality = self._quality_pattern.search(query)
+        min_score = self._quality_score[quality.group(0)] if quality else None
+        matched_aspects = {self._aspect_of[match.group(0)] for match in self._aspect_pattern.finditer(query)}
+        aspects = tuple(sorted((aspect, min_score) for aspect in matched_aspects))
+
+        city = None
+        if self._city_pattern is not None:
+            # The longest city named wins ("new delhi" over "delhi")
+            names = [match.group(0) for match in self._city_pattern.finditer(query)]
+            city = self._city_of[max(names, key=len)] if names else None
+
+        min_price, max_price, currency, star_rating = extract_price_star_rating_currency(query)
+        return HotelIntent(aspects, star_rating, city, min_price, max_price, currency)
+
+
+# Shared parser for callers without a city vocabulary
+DEFAULT_PARSER = IntentParser()
+
+
+def parse_intent(query):
+    return DEFAULT_PARSER.parse(query)
@@ -0,0 +1,122 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from hotel_intent import IntentParser
+
+# Hotel scores are batch outputs: reload the matrix this often
+REFRESH_SECONDS = 3600
+
+SCORE_COLUMNS = (
+    "AMENITIES_SCORE", "CLEANLINESS_SCORE", "LOCATION_SCORE", "DINING_SCORE",
+    "STAFF_SCORE", "VALUE_FOR_MONEY_SCORE", "ROOM_SCORE", "OVERALL_SCORE",
+)
+# Optional numeric columns, used for price filters when the hotel table carries them
+PRICE_COLUMNS = {"inr": "PRICE_INR", "usd": "PRICE_USD"}
+
+
+def score_column(aspect):
+    return f"{aspect.upper()}_SCORE"
+
+
+class HotelScoreMatrix:
+    """
+    Column-oriented NumPy copy of every hotel's scores, star rating, city and price.
+
+    A HotelIntent is answered with vectorized boolean masks over the columns and a
+    partial sort for the top k, without touching the warehouse.
+    """
+
+    def __init__(self, hotels):
+        self.hotels = hotels.reset_index(drop=True)
+        self.built_at = time.time()
+        self.columns = {
+            name: pd.to_numeric(self.hotels[name], errors="coerce").to_numpy(dtype=np.float64)
+            for name in SCORE_COLUMNS + ("STAR_RATING",) + tuple(PRICE_COLUMNS.values())
+            if name in self.hotels.columns
+        }
+        # Cities as integer codes, so a city filter is one integer comparison per hotel
+        city_keys = self.hotels["CITY"].fillna("").astype(str).str.strip().str.lower()
+        codes, uniques = pd.factorize(city_keys)
+        self._city_codes = codes.astype(np.int32)
+        self._city_index = {city: code for code, city in enumerate(uniques)}
+        # Row dicts materialized once, so answering a query builds no DataFrame
+        self._records = self.hotels.to_dict("records")
+        self.cities = sorted(city for city in self.hotels["CITY"].dropna().astype(str).str.strip().unique() if city)
+        # Knows this snapshot's cities, so it is rebuilt whenever the matrix is
+        self.intent_parser = IntentParser(self.cities)
+
+    def __len__(self):
+        return len(self.hotels)
+
+    def _at_least(self, column, minimum):
+        # NaN compares False, so hotels without the value never pass a filter on it
+        return self.columns[column] >= minimum
+
+    def mask(self, intent):
+        """Boolean array: True for hotels that satisfy every constraint of intent."""
+        mask = np.ones(len(self.hotels), dtype=bool)
+        for aspect, min_score in intent.aspects:
+            if min_score is not None and score_column(aspect) in self.columns:
+                mask &= self._at_least(score_column(aspect), min_score)
+        if intent.star_rating is not None and "STAR_RATING" in self.columns:
+            mask &= self.columns["STAR_RATING"] == intent.star_rating
+        if intent.city is not None:
+            mask &= self._city_codes == self._city_index.get(intent.city.strip().lower(), -1)
+        price_column = PRICE_COLUMNS.get(intent.currency)
+        if price_column in self.columns:
+            if intent.min_price is not None:
+                mask &= self._at_least(price_column, intent.min_price)
+            if intent.max_price is not None:
+                mask &= self.columns[price_column] <= intent.max_price
+        return mask
+
+    def rank_scores(self, intent, rows):
+        # Mean of the aspects the user asked about; the overall score when none were named
+        columns = [score_column(aspect) for aspect, _ in intent.aspects if score_column(aspect) in self.columns]
+        if not columns:
+            columns = ["OVERALL_SCORE"]
+        values = np.vstack([self.columns[column][rows] for column in columns])
+        present = ~np.isnan(values)
+        totals = np.where(present, values, 0.0).sum(axis=0)
+        counts = present.sum(axis=0)
+        return np.divide(totals, counts, out=np.full(totals.shape, np.nan), where=counts > 0)
+
+    def top_k(self, intent, k=10):
+        """
+        The k best hotels matching intent.
+
+        Returns:
+            list: Hotel row dicts, best first, each with a MATCH_SCORE key.
+        """
+        candidates = np.flatnonzero(self.mask(intent))
+        if candidates.size == 0:
+            return []
+        scores = np.nan_to_num(self.rank_scores(intent, candidates), nan=-np.inf)
+        if candidates.size > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(candidates.size)
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            dict(self._records[row], MATCH_SCORE=float(score))
+            for row, score in zip(candidates[best].tolist(), scores[best].tolist())
+        ]
+
+
+@st.cache_resource(ttl=REFRESH_SECONDS)
+def get_score_matrix(_loader):
+    """
+    Load every hotel's scores once per process; rebuilt every REFRESH_SECONDS.
+
+    _loader is called as _loader(sql) and returns a DataFrame.
+    """
+    hotels = _loader(f"""
+        SELECT L.PRODUCT_ID, L.HOTEL_NAME, L.STAR_RATING, L.CITY, L.TRIPADVISOR_LINK,
+               {", ".join(f"I.{column}" for column in SCORE_COLUMNS)}
+        FROM EMT.PUBLIC.PRODUCT_LIST L
+        JOIN EMT.PUBLIC.PRODUCT_INSIGHT I ON L.PRODUCT_ID = I.PRODUCT_ID
+    """)
+    return HotelScoreMatrix(hotels)
@@ -0,0 +1,110 @@
+import time
+import unicodedata
+from collections import defaultdict
+
+import streamlit as st
+
+# PRODUCT_LIST is small reference data: reload it into memory this often
+REFRESH_SECONDS = 3600
+# Share of the search term's trigrams a name must contain to count as a fuzzy match
+MIN_FUZZY_SIMILARITY = 0.5
+
+
+def normalize(text):
+    """Case-fold, strip accents and collapse whitespace so 'Hôtel  Le Méridien' matches 'hotel le meridien'."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.casefold().split())
+
+
+def padded_trigrams(text):
+    # Padding marks word boundaries, so prefixes score higher in fuzzy matching
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    In-memory trigram index over hotel names supporting substring and fuzzy lookup.
+
+    Substring hits come first, ranked name-prefix > word-prefix > anywhere, then by
+    shorter name. Fuzzy hits (typos, missing letters) follow, ranked by trigram similarity.
+    """
+
+    def __init__(self, hotels, name_column="HOTEL_NAME"):
+        self.hotels = hotels.reset_index(drop=True)
+        self.built_at = time.time()
+        self._names = [normalize(name) for name in self.hotels[name_column]]
+        self._grams = [padded_trigrams(name) for name in self._names]
+
+        postings = defaultdict(set)
+        for row, grams in enumerate(self._grams):
+            # The padded set also contains every inner trigram, so it serves substring lookups too
+            for gram in grams:
+                postings[gram].add(row)
+        self._postings = dict(postings)
+
+    def __len__(self):
+        return len(self._names)
+
+    def _substring_rows(self, term):
+        grams = {term[i:i + 3] for i in range(len(term) - 2)}
+        if grams:
+            lists = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set.intersection(*lists) if lists[0] else set()
+        else:
+            candidates = range(len(self._names))  # One or two characters: every name is a candidate
+        return [row for row in candidates if term in self._names[row]]
+
+    def _substring_rank(self, row, term):
+        name = self._names[row]
+        if name.startswith(term):
+            position = 0
+        elif f" {term}" in f" {name}":
+            position = 1
+        else:
+            position = 2
+        return position, len(name), name
+
+    def _fuzzy_rows(self, term, exclude):
+        grams = padded_trigrams(term)
+        shared = defaultdict(int)
+        for gram in grams:
+            for row in self._postings.get(gram, ()):
+                shared[row] += 1
+        scored = [
+            (count / len(grams), row) for row, count in shared.items()
+            if row not in exclude and count / len(grams) >= MIN_FUZZY_SIMILARITY
+        ]
+        scored.sort(key=lambda item: (-item[0], len(self._names[item[1]])))
+        return [row for _, row in scored]
+
+    def search(self, term, limit=None, fuzzy=True):
+        """
+        Find hotels whose name contains term, followed by close fuzzy matches.
+
+        Returns:
+            DataFrame: Matching rows of the indexed table in rank order.
+        """
+        term = normalize(term)
+        if not term:
+            return self.hotels.iloc[0:0]
+
+        rows = sorted(self._substring_rows(term), key=lambda row: self._substring_rank(row, term))
+        if fuzzy and len(term) >= 3:
+            rows += self._fuzzy_rows(term, set(rows))
+        if limit is not None:
+            rows = rows[:limit]
+        return self.hotels.iloc[rows].reset_index(drop=True)
+
+
+@st.cache_resource(ttl=REFRESH_SECONDS)
+def get_hotel_index(_loader, table="PRODUCT_LIST"):
+    """
+    Load the hotel list once per process and index it; rebuilt every REFRESH_SECONDS.
+
+    _loader should bypass the query result cache (e.g. an app's fetch_table_data),
+    since the index is itself the cache.
+    """
+    hotels = _loader(f"SELECT PRODUCT_ID, HOTEL_NAME, CITY, STAR_RATING FROM {table}")
+    return TrigramIndex(hotels)
@@ -0,0 +1,121 @@
+from collections import Counter, defaultdict, deque, namedtuple
+
+import streamlit as st
+
+from text_folding import casefold_with_offsets
+
+# Result of one pass over a text: per-term counts and start offsets, and per-category totals
+KeywordMatches = namedtuple("KeywordMatches", ["counts", "offsets", "categories"])
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a keyword taxonomy.
+
+    Built once from {category: [terms]}; each text is then scanned in a single
+    linear pass however many terms there are. Matching is case-insensitive, and
+    with whole_words=True a term only counts where it is not part of a longer word
+    (so "us" does not match inside "because").
+    """
+
+    def __init__(self, categories, whole_words=True):
+        self.whole_words = whole_words
+        self.terms = []
+        self.term_categories = defaultdict(list)
+        for category, terms in categories.items():
+            for term in terms:
+                term = " ".join(term.lower().split())
+                if not term:
+                    continue
+                if term not in self.term_categories:
+                    self.terms.append(term)
+                if category not in self.term_categories[term]:
+                    self.term_categories[term].append(category)
+        self.term_categories = dict(self.term_categories)
+        self._build()
+
+    def _build(self):
+        # Trie: one transition dict per node; outputs hold indexes into self.terms
+        self._goto = [{}]
+        self._outputs = [[]]
+        for index, term in enumerate(self.terms):
+            node = 0
+            for ch in term:
+                next_node = self._goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][ch] = next_node
+                    self._goto.append({})
+                    self._outputs.append([])
+                node = next_node
+            self._outputs[node].append(index)
+
+        # Failure links in breadth-first order; each node inherits the outputs of its failure node
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+                queue.append(child)
+
+    def iter_matches(self, text):
+        """Yield (start, end, term) for every occurrence, with offsets into text."""
+        if not isinstance(text, str) or not text:
+            return
+        folded, offsets = casefold_with_offsets(text)
+        goto, fail, outputs, terms = self._goto, self._fail, self._outputs, self.terms
+        node = 0
+        for position, ch in enumerate(folded):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not outputs[node]:
+                continue
+            end = position + 1
+            for index in outputs[node]:
+                term = terms[index]
+                start = end - len(term)
+                if self.whole_words and (
+                        (start > 0 and _is_word_char(folded[start - 1]))
+                        or (end < len(folded) and _is_word_char(folded[end]))):
+                    continue
+                if offsets is None:
+                    yield start, end, term
+                else:
+                    yield offsets[start], offsets[end], term
+
+    def analyze(self, text):
+        """
+        Count every term of the taxonomy in text.
+
+        Returns:
+            KeywordMatches: counts (Counter term -> occurrences), offsets (term -> list of
+            start offsets) and categories (Counter category -> occurrences of its terms).
+        """
+        counts = Counter()
+        offsets = defaultdict(list)
+        for start, _, term in self.iter_matches(text):
+            counts[term] += 1
+            offsets[term].append(start)
+
+        categories = Counter()
+        for term, count in counts.items():
+            for category in self.term_categories[term]:
+                categories[category] += count
+        return KeywordMatches(counts, dict(offsets), categories)
+
+
+@st.cache_resource
+def get_keyword_matcher(categories, whole_words=True):
+    """Compile a taxonomy once per process; the dict is hashed, so an edited taxonomy recompiles."""
+    return KeywordMatcher(categories, whole_words)
@@ -0,0 +1,209 @@
+"""
+Opt-in per-rerun timing traces.
+
+Tracing is off unless the INSIGHTS_TRACE environment variable is set or the page is
+opened with ?trace=1. When on, every query run through traced_query() records its
+connect/execute/fetch/clean/convert phases, rows, bytes fetched and query-cache
+hit or miss, and every span() around a chart or render loop records its time.
+show_trace() puts the rerun's numbers in a sidebar expander with a JSON-lines
+download, and appends the same lines to INSIGHTS_TRACE_FILE when that is set.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+TRACE_ENV = "INSIGHTS_TRACE"
+TRACE_QUERY_PARAM = "trace"
+TRACE_FILE_ENV = "INSIGHTS_TRACE_FILE"
+
+TRACE_STATE_KEY = "_perf_trace"
+RERUN_COUNT_STATE_KEY = "_perf_trace_reruns"
+
+# Query phases, in the order they happen
+QUERY_PHASES = ["connect", "execute", "fetch", "clean", "convert"]
+
+_active = threading.local()  # Per thread: stack of open span records, innermost last
+_file_lock = threading.Lock()
+
+
+def tracing_enabled():
+    if os.environ.get(TRACE_ENV, "").lower() in ("1", "true", "yes", "on"):
+        return True
+    return st.query_params.get(TRACE_QUERY_PARAM) in ("1", "true", "yes", "on")
+
+
+class RerunTrace:
+    """Span records of one script rerun. Worker threads of the same session add to it too."""
+
+    def __init__(self, script, session_id, rerun):
+        self.script = script
+        self.session_id = session_id
+        self.rerun = rerun
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.seconds = None
+        self._lock = threading.Lock()
+        self._records = []
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def finish(self):
+        if self.seconds is None:
+            self.seconds = round(time.perf_counter() - self._started, 6)
+
+    def to_jsonl(self):
+        """One JSON object per span plus a closing "rerun" summary line."""
+        header = {"script": self.script, "session": self.session_id, "rerun": self.rerun, "started_at": self.started_at}
+        lines = [json.dumps({**header, **record}, default=str) for record in self.records()]
+        lines.append(json.dumps({**header, "kind": "rerun", "seconds": self.seconds}))
+        return "\n".join(lines) + "\n"
+
+
+def start_trace(script):
+    """Begin this rerun's trace; returns None (and traces nothing) unless tracing is enabled."""
+    if not tracing_enabled():
+        st.session_state.pop(TRACE_STATE_KEY, None)
+        return None
+    rerun = st.session_state.get(RERUN_COUNT_STATE_KEY, 0) + 1
+    st.session_state[RERUN_COUNT_STATE_KEY] = rerun
+    ctx = get_script_run_ctx()
+    trace = RerunTrace(script, ctx.session_id if ctx else None, rerun)
+    st.session_state[TRACE_STATE_KEY] = trace
+    return trace
+
+
+def current_trace():
+    # Only script threads, and pool workers that were handed the script's context, can see a trace
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get(TRACE_STATE_KEY)
+
+
+def _stack():
+    stack = getattr(_active, "stack", None)
+    if stack is None:
+        stack = _active.stack = []
+    return stack
+
+
+@contextmanager
+def span(kind, name, **fields):
+    """Time the block as one record of this rerun's trace; a no-op when tracing is off."""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    record = {"kind": kind, "name": name, **fields, "phases": {}}
+    stack = _stack()
+    stack.append(record)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record["seconds"] = round(time.perf_counter() - started, 6)
+        stack.pop()
+        trace.add(record)
+
+
+def traced_query(query, params=None):
+    return span("query", " ".join(query.split()), params=list(params) if params else None)
+
+
+def add_record(kind, name, seconds, phases=None, **fields):
+    """Add a span timed elsewhere, e.g. on an event loop thread, to this rerun's trace."""
+    trace = current_trace()
+    if trace is not None:
+        trace.add({"kind": kind, "name": name, **fields, "phases": dict(phases or {}), "seconds": round(seconds, 6)})
+
+
+@contextmanager
+def phase(name):
+    """Add the block's time to the named phase of the innermost open span on this thread."""
+    stack = getattr(_active, "stack", None)
+    if not stack:
+        yield
+        return
+    record = stack[-1]
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record["phases"][name] = round(record["phases"].get(name, 0) + time.perf_counter() - started, 6)
+
+
+def annotate(**fields):
+    """Attach fields (rows, bytes, cache, ...) to the innermost open span on this thread."""
+    stack = getattr(_active, "stack", None)
+    if stack:
+        stack[-1].update(fields)
+
+
+def _query_table(queries):
+    import pandas as pd
+    rows = []
+    for record in queries:
+        row = {
+            "query": record["name"][:120],
+            "cache": record.get("cache"),
+            "rows": record.get("rows"),
+            "bytes": record.get("bytes"),
+            "seconds": record["seconds"],
+        }
+        row.update({name: record["phases"].get(name) for name in QUERY_PHASES})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _section_table(sections):
+    import pandas as pd
+    return pd.DataFrame([
+        {"kind": record["kind"], "name": record["name"], "seconds": record["seconds"],
+         "cache": record.get("cache"), "items": record.get("items")}
+        for record in sections
+    ])
+
+
+def export_trace(trace, path):
+    with _file_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(trace.to_jsonl())
+
+
+def show_trace(trace):
+    """Close the rerun's trace: debug sidebar plus JSON-lines export. Call at the end of the script."""
+    if trace is None:
+        return
+    trace.finish()
+    records = trace.records()
+    queries = [record for record in records if record["kind"] == "query"]
+    sections = [record for record in records if record["kind"] != "query"]
+
+    path = os.environ.get(TRACE_FILE_ENV)
+    if path:
+        export_trace(trace, path)
+
+    with st.sidebar.expander(f"⏱️ Rerun {trace.rerun} timings", expanded=True):
+        hits = sum(1 for record in queries if record.get("cache") == "hit")
+        st.markdown(
+            f"**{trace.seconds:.3f}s** total · {len(queries)} queries ({hits} cache hits) · "
+            f"{sum(record.get('bytes') or 0 for record in queries) / 1024:.1f} KiB fetched"
+        )
+        if queries:
+            st.dataframe(_query_table(queries), hide_index=True)
+        if sections:
+            st.dataframe(_section_table(sections), hide_index=True)
+        st.download_button(
+            "Download JSON lines", trace.to_jsonl(), file_name=f"trace-rerun-{trace.rerun}.jsonl",
+            mime="application/x-ndjson", on_click="ignore",
+        )
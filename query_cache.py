@@ -0,0 +1,170 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from perf_trace import annotate
+
+# Seconds a cached result stays fresh, by table. A query touching several tables uses the shortest TTL.
+DEFAULT_TTL_SECONDS = 600
+TABLE_TTL_SECONDS = {
+    # Hotel reference data
+    "PRODUCT_LIST": 3600,
+    "ASPECT_LIST": 86400,
+    "PRODUCT_INSIGHT": 3600,
+    "PRODUCT_EMOTION": 3600,
+    "PRODUCT_ASPECT_TOP_PHRASE": 3600,
+    "PRODUCT_REVIEW_SNIPPET": 1800,
+    "PRODUCT_MULTI_LANG_REVIEW_SNIPPET": 1800,
+    # Batch outputs behind the switching dashboards
+    "QUARTERLY_TRENDS": 21600,
+    "REASON_FOR_SWITCHING": 21600,
+    "SENTIMENT_ANALYSIS": 21600,
+    "SUMMARY": 21600,
+    "SWITCH_SOURCE": 21600,
+    "YEARLY_TRENDS": 21600,
+    "BRAND_ORIGIN": 21600,
+    "SWITCH_SENTIMENT_SUMMARY": 21600,
+    "OVERALL_SUMMARY": 21600,
+    # Video analysis
+    "VIDEO_METADATA": 3600,
+    "VIDEO_SNIPPET": 3600,
+}
+
+# Total DataFrame memory the cache may hold before evicting least recently used results
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z0-9_.$\"]+)", re.IGNORECASE)
+
+
+def normalize_sql(query):
+    """Collapse whitespace and drop a trailing semicolon so formatting differences share a cache entry."""
+    return " ".join(query.split()).rstrip(";").rstrip()
+
+
+def referenced_tables(query):
+    """Unqualified, upper-cased names of the tables a query reads from."""
+    return frozenset(name.replace('"', "").split(".")[-1].upper() for name in _TABLE_PATTERN.findall(query))
+
+
+def _freeze_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(params)
+    return (params,)
+
+
+def make_key(query, params=None):
+    return normalize_sql(query), _freeze_params(params)
+
+
+class QueryCache:
+    """
+    Thread-safe result cache for DataFrames keyed by normalized SQL plus bound parameters.
+
+    Entries expire after the TTL of the tables they read, and the least recently
+    used entries are evicted once the total DataFrame memory exceeds max_bytes.
+    Callers always receive a copy, so mutating a result never corrupts the cache.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, table_ttls=None, default_ttl=DEFAULT_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.table_ttls = dict(TABLE_TTL_SECONDS if table_ttls is None else table_ttls)
+        self.default_ttl = default_ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (df, expires_at, nbytes, tables)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, tables):
+        ttls = [self.table_ttls[table] for table in tables if table in self.table_ttls]
+        return min(ttls) if ttls else self.default_ttl
+
+    def _drop_locked(self, key):
+        _, _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def get(self, query, params=None):
+        key = make_key(query, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop_locked(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy()
+
+    def put(self, query, df, params=None):
+        key = make_key(query, params)
+        tables = referenced_tables(query)
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return  # Larger than the whole budget; caching it would just flush everything else
+
+        with self._lock:
+            if key in self._entries:
+                self._drop_locked(key)
+            self._entries[key] = (df.copy(), time.monotonic() + self.ttl_for(tables), nbytes, tables)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._drop_locked(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_load(self, query, params, loader):
+        """Return the cached result for query/params, calling loader(query, params) on a miss."""
+        df = self.get(query, params)
+        if df is None:
+            df = loader(query, params)
+            self.put(query, df, params)
+            annotate(cache="miss", rows=len(df))
+        else:
+            annotate(cache="hit", rows=len(df))
+        return df
+
+    def invalidate(self, table=None, query=None, params=None):
+        """Drop one query's result, every result reading from table, or everything when called without arguments."""
+        with self._lock:
+            if query is not None:
+                key = make_key(query, params)
+                if key in self._entries:
+                    self._drop_locked(key)
+                return
+            if table is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            table = table.split(".")[-1].upper()
+            for key in [key for key, entry in self._entries.items() if table in entry[3]]:
+                self._drop_locked(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def get_query_cache():
+    # Shared by every session and every dashboard running in this process
+    return QueryCache()
@@ -0,0 +1,156 @@
+import re
+import threading
+from collections import OrderedDict
+from html import escape
+
+import pandas as pd
+import streamlit as st
+
+from review_renderer import highlight_span
+from text_folding import casefold_with_offsets
+
+# Languages whose whole sentence around the sentiment phrase is highlighted; others get the phrase only
+SENTENCE_SPLITTERS = {
+    "english": re.compile(r"(?<=[.!?])\s+"),
+    "spanish": re.compile(r"(?<=[.!?])\s+"),
+    "french": re.compile(r"(?<=[.!?])\s+"),
+}
+
+# Highlighted snippets kept per process
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def _clean(text):
+    # Drop lone surrogates left by bad decoding; valid text takes the fast path
+    try:
+        text.encode("utf-8")
+        return text
+    except UnicodeEncodeError:
+        return text.encode("utf-8", "ignore").decode("utf-8", "ignore")
+
+
+def _find_all(folded, needle, offsets):
+    spans = []
+    start = folded.find(needle)
+    while start != -1:
+        end = start + len(needle)
+        spans.append((start, end) if offsets is None else (offsets[start], offsets[end]))
+        start = folded.find(needle, end)
+    return spans
+
+
+def _sentence_span(text, splitter, match_start, match_end):
+    # Sentence bounds of the text around a match, or None if the match crosses a sentence break
+    sentence_start = 0
+    for boundary in splitter.finditer(text):
+        if boundary.start() >= match_end:
+            break
+        if boundary.end() > match_start:
+            return None
+        sentence_start = boundary.end()
+    following = splitter.search(text, match_end)
+    return sentence_start, following.start() if following else len(text)
+
+
+def highlight_review(text, sentiment, sentiment_type, lang):
+    """
+    Escape a review and highlight its sentiment.
+
+    For languages in SENTENCE_SPLITTERS the first sentence containing the sentiment
+    phrase is highlighted; otherwise every occurrence of the phrase is. Matching is
+    case-insensitive.
+
+    Returns:
+        str: HTML-safe review text.
+    """
+    if not isinstance(text, str):
+        # Missing text comes back from pandas as NaN or None; show nothing rather than "nan"
+        return "" if pd.isna(text) else escape(str(text))
+    text = _clean(text)
+    if not isinstance(sentiment, str) or not sentiment:
+        return escape(text)
+    sentiment = _clean(sentiment)
+
+    folded, offsets = casefold_with_offsets(text)
+    spans = _find_all(folded, sentiment.lower(), offsets)
+    if not spans:
+        return escape(text)
+
+    splitter = SENTENCE_SPLITTERS.get(lang.lower())
+    if splitter is not None:
+        for start, end in spans:
+            sentence = _sentence_span(text, splitter, start, end)
+            if sentence is not None:
+                spans = [sentence]
+                break
+
+    parts = []
+    position = 0
+    for start, end in spans:
+        parts.append(escape(text[position:start]))
+        parts.append(highlight_span(escape(text[start:end]), sentiment_type))
+        position = end
+    parts.append(escape(text[position:]))
+    return "".join(parts)
+
+
+class ReviewHighlighter:
+    """Thread-safe memo of highlighted reviews keyed by (snippet id, language)."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()
+
+    def highlight(self, snippet_id, lang, text, sentiment, sentiment_type):
+        key = (snippet_id, lang)
+        with self._lock:
+            entry = self._memo.get(key)
+            # The inputs are kept with the result so a reloaded snippet is never served stale
+            if entry is not None and entry[0] == (text, sentiment, sentiment_type):
+                self._memo.move_to_end(key)
+                return entry[1]
+
+        html = highlight_review(text, sentiment, sentiment_type, lang)
+        with self._lock:
+            self._memo[key] = ((text, sentiment, sentiment_type), html)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return html
+
+    def highlight_batch(self, reviews, lang, text_col, sentiment_col, type_col="SENTIMENT_TYPE",
+                        id_col="ROW_NUM", id_prefix=(), fallback=None):
+        """
+        Highlight every row of a page of reviews.
+
+        Parameters:
+            reviews (DataFrame): The page, with id, text, sentiment and type columns.
+            lang (str): Language of text_col, e.g. "Hindi".
+            id_prefix (tuple): Prepended to each row's id so snippets of different
+                products/aspects get distinct keys.
+            fallback (tuple): Optional (lang, text_col, sentiment_col) of the original
+                review, highlighted instead for rows whose text_col is missing.
+
+        Returns:
+            list: One HTML string per row, in order.
+        """
+        highlighted = []
+        for i, (snippet_id, text, sentiment, sentiment_type) in enumerate(zip(
+                reviews[id_col], reviews[text_col], reviews[sentiment_col], reviews[type_col])):
+            row_lang = lang
+            if fallback is not None and not isinstance(text, str) and pd.isna(text):
+                # No translation for this snippet: show the original text
+                row_lang, original_col, original_sentiment_col = fallback
+                text, sentiment = reviews[original_col].iloc[i], reviews[original_sentiment_col].iloc[i]
+            highlighted.append(self.highlight(id_prefix + (snippet_id,), row_lang, text, sentiment, sentiment_type))
+        return highlighted
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+
+
+@st.cache_resource
+def get_review_highlighter():
+    return ReviewHighlighter()
@@ -0,0 +1,141 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+# Reviews are always shown best-first; ROW_NUM breaks ties unless the caller names a unique column.
+# ROW_NUMBER() numbers rows that tie on both keys arbitrarily, so without one their order may vary
+REVIEW_ORDER = "CONFIDENCE_SCORE DESC, START_INDEX ASC"
+KEYSET_COLUMNS = ("CONFIDENCE_SCORE", "START_INDEX")
+
+
+def _where(product_id, aspect_name, min_confidence, sentiment_type):
+    clauses = ["PRODUCT_ID = %s", "ASPECT_NAME = %s"]
+    params = [product_id, aspect_name]
+    if min_confidence is not None:
+        clauses.append("CONFIDENCE_SCORE > %s")
+        params.append(min_confidence)
+    if sentiment_type is not None:
+        clauses.append("SENTIMENT_TYPE = %s")
+        params.append(sentiment_type)
+    return " AND ".join(clauses), params
+
+
+def count_reviews(loader, table, product_id, aspect_name, min_confidence=None, sentiment_type=None):
+    """
+    Count matching snippets without fetching them.
+
+    Returns:
+        dict: total, positive and negative counts.
+    """
+    where, params = _where(product_id, aspect_name, min_confidence, sentiment_type)
+    counts = loader(f"""
+        SELECT COUNT(*) AS TOTAL,
+               COUNT_IF(SENTIMENT_TYPE = 'positive') AS POSITIVE,
+               COUNT_IF(SENTIMENT_TYPE = 'negative') AS NEGATIVE
+        FROM {table}
+        WHERE {where}
+    """, tuple(params)).iloc[0]
+    return {"total": int(counts["TOTAL"]), "positive": int(counts["POSITIVE"]), "negative": int(counts["NEGATIVE"])}
+
+
+def max_page(total, per_page):
+    return max(1, math.ceil(total / per_page))
+
+
+def _page_cursors(key):
+    # Last-row keys of pages this session has already seen, so the next page can seek past them
+    return st.session_state.setdefault("review_page_cursors", {}).setdefault(key, {})
+
+
+def _bind(value):
+    # Numpy scalars become the equal Python value; a Decimal is bound as is, never rounded through float
+    return value.item() if hasattr(value, "item") else value
+
+
+def _page_query(table, columns, product_id, aspect_name, page, per_page, min_confidence, sentiment_type, tiebreaker):
+    """SQL, params and the session's cursor map for one page, shared by the page and its extra columns."""
+    where, params = _where(product_id, aspect_name, min_confidence, sentiment_type)
+    order = f"{REVIEW_ORDER}, {tiebreaker} ASC" if tiebreaker else REVIEW_ORDER
+    last_key = tiebreaker or "ROW_NUM"
+    cursors = _page_cursors((table, product_id, aspect_name, min_confidence, sentiment_type, per_page, tiebreaker))
+
+    previous = cursors.get(page - 1)
+    if page == 1:
+        seek, seek_params = "TRUE", []
+    elif previous is not None:
+        score, start_index, last_value = previous
+        seek = ("(CONFIDENCE_SCORE < %s OR (CONFIDENCE_SCORE = %s AND "
+                f"(START_INDEX > %s OR (START_INDEX = %s AND {last_key} > %s))))")
+        seek_params = [score, score, start_index, start_index, last_value]
+    else:
+        seek, seek_params = "ROW_NUM > %s", [(page - 1) * per_page]
+
+    query = f"""
+        SELECT *
+        FROM (
+            SELECT ROW_NUMBER() OVER (ORDER BY {order}) AS ROW_NUM, {", ".join(columns)}
+            FROM {table}
+            WHERE {where}
+        )
+        WHERE {seek}
+        ORDER BY {order}, ROW_NUM ASC
+        LIMIT %s
+    """
+    return query, tuple(params + seek_params + [per_page]), cursors
+
+
+def fetch_review_page(loader, table, columns, product_id, aspect_name, page, per_page,
+                      min_confidence=None, sentiment_type=None, tiebreaker=None):
+    """
+    Fetch one page of review snippets, pushing the page boundary down into SQL.
+
+    Pages are located with a keyset predicate on (CONFIDENCE_SCORE, START_INDEX, ROW_NUM)
+    taken from the last row of the previous page. When the user jumps to a page whose
+    predecessor has not been seen yet, the page is located by its ROW_NUM ordinal instead.
+
+    Parameters:
+        loader (callable): The app's load_table_data(query, params).
+        table (str): Snippet table, e.g. PRODUCT_REVIEW_SNIPPET.
+        columns (list): Columns to return; the keyset columns are always included.
+        page (int): 1-based page number.
+        per_page (int): Reviews per page.
+        tiebreaker (str): Optional unique column of the table, used in place of ROW_NUM
+            as the last sort and keyset key so the order is total.
+
+    Returns:
+        DataFrame: At most per_page rows including a ROW_NUM ordinal column.
+    """
+    keys = KEYSET_COLUMNS + ((tiebreaker,) if tiebreaker else ())
+    select_columns = list(columns) + [col for col in keys if col not in columns]
+    query, params, cursors = _page_query(table, select_columns, product_id, aspect_name, page, per_page,
+                                         min_confidence, sentiment_type, tiebreaker)
+    reviews = loader(query, params)
+
+    if not reviews.empty:
+        last = reviews.iloc[-1]
+        cursors[page] = (_bind(last["CONFIDENCE_SCORE"]), _bind(last["START_INDEX"]),
+                         _bind(last[tiebreaker or "ROW_NUM"]))
+    return reviews
+
+
+def fetch_review_columns(loader, table, columns, product_id, aspect_name, page, per_page,
+                         min_confidence=None, sentiment_type=None, tiebreaker=None):
+    """
+    Fetch extra columns for a page already returned by fetch_review_page.
+
+    Lets a caller page through a narrow skeleton and pull wide columns (e.g. one
+    translation) only for what is actually shown. The query repeats the page's filters,
+    order and keyset bounds, so row i of the result belongs to row i of the page;
+    call it with the same arguments the page was fetched with, right after it.
+
+    Returns:
+        DataFrame: The requested columns, one row per row of the page, in page order.
+    """
+    keys = KEYSET_COLUMNS + ((tiebreaker,) if tiebreaker else ())
+    query, params, _ = _page_query(table, list(columns) + [col for col in keys if col not in columns],
+                                   product_id, aspect_name, page, per_page, min_confidence, sentiment_type, tiebreaker)
+    extra = loader(query, params)
+    if extra.empty:
+        return pd.DataFrame(columns=list(columns))
+    return extra[list(columns)].reset_index(drop=True)
@@ -0,0 +1,41 @@
+from html import escape
+
+import streamlit as st
+
+from perf_trace import span
+
+# (background, text) colors of the highlighted sentiment, by sentiment type
+SENTIMENT_COLORS = {
+    "positive": ("#90EE90", "black"),   # Light Green
+    "negative": ("#8B0000", "white"),   # Dark Red
+}
+
+
+def highlight_span(inner_html, sentiment_type):
+    background, color = SENTIMENT_COLORS.get(sentiment_type, SENTIMENT_COLORS["negative"])
+    return f"<span style='background-color:{background}; color:{color}; font-weight:bold;'>{inner_html}</span>"
+
+
+def highlight_range(text, start, end, sentiment_text, sentiment_type):
+    """Escape a review and highlight sentiment_text in place of text[start:end]."""
+    start, end = int(start), int(end)
+    return escape(text[:start]) + highlight_span(escape(sentiment_text), sentiment_type) + escape(text[end:])
+
+
+def build_review_list_html(items, divider=True):
+    """
+    Join already-escaped review fragments into one HTML block.
+
+    Newlines become <br> so a blank line inside a review cannot end the HTML block
+    and drop the rest of the page into Markdown parsing.
+    """
+    separator = "<hr style='margin:0;'>" if divider else ""
+    blocks = [f"<div style='padding:10px;'>{item}</div>" for item in items]
+    return separator.join(blocks).replace("\r\n", "\n").replace("\n", "<br>")
+
+
+def render_review_list(items, divider=True):
+    """Emit a whole page of reviews as a single Streamlit element instead of one per review."""
+    if items:
+        with span("markdown", "review list", items=len(items)):
+            st.markdown(build_review_list_html(items, divider), unsafe_allow_html=True)
@@ -0,0 +1,192 @@
+"""
+Offline snapshots of the read-mostly Snowflake tables.
+
+    python snapshot.py --dir snapshots
+
+materializes SNAPSHOT_TABLES to uncompressed Arrow IPC files plus a manifest.json.
+Setting the INSIGHTS_SNAPSHOT_DIR environment variable to that directory makes the
+apps answer queries on those tables from memory-mapped Arrow instead of the warehouse:
+the tables' buffers point into the mapped files, so they are paged in by the OS on
+first use and shared between processes rather than decoded into each one's heap.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+
+import pyarrow as pa
+import streamlit as st
+
+from perf_trace import annotate, phase
+
+SNAPSHOT_DIR_ENV = "INSIGHTS_SNAPSHOT_DIR"
+DEFAULT_SNAPSHOT_DIR = "snapshots"
+MANIFEST_NAME = "manifest.json"
+
+# Batch outputs and reference tables that change rarely enough to serve from a local copy
+SNAPSHOT_TABLES = [
+    "REDDIT.PUBLIC.QUARTERLY_TRENDS",
+    "REDDIT.PUBLIC.REASON_FOR_SWITCHING",
+    "REDDIT.PUBLIC.SENTIMENT_ANALYSIS",
+    "REDDIT.PUBLIC.SUMMARY",
+    "ECOM.PUBLIC.SWITCH_SOURCE",
+    "ECOM.PUBLIC.YEARLY_TRENDS",
+    "ECOM.PUBLIC.BRAND_ORIGIN",
+    "ECOM.PUBLIC.SWITCH_SENTIMENT_SUMMARY",
+    "ECOM.PUBLIC.OVERALL_SUMMARY",
+    "EMT.PUBLIC.PRODUCT_LIST",
+    "EMT.PUBLIC.PRODUCT_INSIGHT",
+    "EMT.PUBLIC.ASPECT_LIST",
+]
+
+_TABLE_REF = re.compile(r"\b(FROM|JOIN)\s+([A-Za-z0-9_.\"]+)", re.IGNORECASE)
+# Single-quoted SQL string literals ('' is an escaped quote); table references and %s are never rewritten inside them
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+
+def _outside_literals(query, rewrite):
+    # Apply rewrite to the SQL text between string literals, leaving the literals as they are
+    parts = _STRING_LITERAL.split(query)
+    return "".join(part if i % 2 else rewrite(part) for i, part in enumerate(parts))
+
+
+def connection_schema(connect_params):
+    """
+    "DATABASE.SCHEMA" that unqualified table names resolve to on a connection made
+    with connect_params, or None when the connection doesn't set both.
+    """
+    database, schema = connect_params.get("database"), connect_params.get("schema")
+    if not database or not schema:
+        return None
+    return f"{database}.{schema}".replace('"', "").upper()
+
+
+def _qualify(name, default_schema):
+    # Resolve a table name the way the warehouse would; None when it can't be resolved locally
+    name = name.replace('"', "").upper()
+    parts = name.count(".")
+    if parts == 2:
+        return name
+    if default_schema is None:
+        return None
+    if parts == 1:
+        return f"{default_schema.split('.')[0]}.{name}"
+    return f"{default_schema}.{name}"
+
+
+def _view_name(qualified_name):
+    return qualified_name.replace(".", "__")
+
+
+class SnapshotStore:
+    """
+    Read-only view of a snapshot directory that can run the apps' SQL locally.
+
+    Each Arrow IPC file is memory-mapped and read zero-copy into an Arrow table,
+    which is registered with an in-process DuckDB connection that executes the same
+    queries the apps send to Snowflake. Table references and %s placeholders are
+    rewritten with regular expressions, outside string literals only, which is enough
+    for the apps' fixed query templates but is not a SQL parser.
+    """
+
+    def __init__(self, directory):
+        import duckdb  # Only needed in snapshot mode
+
+        with open(os.path.join(directory, MANIFEST_NAME)) as manifest_file:
+            self.manifest = json.load(manifest_file)
+
+        self._lock = threading.Lock()  # A DuckDB connection must not be used by two threads at once
+        self._db = duckdb.connect()
+        self.tables = {}
+        for name, entry in self.manifest["tables"].items():
+            # The table's buffers stay views of the mapping, which lives as long as the table
+            source = pa.memory_map(os.path.join(directory, entry["file"]))
+            table = pa.ipc.open_file(source).read_all()
+            self.tables[name] = table
+            self._db.register(_view_name(name), table)
+
+    def covers(self, query, default_schema=None):
+        """
+        Whether every table query reads is in the snapshot. Unqualified names resolve
+        against default_schema, the connection's "DATABASE.SCHEMA" (see connection_schema).
+        """
+        names = [_qualify(name, default_schema) for _, name in _TABLE_REF.findall(_STRING_LITERAL.sub("''", query))]
+        return bool(names) and all(name in self.tables for name in names)
+
+    def query(self, query, params=None, default_schema=None):
+        def rewrite(sql):
+            sql = _TABLE_REF.sub(
+                lambda match: f"{match.group(1)} {_view_name(_qualify(match.group(2), default_schema))}", sql
+            )
+            return sql.replace("%s", "?")
+
+        local_sql = _outside_literals(query, rewrite)
+        annotate(source="snapshot")
+        with self._lock, phase("fetch"):
+            return self._db.execute(local_sql, list(params or ())).df()
+
+
+def snapshot_dir():
+    return os.environ.get(SNAPSHOT_DIR_ENV)
+
+
+@st.cache_resource
+def get_snapshot_store():
+    """The process-wide snapshot store, or None when snapshot mode is off."""
+    directory = snapshot_dir()
+    if not directory:
+        return None
+    return SnapshotStore(directory)
+
+
+def write_snapshot(conn, directory, tables=SNAPSHOT_TABLES):
+    from arrow_fetch import fetch_arrow_table
+
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "tables": {}}
+    for name in tables:
+        started = time.perf_counter()
+        table = fetch_arrow_table(conn, f"SELECT * FROM {name}")
+        file_name = f"{name}.arrow"
+        tmp_path = os.path.join(directory, file_name + ".tmp")
+        # IPC file format without compression, so the reader can map it instead of decoding it
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, os.path.join(directory, file_name))
+        manifest["tables"][name] = {
+            "file": file_name,
+            "rows": table.num_rows,
+            "bytes": os.path.getsize(os.path.join(directory, file_name)),
+            "columns": table.column_names,
+        }
+        print(f"{name}: {table.num_rows} rows in {time.perf_counter() - started:.1f}s")
+
+    # Write the manifest last so a half-finished run never looks like a valid snapshot
+    tmp_manifest = os.path.join(directory, MANIFEST_NAME + ".tmp")
+    with open(tmp_manifest, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    os.replace(tmp_manifest, os.path.join(directory, MANIFEST_NAME))
+    return manifest
+
+
+def main():
+    import snowflake.connector
+    from snowflake_pool import secrets_connect_params
+
+    parser = argparse.ArgumentParser(description="Materialize read-mostly Snowflake tables to local Arrow files.")
+    parser.add_argument("--dir", default=DEFAULT_SNAPSHOT_DIR, help="Output directory (default: %(default)s)")
+    parser.add_argument("--tables", nargs="+", default=SNAPSHOT_TABLES, help="Fully qualified tables to snapshot")
+    args = parser.parse_args()
+
+    conn = snowflake.connector.connect(**secrets_connect_params())
+    try:
+        manifest = write_snapshot(conn, args.dir, [name.upper() for name in args.tables])
+    finally:
+        conn.close()
+    print(f"Wrote {len(manifest['tables'])} tables to {args.dir}; run the apps with {SNAPSHOT_DIR_ENV}={args.dir}")
+
+
+if __name__ == "__main__":
+    main()
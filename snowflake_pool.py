@@ -0,0 +1,194 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+from perf_trace import phase
+
+# Pool defaults: enough connections for a handful of concurrent sessions per replica
+DEFAULT_MAX_SIZE = 8
+DEFAULT_MAX_IDLE_SECONDS = 600
+DEFAULT_HEALTH_CHECK_SECONDS = 60
+DEFAULT_CHECKOUT_TIMEOUT = 30
+
+SECRETS_CONNECT_KEYS = ("user", "password", "account", "warehouse", "database", "schema")
+
+
+def snowflake_connect(**connect_params):
+    # The connector takes about a second to import, so it is loaded on the first connection rather than at app start
+    import snowflake.connector
+    return snowflake.connector.connect(**connect_params)
+
+
+def _is_connection_failure(error):
+    from snowflake.connector.errors import InterfaceError, OperationalError
+    return isinstance(error, (OperationalError, InterfaceError))
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+
+
+class SnowflakePool:
+    """
+    Bounded, thread-safe pool of Snowflake connections.
+
+    Connections are checked out exclusively by one session at a time, so
+    concurrent users never share a cursor. Idle connections older than
+    max_idle_seconds are closed, and connections that sat idle longer than
+    health_check_seconds are pinged with SELECT 1 before being handed out.
+    """
+
+    def __init__(self, connect_params, max_size=DEFAULT_MAX_SIZE, max_idle_seconds=DEFAULT_MAX_IDLE_SECONDS,
+                 health_check_seconds=DEFAULT_HEALTH_CHECK_SECONDS, checkout_timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        self._connect_params = dict(connect_params)
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_seconds = health_check_seconds
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._size = 0   # open connections, idle + checked out
+        self._created = 0
+        self._evicted = 0
+
+    def _connect(self):
+        with self._cond:
+            self._created += 1
+        return snowflake_connect(**self._connect_params)
+
+    def _is_healthy(self, conn, idle_for):
+        if conn.is_closed():
+            return False
+        if idle_for < self.health_check_seconds:
+            return True
+        from snowflake.connector.errors import Error  # Already imported: conn came from the connector
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1").fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Error:
+            return False
+
+    def _pop_expired_locked(self, now):
+        # Idle list is ordered by last use, so expired connections sit at the front
+        expired = []
+        while self._idle and now - self._idle[0][1] > self.max_idle_seconds:
+            expired.append(self._idle.pop(0)[0])
+        self._size -= len(expired)
+        self._evicted += len(expired)
+        return expired
+
+    @staticmethod
+    def _close_quietly(connections):
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def acquire(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        conn, last_used = None, None
+        expired = []
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                newly_expired = self._pop_expired_locked(now)
+                if newly_expired:
+                    expired += newly_expired
+                    self._cond.notify(len(newly_expired))
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._close_quietly(expired)
+                    raise PoolTimeout(f"No Snowflake connection available after {timeout}s (pool size {self.max_size})")
+                self._cond.wait(remaining)
+        self._close_quietly(expired)
+
+        # Connect and health-check outside the lock so other sessions are not blocked
+        try:
+            if conn is None:
+                return self._connect()
+            if self._is_healthy(conn, time.monotonic() - last_used):
+                return conn
+            self._close_quietly([conn])
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            if discard or conn.is_closed():
+                self._size -= 1
+                to_close = [conn]
+            else:
+                self._idle.append((conn, time.monotonic()))
+                to_close = []
+            to_close += self._pop_expired_locked(time.monotonic())
+            self._cond.notify(max(1, len(to_close)))
+        self._close_quietly(to_close)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection for the duration of the block and return it to the pool afterwards."""
+        with phase("connect"):
+            conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except Exception as e:
+            # Network or session-level failure: the connection cannot be trusted any more
+            discard = _is_connection_failure(e)
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close_all(self):
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle = []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._close_quietly(idle)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+                "created": self._created,
+                "evicted": self._evicted,
+            }
+
+
+def secrets_connect_params():
+    """Connection parameters from the [snowflake] section of .streamlit/secrets.toml."""
+    return {key: st.secrets["snowflake"][key] for key in SECRETS_CONNECT_KEYS}
+
+
+@st.cache_resource
+def get_pool(**connect_params):
+    # One pool per distinct set of credentials, shared by every session in the process
+    return SnowflakePool(connect_params)
+
+
+def get_secrets_pool():
+    return get_pool(**secrets_connect_params())
@@ -1,62 +1,58 @@
 import streamlit as st
 import pandas as pd
-import snowflake.connector
-import configparser
-import matplotlib.pyplot as plt
 import numpy as np
-import re
-
-def create_snowflake_engine():
-    user = st.secrets["snowflake"]["user"]
-    password = st.secrets["snowflake"]["password"]
-    account = st.secrets["snowflake"]["account"]
-    warehouse = st.secrets["snowflake"]["warehouse"]
-    database = st.secrets["snowflake"]["database"]
-    schema = st.secrets["snowflake"]["schema"]
-
-    return create_engine(
-        f'snowflake://{user}:{password}@{account}/{database}/{schema}?warehouse={warehouse}'
-    )
-
-# Load data using SQLAlchemy engine
-import snowflake.connector
-
-def load_table_data(query):
-    conn = snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
-
-    try:
-        cursor = conn.cursor()
-        cursor.execute(query)
-        df = cursor.fetch_pandas_all()  # ✅ optimized native fetch
-    finally:
-        conn.close()
-
-    # Clean encoding
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].astype(str).apply(
-            lambda x: x.encode('utf-8', 'ignore').decode('utf-8', 'ignore') if x else x
-        )
-
-    return df
+from snowflake_pool import get_secrets_pool, secrets_connect_params
+from query_cache import get_query_cache
+from arrow_fetch import fetch_dataframe
+from perf_trace import show_trace, span, start_trace, traced_query
+from snapshot import connection_schema, get_snapshot_store
+from chart_cache import show_chart
+from hotel_search_index import get_hotel_index
+from review_renderer import highlight_range, render_review_list
+from review_pagination import count_reviews, fetch_review_page, max_page
+
+def fetch_table_data(query, params=None):
+    # Snapshot mode: answer read-mostly tables from local memory-mapped copies
+    snapshot = get_snapshot_store()
+    if snapshot is not None:
+        # Unqualified tables resolve against the database and schema the connection uses
+        default_schema = connection_schema(secrets_connect_params())
+        if snapshot.covers(query, default_schema):
+            return snapshot.query(query, params, default_schema)
+    # Borrow a pooled connection instead of logging in for every query
+    # Arrow batches are streamed and encoding is cleaned whole columns at a time (nulls stay null)
+    with get_secrets_pool().connection() as conn:
+        return fetch_dataframe(conn, query, params, clean=True)  # ✅ optimized native fetch
+
+# Serve repeated queries (widget reruns, other sessions) from the shared result cache
+def load_table_data(query, params=None):
+    with traced_query(query, params):
+        return get_query_cache().get_or_load(query, params, fetch_table_data)
+
+# Colorful bar chart of a hotel's aspect scores
+def aspect_scores_chart(plt, aspect_scores):
+    fig, ax = plt.subplots()
+    bars = ax.bar(aspect_scores["Aspect"], aspect_scores["Score"], color=plt.cm.viridis(np.linspace(0, 1, len(aspect_scores))))
+    ax.set_xlabel('Aspect')
+    ax.set_ylabel('Score')
+    ax.set_title('Aspect Scores')
+
+    for bar in bars:
+        yval = round(bar.get_height())
+        ax.text(bar.get_x() + bar.get_width() / 2, yval + 0.1, yval, ha='center', va='bottom')
+
+    plt.xticks(rotation=45, ha='right')
+    return fig
 
 # UI starts here
 st.title("Hotel Insights Dashboard")
+trace = start_trace("snowflake_streamlit_final_secrets.py")  # Opt-in timings: INSIGHTS_TRACE=1 or ?trace=1
 
 # Search hotels
 search_term = st.text_input("Search Hotels by Name:")
 if search_term:
-    hotels = load_table_data(f"""
-        SELECT PRODUCT_ID, HOTEL_NAME, CITY, STAR_RATING
-        FROM PRODUCT_LIST
-        WHERE HOTEL_NAME ILIKE '%{search_term}%'
-    """)
+    # Answered from the in-memory trigram index, not the warehouse
+    hotels = get_hotel_index(fetch_table_data).search(search_term)
 
     if hotels.empty:
         st.warning("No hotels found for the search term.")
@@ -69,13 +65,13 @@ if search_term:
             selected_product_id = hotels.loc[hotels["HOTEL_NAME"] == selected_hotel, "PRODUCT_ID"].iloc[0]
 
             # Display product insights
-            insights = load_table_data(f"""
+            insights = load_table_data("""
                 SELECT AMENITIES_SCORE, LOCATION_SCORE, DINING_SCORE, GENERAL_SCORE,
                     CLEANLINESS_SCORE, STAFF_SCORE, VALUE_FOR_MONEY_SCORE, ROOM_SCORE,
                     PRODUCT_SUMMARY, TOP_EMOTION_1, TOP_EMOTION_2, TOP_EMOTION_3, OVERALL_SCORE
                 FROM PRODUCT_INSIGHT
-                WHERE PRODUCT_ID = {selected_product_id}
-            """)
+                WHERE PRODUCT_ID = %s
+            """, (selected_product_id,))
 
             if not insights.empty:
                 st.subheader("Product Insights")
@@ -106,18 +102,7 @@ if search_term:
                         "Score": valid_scores.values
                     })
 
-                    fig, ax = plt.subplots()
-                    bars = ax.bar(aspect_scores["Aspect"], aspect_scores["Score"], color=plt.cm.viridis(np.linspace(0, 1, len(aspect_scores))))
-                    ax.set_xlabel('Aspect')
-                    ax.set_ylabel('Score')
-                    ax.set_title('Aspect Scores')
-
-                    for bar in bars:
-                        yval = round(bar.get_height())
-                        ax.text(bar.get_x() + bar.get_width() / 2, yval + 0.1, yval, ha='center', va='bottom')
-
-                    plt.xticks(rotation=45, ha='right')
-                    st.pyplot(fig)
+                    show_chart(aspect_scores_chart, aspect_scores)
                 else:
                     st.warning("Mismatch between aspect names and aspect scores.")
                 st.divider()
@@ -127,11 +112,11 @@ if search_term:
 
                 if selected_aspect:
                     # Display top phrases
-                    top_phrases = load_table_data(f"""
+                    top_phrases = load_table_data("""
                         SELECT POSITIVE_PHRASES, NEGATIVE_PHRASES
                         FROM PRODUCT_ASPECT_TOP_PHRASE
-                        WHERE PRODUCT_ID = {selected_product_id} AND ASPECT = '{selected_aspect}'
-                    """)
+                        WHERE PRODUCT_ID = %s AND ASPECT = %s
+                    """, (selected_product_id, selected_aspect))
 
                     if not top_phrases.empty:
                         st.subheader("Top Phrases")
@@ -143,7 +128,7 @@ if search_term:
                         # Display positive phrases
                         if positive_phrases:
                             positive_phrases = positive_phrases.split(",")
-                            with col1:
+                            with col1, span("markdown", "positive phrases", items=len(positive_phrases)):
                                 st.write("**Positive Phrases**")
                                 for phrase in positive_phrases:
                                     st.markdown(f"<div style='background-color:#d4edda;padding:10px;'><b>{phrase.strip()}</b></div>", unsafe_allow_html=True)
@@ -154,7 +139,7 @@ if search_term:
                         # Display negative phrases
                         if negative_phrases:
                             negative_phrases = negative_phrases.split(",")
-                            with col2:
+                            with col2, span("markdown", "negative phrases", items=len(negative_phrases)):
                                 st.write("**Negative Phrases**")
                                 for phrase in negative_phrases:
                                     st.markdown(f"<div style='background-color:#f8d7da;padding:10px;'><b>{phrase.strip()}</b></div>", unsafe_allow_html=True)
@@ -162,18 +147,12 @@ if search_term:
                             with col2:
                                 st.write("No negative phrases found.")
                     st.divider()
-               # Get review snippets with confidence score > 80
-                reviews = load_table_data(f"""
-                    SELECT SENTIMENT_TYPE, SENTIMENT_TEXT, START_INDEX, END_INDEX, CONFIDENCE_SCORE, REVIEW_TEXT
-                    FROM PRODUCT_REVIEW_SNIPPET
-                    WHERE PRODUCT_ID = {selected_product_id} 
-                    AND ASPECT_NAME = '{selected_aspect}' AND CONFIDENCE_SCORE > .8
-                    ORDER BY CONFIDENCE_SCORE DESC
-                """)
-
-                if not reviews.empty:
-                    positive_count = reviews[reviews['SENTIMENT_TYPE'] == 'positive'].shape[0]
-                    negative_count = reviews[reviews['SENTIMENT_TYPE'] == 'negative'].shape[0]
+               # Count review snippets with confidence score > 80; pages are fetched on demand below
+                review_counts = count_reviews(load_table_data, "PRODUCT_REVIEW_SNIPPET", selected_product_id, selected_aspect, min_confidence=0.8)
+
+                if review_counts["total"] > 0:
+                    positive_count = review_counts["positive"]
+                    negative_count = review_counts["negative"]
                     # Add space between the Top Phrases and the Phrase Mentions section
                     st.markdown("<br>", unsafe_allow_html=True)  # This adds a line break
                     # Add space between the Top Phrases and the Phrase Mentions section
@@ -184,29 +163,24 @@ if search_term:
 
                     # Pagination setup
                     reviews_per_page = st.selectbox("Reviews per page:", options=[10, 25], index=1)  # Default to 25
-                    total_reviews = len(reviews)
-                    max_page = int(np.ceil(total_reviews / reviews_per_page))
-                    page = st.number_input("Select Page:", min_value=1, max_value=max_page, step=1)
-
-                    start_idx = (page - 1) * reviews_per_page
-                    end_idx = start_idx + reviews_per_page
+                    total_reviews = review_counts["total"]
+                    page = st.number_input("Select Page:", min_value=1, max_value=max_page(total_reviews, reviews_per_page), step=1)
 
-                    # Display reviews
-                    for idx, review in reviews.iloc[start_idx:end_idx].iterrows():
-                        sentiment_color = "#90EE90" if review['SENTIMENT_TYPE'] == 'positive' else "#8B0000"
-                        text_color = "black" if review['SENTIMENT_TYPE'] == 'positive' else "white"
+                    reviews = fetch_review_page(
+                        load_table_data, "PRODUCT_REVIEW_SNIPPET",
+                        ["SENTIMENT_TYPE", "SENTIMENT_TEXT", "START_INDEX", "END_INDEX", "CONFIDENCE_SCORE", "REVIEW_TEXT"],
+                        selected_product_id, selected_aspect, page, reviews_per_page, min_confidence=0.8
+                    )
 
-                        # Highlight sentiment in the review text
-                        highlighted_text = (
-                            review['REVIEW_TEXT'][:review['START_INDEX']] +
-                            f"<span style='background-color:{sentiment_color};font-weight:bold; color:{text_color};'>{review['SENTIMENT_TEXT']}</span>" +
-                            review['REVIEW_TEXT'][review['END_INDEX']:]
-                        )
-
-                        st.markdown(highlighted_text, unsafe_allow_html=True)
-                        st.divider()
+                    # Display reviews (highlight sentiment in the review text; one element for the whole page)
+                    render_review_list([
+                        highlight_range(review['REVIEW_TEXT'], review['START_INDEX'], review['END_INDEX'], review['SENTIMENT_TEXT'], review['SENTIMENT_TYPE'])
+                        for review in reviews.to_dict("records")
+                    ])
 
                     if total_reviews == 0:
                         st.warning("No reviews to display.")
             else:
                 st.warning("No insights found for the selected product.")
+
+show_trace(trace)
@@ -1,113 +1,60 @@
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine
-import urllib
 import numpy as np
-import re
-import matplotlib.pyplot as plt
+from snowflake_pool import get_secrets_pool, secrets_connect_params
+from query_cache import get_query_cache
+from arrow_fetch import fetch_dataframe
+from perf_trace import show_trace, span, start_trace, traced_query
+from snapshot import connection_schema, get_snapshot_store
+from chart_cache import show_chart
+from hotel_search_index import get_hotel_index
+from review_renderer import render_review_list
+from review_highlighter import get_review_highlighter
+from review_pagination import count_reviews, fetch_review_columns, fetch_review_page, max_page
+
+def fetch_table_data(query, params=None):
+    # Snapshot mode: answer read-mostly tables from local memory-mapped copies
+    snapshot = get_snapshot_store()
+    if snapshot is not None:
+        # Unqualified tables resolve against the database and schema the connection uses
+        default_schema = connection_schema(secrets_connect_params())
+        if snapshot.covers(query, default_schema):
+            return snapshot.query(query, params, default_schema)
+    # Borrow a pooled connection instead of logging in for every query
+    # Arrow batches are streamed and encoding is cleaned whole columns at a time (nulls stay null)
+    with get_secrets_pool().connection() as conn:
+        return fetch_dataframe(conn, query, params, clean=True)  # ✅ optimized native fetch
+
+# Serve repeated queries (widget reruns, other sessions) from the shared result cache
+def load_table_data(query, params=None):
+    with traced_query(query, params):
+        return get_query_cache().get_or_load(query, params, fetch_table_data)
+
+
+# Colorful bar chart of a hotel's aspect scores
+def aspect_scores_chart(plt, aspect_scores):
+    fig, ax = plt.subplots()
+    bars = ax.bar(aspect_scores["Aspect"], aspect_scores["Score"], color=plt.cm.viridis(np.linspace(0, 1, len(aspect_scores))))
+    ax.set_xlabel('Aspect')
+    ax.set_ylabel('Score')
+    ax.set_title('Aspect Scores')
+
+    for bar in bars:
+        yval = round(bar.get_height())
+        ax.text(bar.get_x() + bar.get_width() / 2, yval + 0.1, yval, ha='center', va='bottom')
+
+    plt.xticks(rotation=45, ha='right')
+    return fig
 
-from sqlalchemy import create_engine
-
-# SQLAlchemy-compatible Snowflake connection
-def create_snowflake_engine():
-    user = st.secrets["snowflake"]["user"]
-    password = st.secrets["snowflake"]["password"]
-    account = st.secrets["snowflake"]["account"]
-    warehouse = st.secrets["snowflake"]["warehouse"]
-    database = st.secrets["snowflake"]["database"]
-    schema = st.secrets["snowflake"]["schema"]
-
-    return create_engine(
-        f'snowflake://{user}:{password}@{account}/{database}/{schema}?warehouse={warehouse}'
-    )
-
-# Load data using SQLAlchemy engine
-import snowflake.connector
-
-def load_table_data(query):
-    conn = snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
-
-    try:
-        cursor = conn.cursor()
-        cursor.execute(query)
-        df = cursor.fetch_pandas_all()  # ✅ optimized native fetch
-    finally:
-        conn.close()
-
-    # Clean encoding
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].astype(str).apply(
-            lambda x: x.encode('utf-8', 'ignore').decode('utf-8', 'ignore') if x else x
-        )
-
-    return df
-
-
-def highlight_full_sentence(text, sentiment, sentiment_type, lang):
-    """
-    Highlights the full sentence containing the sentiment for English, Spanish, and French.
-    For other languages, highlights only the sentiment word/phrase.
-
-    Parameters:
-        text (str): The review text.
-        sentiment (str): The sentiment phrase to be highlighted.
-        sentiment_type (str): The sentiment type (positive/negative).
-        lang (str): The language of the review.
-
-    Returns:
-        str: The modified text with highlighted sentiment.
-    """
-
-    # Validate input types
-    if not isinstance(text, str) or not isinstance(sentiment, str):
-        return text  
-
-    # Fix encoding issues before processing
-    text = text.encode('utf-8', 'ignore').decode('utf-8', 'ignore')
-    sentiment = sentiment.encode('utf-8', 'ignore').decode('utf-8', 'ignore')
-
-    # Define highlight colors based on sentiment type
-    sentiment_color = "#90EE90" if sentiment_type == 'positive' else "#8B0000"
-    text_color = "black" if sentiment_type == 'positive' else "white"
-
-    # If sentiment is not present in text, return original text
-    if sentiment.lower() not in text.lower():
-        return text  
-
-    # Apply full sentence highlighting only for English, Spanish, and French
-    if lang.lower() in ["english", "spanish", "french"]:
-        sentences = re.split(r'(?<=[.!?])\s+', text)  # Split text into sentences
-        for i, sentence in enumerate(sentences):
-            if sentiment.lower() in sentence.lower():
-                highlighted_sentence = f"<span style='background-color:{sentiment_color}; color:{text_color}; font-weight:bold;'>{sentence}</span>"
-                sentences[i] = highlighted_sentence
-                return " ".join(sentences)  # Return modified text with highlighted sentence
-
-    # For other languages, highlight only the sentiment word/phrase
-    highlighted_text = text.replace(
-        sentiment,
-        f"<span style='background-color:{sentiment_color}; color:{text_color}; font-weight:bold;'>{sentiment}</span>"
-    )
-    return highlighted_text
-    
 # **UI starts here**
 st.title("Hotel Insights Dashboard")
+trace = start_trace("snowflake_streamlit_trail_secrets_multilang.py")  # Opt-in timings: INSIGHTS_TRACE=1 or ?trace=1
 
 # **Search hotels**
 search_term = st.text_input("Search Hotels by Name:")
 if search_term:
-    hotels = load_table_data(f"""
-        SELECT PRODUCT_ID, HOTEL_NAME, CITY, STAR_RATING
-        FROM PRODUCT_LIST
-        WHERE HOTEL_NAME ILIKE '%{search_term}%'
-    """)
+    # Answered from the in-memory trigram index, not the warehouse
+    hotels = get_hotel_index(fetch_table_data).search(search_term)
 
     if hotels.empty:
         st.warning("No hotels found for the search term.")
@@ -119,13 +66,13 @@ if search_term:
         if selected_hotel:
             selected_product_id = hotels.loc[hotels["HOTEL_NAME"] == selected_hotel, "PRODUCT_ID"].iloc[0]
            # **Display product insights**
-            insights = load_table_data(f"""
+            insights = load_table_data("""
                 SELECT AMENITIES_SCORE, LOCATION_SCORE, DINING_SCORE, GENERAL_SCORE,
                     CLEANLINESS_SCORE, STAFF_SCORE, VALUE_FOR_MONEY_SCORE, ROOM_SCORE,
                     PRODUCT_SUMMARY, TOP_EMOTION_1, TOP_EMOTION_2, TOP_EMOTION_3, OVERALL_SCORE
                 FROM PRODUCT_INSIGHT
-                WHERE PRODUCT_ID = {selected_product_id}
-            """)
+                WHERE PRODUCT_ID = %s
+            """, (selected_product_id,))
             #st.write("INSIGHTS DF:", insights)
             if not insights.empty:
                 st.subheader("Product Insights")
@@ -156,18 +103,7 @@ if search_term:
                         "Score": valid_scores.values
                     })
 
-                    fig, ax = plt.subplots()
-                    bars = ax.bar(aspect_scores["Aspect"], aspect_scores["Score"], color=plt.cm.viridis(np.linspace(0, 1, len(aspect_scores))))
-                    ax.set_xlabel('Aspect')
-                    ax.set_ylabel('Score')
-                    ax.set_title('Aspect Scores')
-
-                    for bar in bars:
-                        yval = round(bar.get_height())
-                        ax.text(bar.get_x() + bar.get_width() / 2, yval + 0.1, yval, ha='center', va='bottom')
-
-                    plt.xticks(rotation=45, ha='right')
-                    st.pyplot(fig)
+                    show_chart(aspect_scores_chart, aspect_scores)
                 else:
                     st.warning("Mismatch between aspect names and aspect scores.")
                 st.divider()
@@ -179,11 +115,11 @@ if search_term:
 
                 if selected_aspect:
                     # Display top phrases
-                    top_phrases = load_table_data(f"""
+                    top_phrases = load_table_data("""
                         SELECT POSITIVE_PHRASES, NEGATIVE_PHRASES
                         FROM PRODUCT_ASPECT_TOP_PHRASE
-                        WHERE PRODUCT_ID = {selected_product_id} AND ASPECT = '{selected_aspect}'
-                    """)
+                        WHERE PRODUCT_ID = %s AND ASPECT = %s
+                    """, (selected_product_id, selected_aspect))
 
                     if not top_phrases.empty:
                         st.subheader("Top Phrases")
@@ -195,7 +131,7 @@ if search_term:
                         # Display positive phrases
                         if positive_phrases:
                             positive_phrases = positive_phrases.split(",")
-                            with col1:
+                            with col1, span("markdown", "positive phrases", items=len(positive_phrases)):
                                 st.write("**Positive Phrases**")
                                 for phrase in positive_phrases:
                                     st.markdown(f"<div style='background-color:#d4edda;padding:10px;'><b>{phrase.strip()}</b></div>", unsafe_allow_html=True)
@@ -206,7 +142,7 @@ if search_term:
                         # Display negative phrases
                         if negative_phrases:
                             negative_phrases = negative_phrases.split(",")
-                            with col2:
+                            with col2, span("markdown", "negative phrases", items=len(negative_phrases)):
                                 st.write("**Negative Phrases**")
                                 for phrase in negative_phrases:
                                     st.markdown(f"<div style='background-color:#f8d7da;padding:10px;'><b>{phrase.strip()}</b></div>", unsafe_allow_html=True)
@@ -216,50 +152,65 @@ if search_term:
                     st.divider()
 
                 if selected_aspect:
-                    # **Load Multi-Language Reviews**
-                    reviews = load_table_data(f"""
-                        SELECT ROW_NUMBER() OVER (ORDER BY CONFIDENCE_SCORE DESC, START_INDEX ASC) AS ROW_NUM, 
-                               SENTIMENT_TYPE, SENTIMENT_TEXT, SENTIMENT_TEXT_HI, SENTIMENT_TEXT_TA, SENTIMENT_TEXT_TE, SENTIMENT_TEXT_KN, SENTIMENT_TEXT_ES, SENTIMENT_TEXT_FR, SENTIMENT_TEXT_IW,
-                               REVIEW_TEXT, REVIEW_TEXT_HI, REVIEW_TEXT_TA, REVIEW_TEXT_TE, REVIEW_TEXT_KN, REVIEW_TEXT_ES, REVIEW_TEXT_FR, REVIEW_TEXT_IW,
-                               CONFIDENCE_SCORE
-                        FROM PRODUCT_MULTI_LANG_REVIEW_SNIPPET
-                        WHERE PRODUCT_ID = {selected_product_id}
-                        AND ASPECT_NAME = '{selected_aspect}'
-                        AND CONFIDENCE_SCORE > 0.8
-                        ORDER BY CONFIDENCE_SCORE desc, START_INDEX asc
-                    """)
+                    # **Count Multi-Language Reviews** (pages are fetched on demand below)
+                    review_counts = count_reviews(load_table_data, "PRODUCT_MULTI_LANG_REVIEW_SNIPPET", selected_product_id, selected_aspect, min_confidence=0.8)
         
-                    if not reviews.empty:
-                        positive_count = reviews[reviews['SENTIMENT_TYPE'] == 'positive'].shape[0]
-                        negative_count = reviews[reviews['SENTIMENT_TYPE'] == 'negative'].shape[0]
+                    if review_counts["total"] > 0:
+                        positive_count = review_counts["positive"]
+                        negative_count = review_counts["negative"]
         
                         st.markdown(f"<div style='padding: 10px; background-color: lightgreen; color: black;'>**Positive Mentions:** {positive_count}</div>", unsafe_allow_html=True)
                         st.markdown(f"<div style='padding: 10px; background-color: darkred; color: white;'>**Negative Mentions:** {negative_count}</div>", unsafe_allow_html=True)
                         st.divider()
         
                         reviews_per_page = st.selectbox("Reviews per page:", options=[10, 25, 40], index=1)
-                        total_reviews = len(reviews)
-                        max_page = int(np.ceil(total_reviews / reviews_per_page))
-                        page = st.number_input("Select Page:", min_value=1, max_value=max_page, step=1)
+                        total_reviews = review_counts["total"]
+                        page = st.number_input("Select Page:", min_value=1, max_value=max_page(total_reviews, reviews_per_page), step=1)
         
-                        start_idx = (page - 1) * reviews_per_page
-                        end_idx = start_idx + reviews_per_page
-                        reviews_batch = reviews.iloc[start_idx:end_idx]
+                        # Page through a narrow skeleton; each language's text is fetched only when its tab is open
+                        reviews_batch = fetch_review_page(
+                            load_table_data, "PRODUCT_MULTI_LANG_REVIEW_SNIPPET", ["SENTIMENT_TYPE", "CONFIDENCE_SCORE"],
+                            selected_product_id, selected_aspect, page, reviews_per_page, min_confidence=0.8
+                        )
         
                         st.divider()
         
-                        tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(["English", "Hindi", "Tamil", "Telugu", "Kannada", "Spanish", "French", "Hebrew"])
+                        languages = ["English", "Hindi", "Tamil", "Telugu", "Kannada", "Spanish", "French", "Hebrew"]
+                        tabs = st.tabs(languages, key="review_language", on_change="rerun")
         
                         for tab, lang, review_col, sentiment_col in zip(
-                                [tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8],
-                                ["English", "Hindi", "Tamil", "Telugu", "Kannada", "Spanish", "French", "Hebrew"],
+                                tabs,
+                                languages,
                                 ["REVIEW_TEXT", "REVIEW_TEXT_HI", "REVIEW_TEXT_TA", "REVIEW_TEXT_TE", "REVIEW_TEXT_KN", "REVIEW_TEXT_ES", "REVIEW_TEXT_FR", "REVIEW_TEXT_IW"],
                                 ["SENTIMENT_TEXT", "SENTIMENT_TEXT_HI", "SENTIMENT_TEXT_TA", "SENTIMENT_TEXT_TE", "SENTIMENT_TEXT_KN", "SENTIMENT_TEXT_ES", "SENTIMENT_TEXT_FR", "SENTIMENT_TEXT_IW"]):
+                            if not tab.open:
+                                continue
         
                             # Streamlit UI Integration
                             with tab:
                                 st.subheader(f"Reviews in {lang} ({selected_aspect})")
-                                for _, review in reviews_batch.iterrows():
-                                    highlighted_text = highlight_full_sentence(review[review_col], review[sentiment_col], review['SENTIMENT_TYPE'], lang)
-                                    st.markdown(f"<div style='padding:10px;'><b>{review['ROW_NUM']}. </b>{highlighted_text}</div>", unsafe_allow_html=True)
-                                    st.divider()
+                                # Same filters, order and bounds as the page, so rows line up by position; cached per language and page
+                                language_text = fetch_review_columns(
+                                    load_table_data, "PRODUCT_MULTI_LANG_REVIEW_SNIPPET", [review_col, sentiment_col],
+                                    selected_product_id, selected_aspect, page, reviews_per_page, min_confidence=0.8
+                                )
+                                page_reviews = pd.concat([reviews_batch.reset_index(drop=True), language_text], axis=1)
+                                fallback = None
+                                if review_col != "REVIEW_TEXT" and page_reviews[review_col].isna().any():
+                                    # Snippets without this translation show the original text, fetched only when needed
+                                    original_text = fetch_review_columns(
+                                        load_table_data, "PRODUCT_MULTI_LANG_REVIEW_SNIPPET", ["REVIEW_TEXT", "SENTIMENT_TEXT"],
+                                        selected_product_id, selected_aspect, page, reviews_per_page, min_confidence=0.8
+                                    )
+                                    page_reviews = pd.concat([page_reviews, original_text], axis=1)
+                                    fallback = ("English", "REVIEW_TEXT", "SENTIMENT_TEXT")
+                                with span("highlight", lang, items=len(page_reviews)):
+                                    highlighted = get_review_highlighter().highlight_batch(
+                                        page_reviews, lang, review_col, sentiment_col,
+                                        id_prefix=(selected_product_id, selected_aspect), fallback=fallback
+                                    )
+                                render_review_list([
+                                    f"<b>{row_num}. </b>{text}" for row_num, text in zip(page_reviews["ROW_NUM"], highlighted)
+                                ])
+
+show_trace(trace)
@@ -1,62 +1,77 @@
 import streamlit as st
 import pandas as pd
-import snowflake.connector
 import configparser
-import matplotlib.pyplot as plt
 import numpy as np
-
-# Snowflake connection function
-def create_snowflake_connection():
+from snowflake_pool import get_pool
+from query_cache import get_query_cache
+from arrow_fetch import fetch_dataframe
+from perf_trace import show_trace, start_trace, traced_query
+from snapshot import connection_schema, get_snapshot_store
+from chart_cache import show_chart
+from hotel_search_index import get_hotel_index
+from review_renderer import highlight_range, render_review_list
+from review_pagination import count_reviews, fetch_review_page, max_page
+
+# Snowflake connection parameters
+def snowflake_connect_params():
     config = configparser.ConfigParser()
     config.read("parameter.txt")
 
-    user = config.get("Snowflake_connector", "USER")
-    password = config.get("Snowflake_connector", "PASSWORD")
-    account = config.get("Snowflake_connector", "ACCOUNT")
-
-    return snowflake.connector.connect(
-        user=user,
-        password=password,
-        account=account
-    )
-
-# Load data from Snowflake
-def load_table_data(query):
-    conn = create_snowflake_connection()
-    try:
-        return pd.read_sql(query, conn)
-    finally:
-        conn.close()
-
-# Search hotels
+    params = {
+        "user": config.get("Snowflake_connector", "USER"),
+        "password": config.get("Snowflake_connector", "PASSWORD"),
+        "account": config.get("Snowflake_connector", "ACCOUNT"),
+    }
+    # Optional default namespace for unqualified table names
+    for key in ("database", "schema"):
+        value = config.get("Snowflake_connector", key.upper(), fallback=None)
+        if value:
+            params[key] = value
+    return params
+
+# Load data from Snowflake over a pooled connection
+def fetch_table_data(query, params=None):
+    # Snapshot mode: answer read-mostly tables from local memory-mapped copies
+    snapshot = get_snapshot_store()
+    if snapshot is not None:
+        # Unqualified tables resolve against the database and schema parameter.txt sets, if any
+        default_schema = connection_schema(snowflake_connect_params())
+        if snapshot.covers(query, default_schema):
+            return snapshot.query(query, params, default_schema)
+    with get_pool(**snowflake_connect_params()).connection() as conn:
+        return fetch_dataframe(conn, query, params)
+
+# Serve repeated queries from the shared result cache
+def load_table_data(query, params=None):
+    with traced_query(query, params):
+        return get_query_cache().get_or_load(query, params, fetch_table_data)
+
+# Search hotels (substring + fuzzy match against the in-memory trigram index of PRODUCT_LIST)
 def search_hotels(search_term):
-    query = f"""
-        SELECT PRODUCT_ID, HOTEL_NAME, CITY, STAR_RATING
-        FROM EMT.PUBLIC.PRODUCT_LIST
-        WHERE HOTEL_NAME ILIKE '%{search_term}%'
-    """
-    return load_table_data(query)
+    return get_hotel_index(fetch_table_data, "EMT.PUBLIC.PRODUCT_LIST").search(search_term)
 
 # Get product insights
 def get_product_insight(product_id):
-    query = f"""
+    query = """
         SELECT AMENITIES_SCORE, LOCATION_SCORE, DINING_SCORE, GENERAL_SCORE,
                CLEANLINESS_SCORE, STAFF_SCORE, VALUE_FOR_MONEY_SCORE, ROOM_SCORE,
                PRODUCT_SUMMARY, TOP_EMOTION_1, TOP_EMOTION_2, TOP_EMOTION_3, OVERALL_SCORE
         FROM EMT.PUBLIC.PRODUCT_INSIGHT
-        WHERE PRODUCT_ID = {product_id}
-    """
-    return load_table_data(query)
-
-# Get review snippets (no limit on rows)
-def get_review_snippets(product_id, aspect_name):
-    query = f"""
-        SELECT SENTIMENT_TYPE, SENTIMENT_TEXT, START_INDEX, END_INDEX, CONFIDENCE_SCORE, REVIEW_TEXT
-        FROM EMT.PUBLIC.PRODUCT_REVIEW_SNIPPET
-        WHERE PRODUCT_ID = {product_id} AND ASPECT_NAME = '{aspect_name}'
-        ORDER BY CONFIDENCE_SCORE DESC
+        WHERE PRODUCT_ID = %s
     """
-    return load_table_data(query)
+    return load_table_data(query, (product_id,))
+
+# Count review snippets per sentiment without fetching them
+def get_review_counts(product_id, aspect_name):
+    return count_reviews(load_table_data, "EMT.PUBLIC.PRODUCT_REVIEW_SNIPPET", product_id, aspect_name)
+
+# Get one page of review snippets (the page is selected in SQL, not sliced client-side)
+def get_review_snippets(product_id, aspect_name, page, per_page, sentiment_type=None):
+    return fetch_review_page(
+        load_table_data, "EMT.PUBLIC.PRODUCT_REVIEW_SNIPPET",
+        ["SENTIMENT_TYPE", "SENTIMENT_TEXT", "START_INDEX", "END_INDEX", "CONFIDENCE_SCORE", "REVIEW_TEXT"],
+        product_id, aspect_name, page, per_page, sentiment_type=sentiment_type
+    )
 
 # Get aspect list excluding "General"
 def get_aspect_list():
@@ -64,8 +79,25 @@ def get_aspect_list():
     aspects = load_table_data(query)
     return aspects[aspects["ASPECT_NAME"].str.lower() != "general"]
 
+# Plot colorful bar chart of aspect scores using matplotlib
+def aspect_scores_chart(plt, aspect_scores):
+    fig, ax = plt.subplots()
+    bars = ax.bar(aspect_scores["Aspect"], aspect_scores["Score"], color=plt.cm.viridis(np.linspace(0, 1, len(aspect_scores))))
+    ax.set_xlabel('Aspect')
+    ax.set_ylabel('Score')
+    ax.set_title('Aspect Scores')
+
+    # Add labels on top of the bars with rounded scores
+    for bar in bars:
+        yval = round(bar.get_height())  # Round the score to the nearest integer
+        ax.text(bar.get_x() + bar.get_width() / 2, yval + 0.1, yval, ha='center', va='bottom')
+
+    plt.xticks(rotation=45, ha='right')
+    return fig
+
 # UI starts here
 st.title("Hotel Insights Dashboard")
+trace = start_trace("snowflake_to_streamlit_final.py")  # Opt-in timings: INSIGHTS_TRACE=1 or ?trace=1
 
 # Search hotels
 search_term = st.text_input("Search Hotels by Name:")
@@ -122,20 +154,8 @@ if search_term:
                         "Score": valid_scores.values
                     })
 
-                    # Plot colorful bar chart using matplotlib
-                    fig, ax = plt.subplots()
-                    bars = ax.bar(aspect_scores["Aspect"], aspect_scores["Score"], color=plt.cm.viridis(np.linspace(0, 1, len(aspect_scores))))
-                    ax.set_xlabel('Aspect')
-                    ax.set_ylabel('Score')
-                    ax.set_title('Aspect Scores')
-
-                    # Add labels on top of the bars with rounded scores
-                    for bar in bars:
-                        yval = round(bar.get_height())  # Round the score to the nearest integer
-                        ax.text(bar.get_x() + bar.get_width() / 2, yval + 0.1, yval, ha='center', va='bottom')
-
-                    plt.xticks(rotation=45, ha='right')
-                    st.pyplot(fig)
+                    # Plot colorful bar chart using matplotlib (served from the chart cache when unchanged)
+                    show_chart(aspect_scores_chart, aspect_scores)
                 else:
                     st.warning("Mismatch between aspect names and aspect scores.")
 
@@ -144,12 +164,12 @@ if search_term:
                 selected_aspect = st.selectbox("Select an Aspect:", aspects["ASPECT_NAME"].tolist())
 
                 if selected_aspect:
-                    reviews = get_review_snippets(selected_product_id, selected_aspect)
+                    review_counts = get_review_counts(selected_product_id, selected_aspect)
 
-                    if not reviews.empty:
+                    if review_counts["total"] > 0:
                         # Count positive and negative sentiments
-                        positive_count = reviews[reviews['SENTIMENT_TYPE'] == 'positive'].shape[0]
-                        negative_count = reviews[reviews['SENTIMENT_TYPE'] == 'negative'].shape[0]
+                        positive_count = review_counts["positive"]
+                        negative_count = review_counts["negative"]
 
                         # Display positive and negative counts in colored boxes
                         st.markdown(f"<div style='padding: 10px; background-color: lightgreen; color: black;'>**Positive Mentions:** {positive_count}</div>", unsafe_allow_html=True)
@@ -160,34 +180,28 @@ if search_term:
                         negative_button = st.button(f"Show Negative Reviews ({negative_count})")
 
                         # Filter reviews based on sentiment
-                        filtered_reviews = reviews
+                        sentiment_filter = None
+                        total_reviews = review_counts["total"]
                         if positive_button:
-                            filtered_reviews = reviews[reviews['SENTIMENT_TYPE'] == 'positive']
+                            sentiment_filter, total_reviews = "positive", positive_count
                         elif negative_button:
-                            filtered_reviews = reviews[reviews['SENTIMENT_TYPE'] == 'negative']
+                            sentiment_filter, total_reviews = "negative", negative_count
 
                         st.subheader(f"Reviews for {selected_aspect}")
 
                         # Pagination: Show 10 reviews at a time
                         reviews_per_page = 10
-                        total_reviews = len(filtered_reviews)
-                        page = st.number_input("Select Page:", min_value=1, max_value=int(np.ceil(total_reviews / reviews_per_page)), step=1)
-
-                        start_idx = (page - 1) * reviews_per_page
-                        end_idx = start_idx + reviews_per_page
+                        page = st.number_input("Select Page:", min_value=1, max_value=max_page(total_reviews, reviews_per_page), step=1)
 
                         # Show the reviews in the selected range
-                        for idx, review in filtered_reviews[start_idx:end_idx].iterrows():
-                            sentiment_color = "#90EE90" if review['SENTIMENT_TYPE'] == 'positive' else "#8B0000"  # Light Green for positive, Dark Red for negative
-                            text_color = "black" if review['SENTIMENT_TYPE'] == 'positive' else "white"  # White text for negative reviews
-
-                            highlighted_text = (
-                                review['REVIEW_TEXT'][:review['START_INDEX']] +
-                                f"<span style='background-color:{sentiment_color};font-weight:bold; color:{text_color};'>{review['SENTIMENT_TEXT']}</span>" +
-                                review['REVIEW_TEXT'][review['END_INDEX']:]
-                            )
-                            st.markdown(highlighted_text, unsafe_allow_html=True)
+                        filtered_reviews = get_review_snippets(selected_product_id, selected_aspect, page, reviews_per_page, sentiment_filter)
+                        render_review_list([
+                            highlight_range(review['REVIEW_TEXT'], review['START_INDEX'], review['END_INDEX'], review['SENTIMENT_TEXT'], review['SENTIMENT_TYPE'])
+                            for review in filtered_reviews.to_dict("records")
+                        ], divider=False)
                     else:
                         st.warning("No reviews found for this aspect.")
             else:
                 st.warning("No insights found for the selected product.")
+
+show_trace(trace)
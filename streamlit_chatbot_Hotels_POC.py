@@ -1,48 +1,53 @@
 import streamlit as st
-import snowflake.connector
-
-# Database connection
-
-def get_snowflake_connection():
-    return snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
+from snowflake_pool import get_secrets_pool
+from arrow_fetch import fetch_dataframe
+from perf_trace import show_trace, span, start_trace, traced_query
+from async_query import get_secrets_async_executor
+from query_cache import TABLE_TTL_SECONDS
+from hotel_score_matrix import get_score_matrix
+
 
+# Run a query on a pooled connection and return a DataFrame
+def fetch_table_data(query, params=None):
+    with traced_query(query, params), get_secrets_pool().connection() as conn:
+        return fetch_dataframe(conn, query, params)
 
-# Query functions
+# Answer a chat message from the in-memory score matrix (refreshed hourly) instead of the warehouse
 def fetch_hotels_by_query(query):
-    # Example: Query logic to fetch hotels based on cleanliness or amenities
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"""
-        SELECT PRODUCT_LIST.HOTEL_NAME,  PRODUCT_LIST.STAR_RATING,  PRODUCT_LIST.CITY,  PRODUCT_LIST.TRIPADVISOR_LINK,  PRODUCT_LIST.PRODUCT_ID
-        FROM EMT.PUBLIC.PRODUCT_LIST 
-        JOIN EMT.PUBLIC.PRODUCT_INSIGHT ON PRODUCT_LIST.PRODUCT_ID = PRODUCT_INSIGHT.PRODUCT_ID
-        WHERE AMENITIES_SCORE > 80 OR CLEANLINESS_SCORE > 80
-        LIMIT 10;
-    """)
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    matrix = get_score_matrix(fetch_table_data)
+    intent = matrix.intent_parser.parse(query)
+    return matrix.top_k(intent, k=10)
 
+# Everything "View details" shows, assembled once per hotel; each session gets its own copy
+@st.cache_data(ttl=TABLE_TTL_SECONDS["PRODUCT_INSIGHT"], max_entries=256)
 def fetch_detailed_info(product_id):
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT * FROM EMT.PUBLIC.PRODUCT_INSIGHT WHERE PRODUCT_ID = {product_id}")
-    insights = cursor.fetchone()
-    cursor.execute(f"SELECT * FROM EMT.PUBLIC.PRODUCT_EMOTION WHERE PRODUCT_ID = {product_id}")
-    emotions = cursor.fetchone()
-    cursor.execute(f"SELECT * FROM EMT.PUBLIC.PRODUCT_ASPECT_TOP_PHRASE WHERE PRODUCT_ID = {product_id}")
-    phrases = cursor.fetchone()
-    cursor.execute(f"SELECT * FROM EMT.PUBLIC.PRODUCT_MULTI_LANG_REVIEW_SNIPPET WHERE PRODUCT_ID = {product_id}")
-    snippets = cursor.fetchall()
-    conn.close()
-    return insights, emotions, phrases, snippets
+    # The four lookups are independent, so they are in flight together as Snowflake async queries
+    results = get_secrets_async_executor().run_many({
+        "insights": ("""
+            SELECT PRODUCT_SUMMARY, OVERALL_SCORE, AMENITIES_SCORE, LOCATION_SCORE, DINING_SCORE, GENERAL_SCORE,
+                   CLEANLINESS_SCORE, STAFF_SCORE, VALUE_FOR_MONEY_SCORE, ROOM_SCORE,
+                   TOP_EMOTION_1, TOP_EMOTION_2, TOP_EMOTION_3
+            FROM EMT.PUBLIC.PRODUCT_INSIGHT WHERE PRODUCT_ID = %s LIMIT 1""", (product_id,)),
+        "emotions": ("""
+            SELECT EMOTION1, EMOTION2, EMOTION3
+            FROM EMT.PUBLIC.PRODUCT_EMOTION WHERE PRODUCT_ID = %s LIMIT 1""", (product_id,)),
+        "phrases": ("""
+            SELECT POSITIVE_PHRASES, NEGATIVE_PHRASES
+            FROM EMT.PUBLIC.PRODUCT_ASPECT_TOP_PHRASE WHERE PRODUCT_ID = %s LIMIT 1""", (product_id,)),
+        "snippets": ("""
+            SELECT REVIEW_TEXT_HI, SENTIMENT_TEXT_HI
+            FROM EMT.PUBLIC.PRODUCT_MULTI_LANG_REVIEW_SNIPPET WHERE PRODUCT_ID = %s""", (product_id,)),
+    })
+
+    def first_row(df):
+        return df.iloc[0].to_dict() if not df.empty else None
+
+    return (
+        first_row(results["insights"].df),
+        first_row(results["emotions"].df),
+        first_row(results["phrases"].df),
+        results["snippets"].df.to_dict("records"),
+    )
 
 # Initialize session state for conversation history
 if "messages" not in st.session_state:
@@ -50,6 +55,7 @@ if "messages" not in st.session_state:
 
 # Chat interface
 st.title("Hotel Chatbot with Multilingual Insights")
+trace = start_trace("streamlit_chatbot_Hotels_POC.py")  # Opt-in timings: INSIGHTS_TRACE=1 or ?trace=1
 
 # Display chat messages
 for message in st.session_state.messages:
@@ -60,48 +66,64 @@ for message in st.session_state.messages:
 if user_input := st.chat_input("Ask me about hotels (e.g., 'hotels with excellent amenities')"):
     # Add user message to conversation history
     st.session_state.messages.append({"role": "user", "content": user_input})
+    with span("search", "score matrix top-k"):
+        # Kept for later reruns: a "View details" click reruns the script without chat input
+        st.session_state["hotels"] = fetch_hotels_by_query(user_input)
 
-    # Bot logic
+# Bot logic
+if "hotels" in st.session_state:
+    hotels = st.session_state["hotels"]
     with st.chat_message("assistant"):
         st.markdown("Let me find the best hotels for you...")
-        hotels = fetch_hotels_by_query(user_input)
-        
+
         if hotels:
             response = "Here are some hotels matching your query:\n\n"
             for hotel in hotels:
-                response += f"**{hotel[0]}** ({hotel[2]}): ⭐{hotel[1]}\n[TripAdvisor Link]({hotel[3]})\n\n"
+                response += f"**{hotel['HOTEL_NAME']}** ({hotel['CITY']}): ⭐{hotel['STAR_RATING']}\n[TripAdvisor Link]({hotel['TRIPADVISOR_LINK']})\n\n"
             
             st.markdown(response)
 
             for hotel in hotels:
-                if st.button(f"View details for {hotel[0]}", key=f"details-{hotel[4]}"):
-                    insights, emotions, phrases, snippets = fetch_detailed_info(hotel[4])
+                if st.button(f"View details for {hotel['HOTEL_NAME']}", key=f"details-{hotel['PRODUCT_ID']}"):
+                    insights, emotions, phrases, snippets = fetch_detailed_info(hotel['PRODUCT_ID'])
                     
                     # Show detailed info in chat
                     st.session_state.messages.append({
                         "role": "assistant",
-                        "content": f"Here are the details for **{hotel[0]}**:"
+                        "content": f"Here are the details for **{hotel['HOTEL_NAME']}**:"
                     })
                     
                     # Display details
                     st.markdown("### Product Summary")
-                    st.write(insights["PRODUCT_SUMMARY"])
+                    if insights:
+                        st.write(insights["PRODUCT_SUMMARY"])
 
-                    st.markdown("### Product Insights")
-                    st.json(insights)
+                        st.markdown("### Product Insights")
+                        st.json(insights)
+                    else:
+                        st.write("No insights available for this hotel.")
 
                     st.markdown("### Top Emotions")
-                    st.write(f"Emotion 1: {emotions['EMOTION1']}")
-                    st.write(f"Emotion 2: {emotions['EMOTION2']}")
-                    st.write(f"Emotion 3: {emotions['EMOTION3']}")
+                    if emotions:
+                        st.write(f"Emotion 1: {emotions['EMOTION1']}")
+                        st.write(f"Emotion 2: {emotions['EMOTION2']}")
+                        st.write(f"Emotion 3: {emotions['EMOTION3']}")
+                    else:
+                        st.write("No emotions recorded for this hotel.")
 
                     st.markdown("### Top Phrases")
-                    st.write(f"Positive Phrases: {phrases['POSITIVE_PHRASES']}")
-                    st.write(f"Negative Phrases: {phrases['NEGATIVE_PHRASES']}")
+                    if phrases:
+                        st.write(f"Positive Phrases: {phrases['POSITIVE_PHRASES']}")
+                        st.write(f"Negative Phrases: {phrases['NEGATIVE_PHRASES']}")
+                    else:
+                        st.write("No phrases recorded for this hotel.")
 
                     st.markdown("### Aspect Mentions by Language")
-                    for snippet in snippets:
-                        st.write(f"Language: {snippet['REVIEW_TEXT_HI']}")
-                        st.write(f"Sentiment: {snippet['SENTIMENT_TEXT_HI']}")
+                    with span("markdown", "language snippets", items=len(snippets)):
+                        for snippet in snippets:
+                            st.write(f"Language: {snippet['REVIEW_TEXT_HI']}")
+                            st.write(f"Sentiment: {snippet['SENTIMENT_TEXT_HI']}")
         else:
             st.markdown("No hotels found matching your criteria.")
+
+show_trace(trace)
@@ -1,159 +1,62 @@
 import streamlit as st
-from elasticsearch import Elasticsearch
-import requests
-#from bs4 import BeautifulSoup
+from es_client import es_index_name, get_secrets_async_search_runner
+from hotel_intent import parse_intent
+from hotel_es_query import HIT_FILTER_PATH, PAGE_SIZE, PIT_KEEP_ALIVE, build_hotel_search
+from tripadvisor_enrichment import get_tripadvisor_enricher
 import random
 
-import re
-
-
-# Elasticsearch connection using Streamlit secrets
-client = Elasticsearch(
-    st.secrets["elasticsearch"]["endpoint"],
-    api_key=st.secrets["elasticsearch"]["api_key"]
-)
 
 # Fetch index name from secrets
-index_name = st.secrets["elasticsearch"]["index_name"]
-
-# Synonyms for aspects and quality words
-feature_synonyms = {
-    "amenities": ["amenities", "amenity", "facilities", "facility", "features", "comforts", "offerings", "provisions", "services"],
-    "cleanliness": ["cleanliness", "clean", "hygiene", "sanitation", "tidiness", "neatness"],
-    "location": ["location", "proximity", "area", "neighborhood", "vicinity", "surroundings", "accessibility"],
-    "dining": ["dining", "restaurant", "meal options", "food services", "culinary offerings", "meals"],
-    "staff": ["staff", "personnel", "team", "employees", "workforce", "attendants", "service"],
-    "value_for_money": ["value for money", "affordability", "worth", "reasonable pricing", "budget friendliness"]
-}
-
-quality_seeds = {
-    "excellent": ["excellent", "great", "outstanding", "superb", "amazing", "delightful"],
-    "good": ["good", "nice", "decent", "satisfactory", "fine", "pleasant"],
-    "average": ["average", "okay", "acceptable", "mediocre", "fair"]
-}
-
-# Lemmatization
-def lemmatize_query(query):
-    """Simplistic lemmatization for now."""
-    return query.lower()
-
-# Synonym Matching
-def match_synonyms(query, synonyms_dict):
-    matched_aspects = set()
-    query_lower = query.lower()
-    for aspect, synonyms in synonyms_dict.items():
-        for synonym in synonyms:
-            if synonym in query_lower:
-                matched_aspects.add(aspect)
-                break
-    return matched_aspects
-
-# Map scores for aspects and overall
-def map_scores(aspect_scores=None, quality_word=None):
-    if quality_word:
-        if quality_word.lower() in quality_seeds["excellent"]:
-            return {"gte": 80}
-        elif quality_word.lower() in quality_seeds["good"]:
-            return {"gte": 79}
-        elif quality_word.lower() in quality_seeds["average"]:
-            return {"gte": 60}
-        else:
-            return None
-
-    if aspect_scores:
-        aspect_descriptors = {}
-        for aspect, score in aspect_scores.items():
-            if score >= 80:
-                aspect_descriptors[aspect] = "excellent"
-            elif score >= 70:
-                aspect_descriptors[aspect] = "good"
-            else:
-                aspect_descriptors[aspect] = "average"
-        return aspect_descriptors
-
-# Price and Star Rating Extraction
-def extract_price_star_rating_currency(query):
-    normalized_query = query.lower().replace("k", "000")
-    range_match = re.search(r"between\s+(\d+)\s+(and|-)\s+(\d+)", normalized_query)
-    if range_match:
-        min_price = int(range_match.group(1))
-        max_price = int(range_match.group(3))
-    else:
-        min_price = None
-        single_price_match = re.search(r"(under|below)\s+(\d+)", normalized_query)
-        max_price = int(single_price_match.group(2)) if single_price_match else None
-
-    currency_match = re.search(r"(\d+)\s*(usd|inr)", normalized_query)
-    currency = currency_match.group(2).lower() if currency_match else "inr"
-
-    star_rating_match = re.search(r"(\d+)[\s*-]star", normalized_query)
-    star_rating = int(star_rating_match.group(1)) if star_rating_match else None
-
-    return min_price, max_price, currency, star_rating
-
-# TripAdvisor Data Fetch
-def fetch_tripadvisor_data(url):
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        reviews = [review.text.strip() for review in soup.find_all('q', class_='IRsGHoPm')[:3]]
-        amenities = [amenity.text.strip() for amenity in soup.find_all('div', class_='bUmsU f ME H3 _c')]
-
-        return {
-            "reviews": reviews if reviews else "No reviews found.",
-            "amenities": amenities if amenities else "No amenities listed."
-        }
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Request failed: {str(e)}"}
-    except Exception as e:
-        return {"error": f"General error: {str(e)}"}
+index_name = es_index_name()
 
 # Elasticsearch Query Logic
-def retrieve_hotels(query):
-    query = lemmatize_query(query)
-    matched_aspects = match_synonyms(query, feature_synonyms)
-    query_words = query.split()
-    quality_words = [word for word in query_words if map_scores(quality_word=word)]
-
-    aspect_conditions = []
-    processed_aspects = set()
-    for aspect in matched_aspects:
-        for word in quality_words:
-            quality_range = map_scores(quality_word=word)
-            if quality_range and aspect not in processed_aspects:
-                aspect_conditions.append({"range": {f"{aspect}_score": quality_range}})
-                processed_aspects.add(aspect)
-                break
-
-    min_price, max_price, currency, star_rating = extract_price_star_rating_currency(query)
-    price_field = "price_usd" if currency == "usd" else "price_inr"
-
-    must_clauses = [{"range": {price_field: {"gte": min_price, "lte": max_price}}} if max_price else {}]
-    if star_rating:
-        must_clauses.append({"term": {"star_rating": star_rating}})
-
-    for condition in aspect_conditions:
-        must_clauses.append(condition)
-
+def retrieve_hotels(query, search_after=None, pit_id=None):
+    # Parsing is compiled once and memoized per normalized query
+    intent = parse_intent(query)
     try:
-        response = client.search(
-            index=index_name,
-            body={
-                "query": {
-                    "bool": {
-                        "must": must_clauses
-                    }
-                },
-                "size": 5
-            }
+        runner = get_secrets_async_search_runner()
+        if pit_id is None:
+            # First page: opens the point in time later pages continue in, and counts the matches alongside
+            return runner.search_page(
+                index_name, build_hotel_search(intent, PAGE_SIZE),
+                filter_path=HIT_FILTER_PATH, count=True, keep_alive=PIT_KEEP_ALIVE
+            )
+        return runner.search_page(
+            None, build_hotel_search(intent, PAGE_SIZE, search_after, pit_id), filter_path=HIT_FILTER_PATH
         )
-        return response['hits']['hits']
     except Exception as e:
         return {"error": str(e)}
 
+# Close the point in time of a search that needs no more pages
+def end_search(search):
+    if search.get("pit_id"):
+        get_secrets_async_search_runner().close_point_in_time(search["pit_id"])
+        search["pit_id"] = None
+
+# Append the next page of the current search (used as the "Show more" callback)
+def load_next_page(search):
+    first_page = not search["hits"]
+    search_after = None if first_page else search["hits"][-1]["sort"]
+    results = retrieve_hotels(search["query"], search_after, None if first_page else search["pit_id"])
+    if isinstance(results, tuple):
+        response, total = results
+        # filter_path drops the hits key entirely when nothing matched
+        results = response.get("hits", {}).get("hits", [])
+        if first_page:
+            search["total"] = total
+        # Elasticsearch may hand back a new PIT id with each page; the latest one must be used
+        search["pit_id"] = response.get("pit_id", search["pit_id"])
+        search["hits"].extend(results)
+        search["exhausted"] = len(results) < PAGE_SIZE or len(search["hits"]) >= search["total"]
+        if search["exhausted"]:
+            end_search(search)
+        # TripAdvisor pages of the new hits only, fetched concurrently once and kept with the search
+        search["tripadvisor"].update(get_tripadvisor_enricher().enrich(
+            [hit["_source"].get("tripadvisor_link") for hit in results]
+        ))
+    else:
+        search["error"] = results.get("error", "Error occurred during the search.")
+
 # Streamlit UI
 st.set_page_config(page_title="Enhanced Hotel Search", layout="wide", page_icon="🏨")
 st.header("🏨 Enhanced Hotel Search with Aspect-Based Filtering")
@@ -178,10 +81,22 @@ random_topic = random.choice(topics)
 #st.image(banner_image_url, use_container_width=True)
 
 if query:
-    results = retrieve_hotels(query)
-    
-    if isinstance(results, list):
-        for hit in results:
+    # Keep the pages already shown for this query so "Show more" only fetches the next one
+    search = st.session_state.get("hotel_search")
+    if search is None or search["query"] != query:
+        if search is not None:
+            end_search(search)
+        search = {"query": query, "hits": [], "total": 0, "pit_id": None, "tripadvisor": {}, "error": None, "exhausted": False}
+        st.session_state["hotel_search"] = search
+        load_next_page(search)
+
+    if search["error"]:
+        st.error(search["error"])
+    else:
+        tripadvisor_data = search["tripadvisor"]
+        st.caption(f"Showing {len(search['hits'])} of {search['total']} matching hotels")
+
+        for hit in search["hits"]:
             source = hit["_source"]
             st.subheader(source.get("hotel_name", "Unknown Hotel"))
             st.write(f"**City:** {source.get('city', 'N/A')} | **Price:** {source.get('price_inr', 'N/A')} INR / {source.get('price_usd', 'N/A')} USD")
@@ -217,10 +132,14 @@ if query:
 
 
             st.write(f"TripAdvisor link. View more here: {source.get('tripadvisor_link', 'No tripadvisor link available')}")
+            details = tripadvisor_data.get(source.get("tripadvisor_link"))
+            if details and "error" not in details:
+                with st.expander("TripAdvisor highlights"):
+                    st.write("**Reviews:**", details["reviews"])
+                    st.write("**Amenities:**", details["amenities"])
 
 
             st.write("---")
-    else:
-        st.error(results.get("error", "Error occurred during the search."))
 
-        st.error(results.get("error", "Error occurred during the search."))
+        if not search["exhausted"]:
+            st.button("Show more", on_click=load_next_page, args=(search,))
@@ -1,35 +1,38 @@
 import streamlit as st
 import pandas as pd
-import snowflake.connector
 import streamlit_wordcloud as wordcloud
 import streamlit.components.v1 as components
-
-# Snowflake Connection
-@st.cache_resource
-def create_snowflake_connection():
-    return snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database=st.secrets["snowflake"]["database"],
-        schema=st.secrets["snowflake"]["schema"]
-    )
-
-conn = create_snowflake_connection()
+from snowflake_pool import get_secrets_pool
+from query_cache import get_query_cache
+from arrow_fetch import fetch_dataframe
+from perf_trace import show_trace, span, start_trace, traced_query
+from video_keyword_index import get_video_keyword_index
+from video_keyword_store import get_video_keyword_store
+from video_keyword_taxonomy import expanded_reasons
+
+# Run a query on a pooled connection so concurrent sessions don't queue on one shared connection
+def fetch_table_data(query, params=None):
+    with get_secrets_pool().connection() as conn:
+        return fetch_dataframe(conn, query, params)
+
+# Serve repeated queries from the shared result cache
+def load_table_data(query, params=None):
+    with traced_query(query, params):
+        return get_query_cache().get_or_load(query, params, fetch_table_data)
 
 # Fetch video metadata from Snowflake
 def fetch_video_metadata():
     query = "SELECT VIDEO_ID, TITLE, DESCRIPTION, VIDEO_URL FROM VIDEO.PUBLIC.VIDEO_METADATA"
-    return pd.read_sql(query, conn)
+    return load_table_data(query)
 
 # Fetch video snippet data for analysis
 def fetch_video_snippets(video_id):
-    query = f"""
+    query = """
     SELECT TRANSCRIPTION_TEXT, START_TIME, END_TIME 
     FROM VIDEO.PUBLIC.VIDEO_SNIPPET 
-    WHERE VIDEO_ID = '{video_id}'"""
-    return pd.read_sql(query, conn)
+    WHERE VIDEO_ID = %s
+    ORDER BY START_TIME"""
+    return load_table_data(query, (video_id,))
 
 # Render YouTube Videos
 def render_video(video_url):
@@ -38,11 +41,11 @@ def render_video(video_url):
     else:
         st.error("Invalid YouTube URL")
 
-# Create a word cloud from filtered keywords
-def generate_wordcloud(filtered_keywords):
-    if filtered_keywords:
+# Create a word cloud from keyword frequencies
+def generate_wordcloud(keyword_counts):
+    if keyword_counts:
         wordcloud_streamlit = wordcloud.visualize(
-            data=dict(pd.Series(filtered_keywords).value_counts()),
+            data=dict(keyword_counts),
             max_words=100,
             height=400,
             width=800,
@@ -52,15 +55,6 @@ def generate_wordcloud(filtered_keywords):
     else:
         st.warning("No relevant keywords to display in the word cloud.")
 
-# Filter keywords based on predefined categories
-def filter_keywords(text, categories):
-    keywords = []
-    for category, terms in categories.items():
-        for term in terms:
-            if term in text.lower():
-                keywords.append(term)
-    return keywords
-
 # Application Layout
 st.set_page_config(
     page_title="YouTube Video Analysis Tool",
@@ -69,27 +63,9 @@ st.set_page_config(
 )
 
 st.title("📊 YouTube Video Analysis Tool")
+trace = start_trace("streamlit_secrets_video_anal_poc_2025.py")  # Opt-in timings: INSIGHTS_TRACE=1 or ?trace=1
 st.markdown("Analyze YouTube videos for keywords, generate word clouds, and navigate directly to snippets.")
 
-# Expanded keyword categories for smartphones
-expanded_reasons = {
-    "Affordability": ["expensive", "cheaper", "cost", "budget", "price", "affordable", "overpriced", "too costly", "cost-effective", "discount", "monthly payments", "subscription", "financing", "trade-in", "cashback", "offers", "price hike", "deal", "promo"],
-    "Camera": ["camera", "photo quality", "image processing", "hdr", "night mode", "zoom", "megapixels", "pro mode", "portrait mode", "low light", "optical stabilization", "ultra-wide", "telephoto", "macro mode", "camera software", "AI camera", "autofocus", "video quality"],
-    "Display": ["screen", "display", "oled", "lcd", "refresh rate", "resolution", "amoled", "super retina", "touch response", "screen size", "hdr display", "pwm flicker", "color accuracy", "adaptive refresh rate", "always-on display", "sunlight visibility", "screen burn-in"],
-    "Battery": ["battery", "battery life", "fast charging", "wireless charging", "battery drain", "power saving", "battery health", "charger", "mah", "charging speed", "heat during charging", "battery optimization", "longer battery life", "standby time", "powerbank"],
-    "Performance": ["speed", "performance", "processor", "chip", "lag", "slow", "overheating", "thermal", "benchmark", "multitasking", "frame drop", "gaming performance", "gpu", "cpu", "snapdragon", "apple silicon", "ram management", "ios optimization"],
-    "Design or Experience": ["design", "build quality", "aesthetic", "feel", "user experience", "material", "weight", "size", "ergonomic", "form factor", "glass back", "aluminum frame", "premium feel", "haptic feedback", "curved screen", "notch", "punch-hole", "bezels"],
-    "Apps": ["apps", "play store", "app store", "compatibility", "app crashing", "third-party apps", "bloatware", "app restrictions", "apk", "exclusive apps", "google apps", "apple apps", "side-loading", "app support", "app permissions", "play store policies"],
-    "Features": ["features", "customization", "gesture controls", "widgets", "face id", "fingerprint sensor", "ai enhancements", "new update", "software improvements", "reverse charging", "split screen", "s pen", "foldable display", "stylus support", "dex mode"],
-    "Messaging & Communication": ["whatsapp", "facetime", "imessage", "sms", "video call", "messaging", "google messages", "green bubble", "blue bubble", "end-to-end encryption", "group chats", "telegram", "discord", "mms", "rsc messaging", "signal", "snapchat"],
-    "Ecosystem & Integration": ["google services", "apple ecosystem", "icloud", "android sync", "airdrop", "samsung wallet", "google wallet", "continuity", "handoff", "apple watch", "google assistant", "siri", "carplay", "android auto", "multi-device sync"],
-    "Software Updates & Longevity": ["updates", "software support", "os updates", "security patch", "android versions", "planned obsolescence", "long term updates", "kernel update", "beta software", "stable updates", "one ui updates", "ios updates", "security vulnerabilities"],
-    "Privacy & Security": ["privacy", "security", "encryption", "open source", "data collection", "permissions", "apple security", "google tracking", "two-factor authentication", "lock screen", "app tracking transparency", "vpn support", "ad tracking", "face unlock", "fingerprint unlock", "passcode protection"],
-    "Regional & Cultural Differences": ["us", "europe", "regional", "country", "market", "brand perception", "availability", "pricing differences", "network bands", "import fees", "regional pricing", "limited edition", "model exclusivity", "carrier support", "5g bands", "wifi calling"],
-    "iOS to Android": ["switching to android", "moved to android", "left iphone", "quit iphone", "got an android", "ditched iphone", "tired of iphone", "switched from iphone", "android better than ios", "apple too expensive", "needed customization", "more device choices", "wanted a bigger battery", "hated apple ecosystem", "left because of restrictions", "app sideloading", "better gaming experience"],
-    "Android to iOS": ["switching to iphone", "moved to iphone", "left android", "quit android", "got an iphone", "ditched android", "tired of android", "switched from android", "ios better than android", "wanted better security", "better camera experience", "ios updates are better", "smoother UI", "better resale value", "apple ecosystem", "wanted iMessage and FaceTime", "better privacy features"]
-}
-
 # Sidebar for video selection
 st.sidebar.header("🎥 Select a Video")
 video_metadata = fetch_video_metadata()
@@ -106,35 +82,58 @@ if selected_video:
     # Keyword Analysis Section
     st.markdown("---")
     st.header("🔑 Keyword Analysis")
-    snippets_df = fetch_video_snippets(video_details['VIDEO_ID'])
+    # Prefer the batch-precomputed index; otherwise build it from the snippets once per video
+    keyword_store = get_video_keyword_store()
+    keyword_index = keyword_store.get(video_details['VIDEO_ID'], expanded_reasons) if keyword_store else None
+    if keyword_index is None:
+        snippets_df = fetch_video_snippets(video_details['VIDEO_ID'])
+        if not snippets_df.empty:
+            keyword_index = get_video_keyword_index(video_details['VIDEO_ID'], expanded_reasons, snippets_df)
 
-    if not snippets_df.empty:
-        combined_text = " ".join(snippets_df['TRANSCRIPTION_TEXT'])
-        filtered_keywords = filter_keywords(combined_text, expanded_reasons)
+    if keyword_index is not None:
+        keyword_matches = keyword_index.matches
 
         st.subheader("Word Cloud")
         st.markdown("Visualize the most frequently occurring keywords in the video transcription.")
-        generate_wordcloud(filtered_keywords)
+        with span("chart", "word cloud", items=len(keyword_matches.counts)):
+            generate_wordcloud(keyword_matches.counts)
+
+        st.subheader("Category Mentions")
+        if keyword_matches.categories:
+            st.bar_chart(pd.Series(keyword_matches.categories, name="Mentions").sort_values(ascending=False))
 
         st.subheader("Snippet Keywords")
         st.markdown("Click on a keyword to view and play the corresponding video snippet.")
 
         # Display clickable keywords in a grid
-        unique_words = set(filtered_keywords)
+        unique_words = keyword_index.keywords
         col1, col2, col3 = st.columns(3)
         cols = [col1, col2, col3]
 
-        for idx, word in enumerate(unique_words):
-            col = cols[idx % 3]
-            if col.button(word):
-                snippet_rows = snippets_df[snippets_df['TRANSCRIPTION_TEXT'].str.contains(word, na=False)]
-                if not snippet_rows.empty:
-                    snippet = snippet_rows.iloc[0]
-                    st.write(f"Playing snippet containing '{word}':")
-                    st.write(f"**Start Time**: {snippet['START_TIME']} seconds, **End Time**: {snippet['END_TIME']} seconds")
-                    snippet_video_url = f"{video_details['VIDEO_URL']}?start={int(snippet['START_TIME'])}&end={int(snippet['END_TIME'])}"
-                    render_video(snippet_video_url)
-                else:
-                    st.warning(f"No snippet found containing the keyword '{word}'.")
+        with span("markdown", "keyword grid", items=len(unique_words)):
+            for idx, word in enumerate(unique_words):
+                col = cols[idx % 3]
+                if col.button(word):
+                    st.session_state["selected_keyword"] = (video_details['VIDEO_ID'], word)
+
+        # Remember the clicked keyword so picking another occurrence doesn't lose it
+        selected = st.session_state.get("selected_keyword")
+        if selected and selected[0] == video_details['VIDEO_ID']:
+            word = selected[1]
+            occurrences = keyword_index.intervals(word)
+            if occurrences:
+                st.write(f"Playing snippet containing '{word}' ({len(occurrences)} occurrence(s)):")
+                start_time, end_time = st.selectbox(
+                    "Occurrence",
+                    occurrences,
+                    format_func=lambda interval: f"{interval[0]:g}s - {interval[1]:g}s",
+                )
+                st.write(f"**Start Time**: {start_time} seconds, **End Time**: {end_time} seconds")
+                snippet_video_url = f"{video_details['VIDEO_URL']}?start={int(start_time)}&end={int(end_time)}"
+                render_video(snippet_video_url)
+            else:
+                st.warning(f"No snippet found containing the keyword '{word}'.")
     else:
         st.warning("No snippets available for this video.")
+
+show_trace(trace)
@@ -0,0 +1,53 @@
+import pyarrow as pa
+
+# Columns that only ever hold ids, enum values or reference names, so they never need cleaning
+KNOWN_CLEAN_COLUMNS = frozenset({
+    "PRODUCT_ID",
+    "HOTEL_NAME",
+    "CITY",
+    "ASPECT",
+    "ASPECT_NAME",
+    "SENTIMENT_TYPE",
+    "TOP_EMOTION_1",
+    "TOP_EMOTION_2",
+    "TOP_EMOTION_3",
+})
+
+
+def _is_text(data_type):
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+def _strip_invalid_utf8(column):
+    # Slow path, only taken for a column that actually failed validation
+    values = column.cast(pa.binary() if pa.types.is_string(column.type) else pa.large_binary()).to_pylist()
+    return pa.array(
+        [value.decode("utf-8", "ignore") if value is not None else None for value in values],
+        type=column.type,
+    )
+
+
+def sanitize_arrow_table(table, skip_columns=KNOWN_CLEAN_COLUMNS):
+    """
+    Drop invalid UTF-8 from every text column of an Arrow table.
+
+    Each column is validated as a whole in Arrow's C++ code; only a column that
+    contains invalid bytes is rewritten. Nulls stay null instead of becoming "None".
+
+    Parameters:
+        table (pyarrow.Table): Result set, e.g. from cursor.fetch_arrow_all().
+        skip_columns (iterable): Column names known to be clean, which are not checked.
+
+    Returns:
+        pyarrow.Table: The table with the same schema and only valid UTF-8 text.
+    """
+    skip_columns = frozenset(skip_columns)
+    for index, field in enumerate(table.schema):
+        if field.name in skip_columns or not _is_text(field.type):
+            continue
+        column = table.column(index)
+        try:
+            column.validate(full=True)
+        except pa.ArrowInvalid:
+            table = table.set_column(index, field, _strip_invalid_utf8(column))
+    return table
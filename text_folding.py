@@ -0,0 +1,16 @@
+def casefold_with_offsets(text):
+    """
+    Lowercase text and map each lowered position back to its position in text.
+
+    Returns:
+        tuple: (folded text, list of original offsets or None when lengths are unchanged).
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded, None
+    # A few characters (e.g. 'İ') lower to more than one code point
+    offsets = []
+    for index, ch in enumerate(text):
+        offsets.extend([index] * len(ch.lower()))
+    offsets.append(len(text))
+    return "".join(ch.lower() for ch in text), offsets
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CACHE_DIR_ENV = "TRIPADVISOR_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join(".cache", "tripadvisor")
+DEFAULT_CACHE_MAX_BYTES = 100 * 1024 * 1024
+# Pages younger than this are served from disk without asking the site
+DEFAULT_FRESH_SECONDS = 24 * 3600
+# A failed page is not asked for again until this much later
+DEFAULT_FAILURE_SECONDS = 300
+
+# Per-host token bucket: a page of results can burst, sustained load is throttled
+HOST_RATE_PER_SECOND = 2.0
+HOST_BURST = 5
+
+DEFAULT_MAX_WORKERS = 8
+REQUEST_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Where the page keeps the snippets we show
+REVIEW_TAG, REVIEW_CLASS = "q", "IRsGHoPm"
+AMENITY_TAG, AMENITY_CLASS = "div", "bUmsU f ME H3 _c"
+MAX_REVIEWS = 3
+
+
+class _HotelPageParser(HTMLParser):
+    # Collects the text of review quotes and amenity blocks
+    def __init__(self):
+        super().__init__()
+        self.reviews = []
+        self.amenities = []
+        self._target = None
+        self._depth = 0
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._target is not None:
+            if tag == self._target[0]:
+                self._depth += 1
+            return
+        classes = dict(attrs).get("class") or ""
+        if tag == REVIEW_TAG and REVIEW_CLASS in classes.split():
+            self._target = (tag, self.reviews)
+        elif tag == AMENITY_TAG and classes == AMENITY_CLASS:
+            self._target = (tag, self.amenities)
+        else:
+            return
+        self._depth = 1
+        self._text = []
+
+    def handle_endtag(self, tag):
+        if self._target is None or tag != self._target[0]:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self._target[1].append("".join(self._text).strip())
+            self._target = None
+
+    def handle_data(self, data):
+        if self._target is not None:
+            self._text.append(data)
+
+
+def parse_hotel_page(html):
+    parser = _HotelPageParser()
+    parser.feed(html)
+    parser.close()
+    return {
+        "reviews": parser.reviews[:MAX_REVIEWS] or "No reviews found.",
+        "amenities": parser.amenities or "No amenities listed.",
+    }
+
+
+class HostRateLimiter:
+    """Token bucket per host; acquire() blocks until the host has a token."""
+
+    def __init__(self, rate=HOST_RATE_PER_SECOND, burst=HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}  # host -> (tokens, updated_at)
+
+    def acquire(self, host):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated_at = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class DiskCache:
+    """
+    Size-bounded on-disk HTTP cache: one body file and one metadata file per URL.
+
+    Metadata keeps the validators (ETag, Last-Modified) for conditional revalidation.
+    When the total body size exceeds max_bytes, the least recently used entries are removed.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".json", base + ".body"
+
+    def get(self, url):
+        """(metadata, body) for url, or None."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            with open(body_path, "rb") as body_file:
+                body = body_file.read()
+            os.utime(meta_path)  # Recency for eviction
+        except (OSError, ValueError):
+            # Missing, half-written, or evicted since we read it
+            return None
+        return meta, body
+
+    def put(self, url, body, etag=None, last_modified=None):
+        meta_path, body_path = self._paths(url)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "fetched_at": time.time(), "size": len(body)}
+        with self._lock:
+            # Write to temp names and rename, so a reader never sees half a file
+            with open(body_path + ".tmp", "wb") as body_file:
+                body_file.write(body)
+            os.replace(body_path + ".tmp", body_path)
+            with open(meta_path + ".tmp", "w") as meta_file:
+                json.dump(meta, meta_file)
+            os.replace(meta_path + ".tmp", meta_path)
+            self._evict()
+
+    def touch(self, url):
+        """Mark a revalidated (304) entry as freshly fetched."""
+        meta_path, _ = self._paths(url)
+        with self._lock:
+            try:
+                with open(meta_path) as meta_file:
+                    meta = json.load(meta_file)
+                meta["fetched_at"] = time.time()
+                with open(meta_path + ".tmp", "w") as meta_file:
+                    json.dump(meta, meta_file)
+                os.replace(meta_path + ".tmp", meta_path)
+            except (OSError, ValueError):
+                pass
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.directory, name)
+            try:
+                size = os.path.getsize(meta_path[:-len(".json")] + ".body")
+                entries.append((os.path.getmtime(meta_path), meta_path, size))
+            except OSError:
+                continue
+            total += size
+        for _, meta_path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (meta_path, meta_path[:-len(".json")] + ".body"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+
+class TripAdvisorEnricher:
+    """
+    Fetches hotel pages concurrently through one pooled HTTP session, throttled per host
+    and backed by a disk cache that revalidates stale pages with ETag/Last-Modified.
+    Failures are remembered in memory for failure_seconds, so a dead or blocked page
+    is not requested again by every session in the meantime.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_workers=DEFAULT_MAX_WORKERS,
+                 fresh_seconds=DEFAULT_FRESH_SECONDS, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES,
+                 rate_limiter=None, failure_seconds=DEFAULT_FAILURE_SECONDS):
+        self.fresh_seconds = fresh_seconds
+        self.failure_seconds = failure_seconds
+        self._failures = {}  # url -> (failed_at, {"error": ...})
+        self._failures_lock = threading.Lock()
+        self.cache = DiskCache(cache_dir, cache_max_bytes)
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504)),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tripadvisor")
+
+    def fetch_page(self, url):
+        """Page body for url: from disk while fresh, revalidated when stale, fetched otherwise."""
+        cached = self.cache.get(url)
+        if cached is not None:
+            meta, body = cached
+            if time.time() - meta["fetched_at"] < self.fresh_seconds:
+                return body
+
+        headers = {}
+        if cached is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        self.rate_limiter.acquire(urlsplit(url).netloc)
+        response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            return body
+        response.raise_for_status()
+        self.cache.put(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.content
+
+    def fetch(self, url):
+        """Reviews and amenities of one hotel page, or {"error": ...}."""
+        with self._failures_lock:
+            failure = self._failures.get(url)
+            if failure is not None:
+                if time.monotonic() - failure[0] < self.failure_seconds:
+                    return failure[1]
+                del self._failures[url]
+        try:
+            return parse_hotel_page(self.fetch_page(url).decode("utf-8", "replace"))
+        except requests.exceptions.RequestException as e:
+            error = {"error": f"Request failed: {str(e)}"}
+        except Exception as e:
+            error = {"error": f"General error: {str(e)}"}
+        with self._failures_lock:
+            self._failures[url] = (time.monotonic(), error)
+        return error
+
+    def enrich(self, urls):
+        """
+        Fetch several hotel pages at once.
+
+        Returns:
+            dict: url -> parsed data or {"error": ...}, for each distinct non-empty url.
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))
+        return dict(zip(urls, self._executor.map(self.fetch, urls)))
+
+
+@st.cache_resource
+def get_tripadvisor_enricher():
+    return TripAdvisorEnricher(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR))
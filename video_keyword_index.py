@@ -0,0 +1,103 @@
+from bisect import bisect_right
+from collections import Counter
+
+import streamlit as st
+
+from keyword_matcher import KeywordMatches, get_keyword_matcher
+from query_cache import DEFAULT_TTL_SECONDS
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) time ranges."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+class VideoKeywordIndex:
+    """
+    Keyword statistics of one video plus an inverted index from each keyword to
+    the snippets it occurs in and their merged START_TIME/END_TIME ranges.
+    """
+
+    def __init__(self, matches, rows, intervals):
+        self.matches = matches
+        self._rows = rows
+        self._intervals = intervals
+
+    @classmethod
+    def build(cls, matcher, snippets, text_col="TRANSCRIPTION_TEXT"):
+        """
+        Index a video's snippets in one pass over their joined transcript.
+
+        Parameters:
+            matcher (KeywordMatcher): The compiled taxonomy.
+            snippets (DataFrame): The video's snippets in time order, with text_col,
+                START_TIME and END_TIME.
+        """
+        texts = [text if isinstance(text, str) else "" for text in snippets[text_col]]
+        start_times = [float(value) for value in snippets["START_TIME"]]
+        end_times = [float(value) for value in snippets["END_TIME"]]
+
+        # Offset of each snippet in the joined transcript, to map a match back to its snippets
+        snippet_starts = []
+        position = 0
+        for text in texts:
+            snippet_starts.append(position)
+            position += len(text) + 1
+        matches = matcher.analyze(" ".join(texts))
+
+        rows = {}
+        intervals = {}
+        for term, offsets in matches.offsets.items():
+            term_rows = set()
+            ranges = []
+            for start in offsets:
+                # A phrase can run on into the next snippet; its range then covers both
+                first = bisect_right(snippet_starts, start) - 1
+                last = bisect_right(snippet_starts, start + len(term) - 1) - 1
+                term_rows.update(range(first, last + 1))
+                ranges.append((start_times[first], end_times[last]))
+            rows[term] = sorted(term_rows)
+            intervals[term] = merge_intervals(ranges)
+        return cls(matches, rows, intervals)
+
+    @property
+    def keywords(self):
+        """Keywords found, most frequent first."""
+        return [term for term, _ in self.matches.counts.most_common()]
+
+    def rows(self, term):
+        """Positions of the snippets containing term."""
+        return self._rows.get(term, [])
+
+    def intervals(self, term):
+        """Merged (start, end) times in seconds of every occurrence of term."""
+        return self._intervals.get(term, [])
+
+    def to_dict(self):
+        """Plain JSON-serializable form, as written by the batch pipeline."""
+        return {
+            "counts": dict(self.matches.counts),
+            "categories": dict(self.matches.categories),
+            "offsets": self.matches.offsets,
+            "rows": self._rows,
+            "intervals": {term: [list(interval) for interval in ranges] for term, ranges in self._intervals.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        matches = KeywordMatches(Counter(data["counts"]), data["offsets"], Counter(data["categories"]))
+        intervals = {term: [tuple(interval) for interval in ranges] for term, ranges in data["intervals"].items()}
+        return cls(matches, data["rows"], intervals)
+
+
+@st.cache_resource(ttl=DEFAULT_TTL_SECONDS, max_entries=64)
+def get_video_keyword_index(video_id, categories, _snippets):
+    """Build a video's keyword index when it is first selected and reuse it on every later rerun."""
+    return VideoKeywordIndex.build(get_keyword_matcher(categories), _snippets)
@@ -0,0 +1,183 @@
+"""
+Precomputed keyword indexes for every video in VIDEO.PUBLIC.VIDEO_METADATA.
+
+    python video_keyword_store.py --out video_keywords.sqlite --workers 4
+
+fetches each video's snippets, builds its VideoKeywordIndex in a process pool and
+writes them all to one SQLite file. Setting the VIDEO_KEYWORD_STORE environment
+variable to that file makes the video tool open a video with a single keyed read
+instead of fetching and scanning its transcript.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import streamlit as st
+
+from keyword_matcher import KeywordMatcher
+from video_keyword_index import VideoKeywordIndex
+
+STORE_PATH_ENV = "VIDEO_KEYWORD_STORE"
+DEFAULT_STORE_PATH = "video_keywords.sqlite"
+# Decoded indexes kept in memory, so reruns on an open video don't inflate its blob again
+DEFAULT_MAX_DECODED = 64
+
+VIDEO_IDS_QUERY = "SELECT VIDEO_ID FROM VIDEO.PUBLIC.VIDEO_METADATA"
+SNIPPETS_QUERY = """
+    SELECT TRANSCRIPTION_TEXT, START_TIME, END_TIME
+    FROM VIDEO.PUBLIC.VIDEO_SNIPPET
+    WHERE VIDEO_ID = %s
+    ORDER BY START_TIME"""
+
+
+def taxonomy_fingerprint(categories, whole_words=True):
+    # Indexes built from a different taxonomy are ignored rather than served
+    payload = json.dumps([categories, whole_words], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VideoKeywordStore:
+    """Read-only access to a store written by write_store, with an LRU of decoded indexes."""
+
+    def __init__(self, path, max_decoded=DEFAULT_MAX_DECODED):
+        self.max_decoded = max_decoded
+        self._lock = threading.Lock()
+        self._decoded = OrderedDict()  # (video_id, taxonomy fingerprint) -> VideoKeywordIndex
+        # as_uri() percent-encodes the path, so ?, # and % in it can't be read as URI syntax
+        uri = Path(path).absolute().as_uri() + "?mode=ro"
+        self._db = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self.meta = dict(self._db.execute("SELECT KEY, VALUE FROM META").fetchall())
+
+    def get(self, video_id, categories):
+        """The video's precomputed index, or None if it is missing or built from another taxonomy."""
+        fingerprint = taxonomy_fingerprint(categories)
+        if self.meta.get("taxonomy") != fingerprint:
+            return None
+        key = (str(video_id), fingerprint)
+        with self._lock:
+            index = self._decoded.get(key)
+            if index is not None:
+                self._decoded.move_to_end(key)
+                return index
+            row = self._db.execute("SELECT DATA FROM VIDEO_KEYWORDS WHERE VIDEO_ID = ?", (key[0],)).fetchone()
+        if row is None:
+            return None
+        index = VideoKeywordIndex.from_dict(json.loads(zlib.decompress(row[0])))
+        with self._lock:
+            self._decoded[key] = index
+            while len(self._decoded) > self.max_decoded:
+                self._decoded.popitem(last=False)
+        return index
+
+
+def store_path():
+    return os.environ.get(STORE_PATH_ENV)
+
+
+@st.cache_resource
+def get_video_keyword_store():
+    """The process-wide keyword store, or None when no store is configured."""
+    path = store_path()
+    if not path:
+        return None
+    return VideoKeywordStore(path)
+
+
+# Each worker process compiles the taxonomy once and reuses it for every video it indexes
+_worker_matcher = None
+
+
+def _init_worker(categories):
+    global _worker_matcher
+    _worker_matcher = KeywordMatcher(categories)
+
+
+def _index_video(video_id, snippets):
+    index = VideoKeywordIndex.build(_worker_matcher, snippets)
+    data = zlib.compress(json.dumps(index.to_dict(), separators=(",", ":")).encode("utf-8"))
+    return str(video_id), len(snippets), data
+
+
+def write_store(conn, path, categories, workers=None):
+    """
+    Index every video's transcript and write the results to a SQLite file at path.
+
+    Snippets are fetched in this process while earlier videos are indexed in the
+    pool; at most two videos per worker are in flight at a time.
+    """
+    from arrow_fetch import fetch_dataframe
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    db = sqlite3.connect(tmp_path)
+    db.execute("CREATE TABLE META (KEY TEXT PRIMARY KEY, VALUE TEXT)")
+    db.execute("CREATE TABLE VIDEO_KEYWORDS (VIDEO_ID TEXT PRIMARY KEY, SNIPPETS INTEGER, DATA BLOB)")
+
+    video_ids = fetch_dataframe(conn, VIDEO_IDS_QUERY)["VIDEO_ID"].tolist()
+    written = 0
+
+    def save(done):
+        nonlocal written
+        for future in done:
+            video_id, snippet_count, data = future.result()
+            db.execute("INSERT OR REPLACE INTO VIDEO_KEYWORDS VALUES (?, ?, ?)", (video_id, snippet_count, data))
+            written += 1
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(categories,)) as pool:
+        max_pending = 2 * workers
+        pending = set()
+        for video_id in video_ids:
+            snippets = fetch_dataframe(conn, SNIPPETS_QUERY, (video_id,))
+            if snippets.empty:
+                continue  # The app reports videos without snippets from live data
+            pending.add(pool.submit(_index_video, video_id, snippets))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                save(done)
+        save(pending)
+
+    meta = {
+        "taxonomy": taxonomy_fingerprint(categories),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "videos": str(written),
+    }
+    db.executemany("INSERT INTO META VALUES (?, ?)", meta.items())
+    db.commit()
+    db.close()
+    # Swap the finished file in so the app never opens a half-written store
+    os.replace(tmp_path, path)
+    print(f"Indexed {written} of {len(video_ids)} videos in {time.perf_counter() - started:.1f}s")
+    return written
+
+
+def main():
+    import snowflake.connector
+    from snowflake_pool import secrets_connect_params
+    from video_keyword_taxonomy import expanded_reasons
+
+    parser = argparse.ArgumentParser(description="Precompute keyword indexes for every video.")
+    parser.add_argument("--out", default=DEFAULT_STORE_PATH, help="SQLite file to write (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    conn = snowflake.connector.connect(**secrets_connect_params())
+    try:
+        write_store(conn, args.out, expanded_reasons, args.workers)
+    finally:
+        conn.close()
+    print(f"Run the video tool with {STORE_PATH_ENV}={args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# Expanded keyword categories for smartphones
+expanded_reasons = {
+    "Affordability": ["expensive", "cheaper", "cost", "budget", "price", "affordable", "overpriced", "too costly", "cost-effective", "discount", "monthly payments", "subscription", "financing", "trade-in", "cashback", "offers", "price hike", "deal", "promo"],
+    "Camera": ["camera", "photo quality", "image processing", "hdr", "night mode", "zoom", "megapixels", "pro mode", "portrait mode", "low light", "optical stabilization", "ultra-wide", "telephoto", "macro mode", "camera software", "AI camera", "autofocus", "video quality"],
+    "Display": ["screen", "display", "oled", "lcd", "refresh rate", "resolution", "amoled", "super retina", "touch response", "screen size", "hdr display", "pwm flicker", "color accuracy", "adaptive refresh rate", "always-on display", "sunlight visibility", "screen burn-in"],
+    "Battery": ["battery", "battery life", "fast charging", "wireless charging", "battery drain", "power saving", "battery health", "charger", "mah", "charging speed", "heat during charging", "battery optimization", "longer battery life", "standby time", "powerbank"],
+    "Performance": ["speed", "performance", "processor", "chip", "lag", "slow", "overheating", "thermal", "benchmark", "multitasking", "frame drop", "gaming performance", "gpu", "cpu", "snapdragon", "apple silicon", "ram management", "ios optimization"],
+    "Design or Experience": ["design", "build quality", "aesthetic", "feel", "user experience", "material", "weight", "size", "ergonomic", "form factor", "glass back", "aluminum frame", "premium feel", "haptic feedback", "curved screen", "notch", "punch-hole", "bezels"],
+    "Apps": ["apps", "play store", "app store", "compatibility", "app crashing", "third-party apps", "bloatware", "app restrictions", "apk", "exclusive apps", "google apps", "apple apps", "side-loading", "app support", "app permissions", "play store policies"],
+    "Features": ["features", "customization", "gesture controls", "widgets", "face id", "fingerprint sensor", "ai enhancements", "new update", "software improvements", "reverse charging", "split screen", "s pen", "foldable display", "stylus support", "dex mode"],
+    "Messaging & Communication": ["whatsapp", "facetime", "imessage", "sms", "video call", "messaging", "google messages", "green bubble", "blue bubble", "end-to-end encryption", "group chats", "telegram", "discord", "mms", "rsc messaging", "signal", "snapchat"],
+    "Ecosystem & Integration": ["google services", "apple ecosystem", "icloud", "android sync", "airdrop", "samsung wallet", "google wallet", "continuity", "handoff", "apple watch", "google assistant", "siri", "carplay", "android auto", "multi-device sync"],
+    "Software Updates & Longevity": ["updates", "software support", "os updates", "security patch", "android versions", "planned obsolescence", "long term updates", "kernel update", "beta software", "stable updates", "one ui updates", "ios updates", "security vulnerabilities"],
+    "Privacy & Security": ["privacy", "security", "encryption", "open source", "data collection", "permissions", "apple security", "google tracking", "two-factor authentication", "lock screen", "app tracking transparency", "vpn support", "ad tracking", "face unlock", "fingerprint unlock", "passcode protection"],
+    "Regional & Cultural Differences": ["us", "europe", "regional", "country", "market", "brand perception", "availability", "pricing differences", "network bands", "import fees", "regional pricing", "limited edition", "model exclusivity", "carrier support", "5g bands", "wifi calling"],
+    "iOS to Android": ["switching to android", "moved to android", "left iphone", "quit iphone", "got an android", "ditched iphone", "tired of iphone", "switched from iphone", "android better than ios", "apple too expensive", "needed customization", "more device choices", "wanted a bigger battery", "hated apple ecosystem", "left because of restrictions", "app sideloading", "better gaming experience"],
+    "Android to iOS": ["switching to iphone", "moved to iphone", "left android", "quit android", "got an iphone", "ditched android", "tired of android", "switched from android", "ios better than android", "wanted better security", "better camera experience", "ios updates are better", "smoother UI", "better resale value", "apple ecosystem", "wanted iMessage and FaceTime", "better privacy features"]
+}